@@ -0,0 +1,69 @@
+# 比較 get_current_user 有無快取時，每次驗證的耗時與資料庫查詢次數
+# 用法: python -m app.benchmarks.auth_overhead --requests 5000
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import event, text
+from starlette.requests import Request
+
+from app.database import engine
+from app.utils.auth import create_access_token
+from app.utils.dependencies import auth_cache, get_current_user
+
+
+def make_request(token: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"authorization", f"Bearer {token}".encode("ascii"))],
+        "client": ("127.0.0.1", 0),
+    })
+
+
+async def authenticate(request: Request, requests: int):
+    for _ in range(requests):
+        await get_current_user(request)
+
+
+def measure(request: Request, requests: int, ttl: float):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    auth_cache.clear()
+    original_ttl, auth_cache.ttl = auth_cache.ttl, ttl
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        started = time.perf_counter()
+        asyncio.run(authenticate(request, requests))
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        auth_cache.ttl = original_ttl
+        auth_cache.clear()
+    return elapsed, len(statements)
+
+
+def run(requests: int):
+    with engine.connect() as connection:
+        user_id = connection.execute(text("SELECT id FROM users LIMIT 1")).scalar()
+    if user_id is None:
+        raise RuntimeError("The benchmark needs at least one user")
+    request = make_request(create_access_token({"sub": str(user_id)}))
+
+    results = {
+        "no cache": measure(request, requests, ttl=0),
+        "cache": measure(request, requests, ttl=60),
+    }
+    for name, (elapsed, statements) in results.items():
+        print(f"{requests:>8} requests | {name:<8} | {elapsed / requests * 1e6:>8.1f} us/request | {statements:>6} queries")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the authentication dependency")
+    parser.add_argument("--requests", type=int, default=5_000)
+    args = parser.parse_args()
+    run(args.requests)
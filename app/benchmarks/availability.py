@@ -0,0 +1,71 @@
+# 量測「誰請假」可用性查詢: 大型組織在任意區間內每天的請假人員
+# 用法: python -m app.benchmarks.availability --users 2000 --days 90
+# 假資料在交易中建立，結束後 rollback
+import argparse
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.crud.calendar import get_absent_user_ids, iter_availability_json
+
+START = date(2032, 1, 1)
+
+
+def seed(connection, users: int, requests_per_user: int):
+    user_ids = connection.execute(text("""
+        INSERT INTO users (employee_id, first_name, last_name, email, password_hash, position, hire_date)
+        SELECT 'AVL' || g, 'First' || g, 'Last' || g, 'availability' || g || '@example.com', 'x', 'Engineer',
+               DATE '2020-01-01'
+        FROM generate_series(1, :users) AS g
+        RETURNING id
+    """), {"users": users}).scalars().all()
+    # 每位使用者的假單間隔 60 天，彼此不重疊
+    connection.execute(text("""
+        INSERT INTO leave_requests (request_id, user_id, leave_type_id, proxy_user_id, start_date, end_date,
+                                    days_count, reason, status)
+        SELECT 'AVL' || u.id || '-' || g,
+               u.id,
+               (SELECT min(id) FROM leave_types),
+               u.id,
+               DATE '2032-01-01' + (u.id % 53) + g * 60,
+               DATE '2032-01-01' + (u.id % 53) + g * 60 + (u.id + g) % 5,
+               1 + (u.id + g) % 5,
+               'availability benchmark',
+               'approved'
+        FROM unnest(CAST(:user_ids AS INTEGER[])) AS u(id), generate_series(0, :requests - 1) AS g
+    """), {"user_ids": list(user_ids), "requests": requests_per_user})
+    connection.execute(text("ANALYZE leave_requests"))
+
+
+def run(users: int, requests_per_user: int, days: int, repeat: int):
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            seed(connection, users, requests_per_user)
+            db = Session(bind=connection)
+            date_to = START + timedelta(days=days - 1)
+
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                absent_by_day = get_absent_user_ids(db, START, date_to)
+                body = "".join(iter_availability_json(START, date_to, None, absent_by_day))
+                timings.append(time.perf_counter() - started)
+            entries = sum(len(user_ids) for user_ids in absent_by_day)
+            print(f"{users:>6} users | {days:>3} days | {entries:>6} user-days | {len(body) / 1024:>7.1f} KiB"
+                  f" | best {min(timings) * 1000:>7.1f} ms")
+        finally:
+            transaction.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the who's-out availability query")
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--requests-per-user", type=int, default=6)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.users, args.requests_per_user, args.days, args.repeat)
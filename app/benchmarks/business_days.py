@@ -0,0 +1,61 @@
+# 比較舊的週末迴圈與工作天前綴陣列在大量區間計算上的速度
+# 用法: python -m app.benchmarks.business_days --ranges 1000000
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from app.utils.business_days import BusinessDayCalendar
+
+
+def legacy_weekday_count(start_date: date, end_date: date) -> int:
+    # 原本 calculate_leave_days_excluding_weekends 的做法 (不含假日)
+    total_days = (end_date - start_date).days + 1
+    full_weeks = total_days // 7
+    weekend_days = full_weeks * 2
+    extra_days = total_days % 7
+    start_weekday = start_date.weekday()
+    for i in range(extra_days):
+        if (start_weekday + i) % 7 >= 5:
+            weekend_days += 1
+    return total_days - weekend_days
+
+
+def walk_with_holidays(holidays, start_date: date, end_date: date) -> int:
+    # 加上假日後若仍逐日檢查的做法
+    days, current = 0, start_date
+    while current <= end_date:
+        if current.weekday() < 5 and current not in holidays:
+            days += 1
+        current += timedelta(days=1)
+    return days
+
+
+def run(ranges: int):
+    random.seed(0)
+    base = date(2020, 1, 1)
+    holidays = {base + timedelta(days=random.randrange(2200)) for _ in range(120)}
+    pairs = []
+    for _ in range(ranges):
+        start = base + timedelta(days=random.randrange(2000))
+        pairs.append((start, start + timedelta(days=random.randrange(30))))
+    calendar = BusinessDayCalendar(holidays)
+
+    cases = {
+        "weekend loop (no holidays)": lambda s, e: legacy_weekday_count(s, e),
+        "day walk with holidays": lambda s, e: walk_with_holidays(holidays, s, e),
+        "prefix arrays with holidays": calendar.count,
+    }
+    for name, fn in cases.items():
+        started = time.perf_counter()
+        for start, end in pairs:
+            fn(start, end)
+        elapsed = time.perf_counter() - started
+        print(f"{ranges:>9} ranges | {name:<28} | {elapsed:>6.2f} s | {elapsed / ranges * 1e9:>6.0f} ns/range")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark business-day range counting")
+    parser.add_argument("--ranges", type=int, default=1_000_000)
+    args = parser.parse_args()
+    run(args.ranges)
@@ -0,0 +1,81 @@
+# 模擬早上大量同時開啟系統: 多個客戶端同時讀取假單列表、團隊列表、待審核、假別餘額與通知
+# 用法: python -m app.benchmarks.concurrent_clients --clients 500 --requests-per-client 10
+#       DB_ASYNC=true python -m app.benchmarks.concurrent_clients   (asyncpg 路徑；不設定則為 threadpool 路徑)
+#       python -m app.benchmarks.concurrent_clients --base-url http://localhost:8000   (對執行中的服務)
+# 只送出讀取請求，不會寫入資料
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app.benchmarks.login_storm import summary
+from app.config import settings
+from app.main import app
+
+EMPLOYEE_PATHS = ["/api/leave-requests", "/api/leave-balances", "/api/notifications"]
+MANAGER_PATHS = ["/api/leave-requests/team", "/api/leave-requests/pending", "/api/leave-balances/{employee_id}"]
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str):
+    response = await client.post("/api/auth/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    # 以 Authorization header 區分身分，不共用 cookie
+    client.cookies.clear()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run(args):
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        transport, base_url = httpx.ASGITransport(app=app), "http://benchmark"
+
+    limits = httpx.Limits(max_connections=args.clients)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=120, limits=limits) as client:
+        employee = await login(client, args.employee, args.password)
+        manager = await login(client, args.manager, args.password)
+        employee_id = (await client.get("/api/users/me", headers=employee)).json()["id"]
+        requests = [(path, employee) for path in EMPLOYEE_PATHS]
+        requests += [(path.format(employee_id=employee_id), manager) for path in MANAGER_PATHS]
+
+        latencies = {path: [] for path, _ in requests}
+        failures = 0
+        start = asyncio.Event()
+
+        async def session(client_index: int):
+            nonlocal failures
+            await start.wait()
+            for i in range(args.requests_per_client):
+                path, headers = requests[(client_index + i) % len(requests)]
+                started = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                latencies[path].append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+
+        tasks = [asyncio.create_task(session(i)) for i in range(args.clients)]
+        started = time.perf_counter()
+        start.set()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    total = args.clients * args.requests_per_client
+    mode = "remote" if args.base_url else ("asyncpg" if settings.DB_ASYNC else "threadpool")
+    print(f"{mode}: {args.clients} clients x {args.requests_per_client} requests | "
+          f"{total / elapsed:.0f} requests/s | {failures} failures")
+    print(summary("all", [latency for values in latencies.values() for latency in values]))
+    for path, values in latencies.items():
+        print(f"  {path:<32} {summary('', values)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent read load on the leave routes")
+    parser.add_argument("--base-url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests-per-client", type=int, default=10)
+    parser.add_argument("--employee", default="carolyn50@example.com")
+    parser.add_argument("--manager", default="jessicavalentine@example.org")
+    parser.add_argument("--password", default="test")
+    args = parser.parse_args()
+    asyncio.run(run(args))
@@ -0,0 +1,71 @@
+# 量測月結累積快照的產生時間，以及 as-of 查詢讀快照與即時計算的差異
+# 用法: python -m app.benchmarks.leave_accruals --users 100000
+# 月結作業會 commit，假資料也必須 commit；結束後刪除
+import argparse
+import time
+from datetime import date
+
+from sqlalchemy import text
+
+from app.database import engine, SessionLocal
+from app.crud.leave_accrual import materialize_accruals, get_accruals
+
+YEAR = 2099
+
+
+def seed(connection, users: int):
+    user_ids = connection.execute(text("""
+        INSERT INTO users (employee_id, first_name, last_name, email, password_hash, position, hire_date)
+        SELECT 'ACC' || g, 'First' || g, 'Last' || g, 'accrual' || g || '@example.com', 'x', 'Engineer',
+               DATE '2098-01-01' + (g * 7) % 700
+        FROM generate_series(1, :users) AS g
+        RETURNING id
+    """), {"users": users}).scalars().all()
+    leave_type_id = connection.execute(text(
+        "INSERT INTO leave_types (name, color_code) VALUES ('accrual-bench', '#000000') RETURNING id"
+    )).scalar_one()
+    connection.execute(text("""
+        INSERT INTO leave_accrual_rules (leave_type_id, days_per_month, waiting_months, max_days)
+        VALUES (:leave_type_id, 1.25, 3, 15)
+    """), {"leave_type_id": leave_type_id})
+    return list(user_ids), leave_type_id
+
+
+def cleanup(connection, user_ids, leave_type_id):
+    params = {"user_ids": user_ids, "leave_type_id": leave_type_id}
+    connection.execute(text("DELETE FROM leave_accruals WHERE leave_type_id = :leave_type_id"), params)
+    connection.execute(text("DELETE FROM leave_accrual_rules WHERE leave_type_id = :leave_type_id"), params)
+    connection.execute(text("DELETE FROM leave_types WHERE id = :leave_type_id"), params)
+    connection.execute(text("DELETE FROM users WHERE id = ANY(CAST(:user_ids AS INTEGER[]))"), params)
+
+
+def time_queries(db, user_ids, as_of: date, queries: int) -> float:
+    started = time.perf_counter()
+    for i in range(queries):
+        get_accruals(db, user_ids[i * 7919 % len(user_ids)], as_of)
+    return (time.perf_counter() - started) / queries * 1000
+
+
+def run(users: int, queries: int):
+    with engine.begin() as connection:
+        user_ids, leave_type_id = seed(connection, users)
+    db = SessionLocal()
+    try:
+        for month in (1, 6, 12):
+            started = time.perf_counter()
+            rows = materialize_accruals(db, YEAR, month)
+            print(f"materialize {YEAR}-{month:02d} | {rows:>8} rows | {time.perf_counter() - started:>6.2f} s")
+        print(f"as-of snapshot  | {time_queries(db, user_ids, date(YEAR, 6, 30), queries):>6.2f} ms/query")
+        print(f"as-of computed  | {time_queries(db, user_ids, date(YEAR, 7, 31), queries):>6.2f} ms/query")
+    finally:
+        db.close()
+        with engine.begin() as connection:
+            cleanup(connection, user_ids, leave_type_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark monthly leave accruals")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    run(args.users, args.queries)
@@ -0,0 +1,137 @@
+# 比較餘額計算「逐假別查詢 (1+N)」與「彙總 + 批次查詢」兩種路徑的 SQL 數量與耗時
+# 用法: python -m app.benchmarks.leave_balances --leave-types 1 5 12 30 --requests-per-type 10
+# 假資料 (使用者、假別、今年度額度與已核准假單) 在交易中建立，結束後 rollback
+import argparse
+import time
+from datetime import date
+
+from sqlalchemy import event, func, text
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.crud.leave_balance import get_leave_balances
+from app.models.leave_quota import LeaveQuota
+from app.models.leave_request import LeaveRequest
+from app.models.leave_type import LeaveType
+from app.schemas.leave_balance import LeaveBalanceResponse, LeaveBalanceItem, LeaveTypeInfo, LeaveRequestSummary
+
+
+def legacy_leave_balances(db: Session, user_id: int) -> LeaveBalanceResponse:
+    # 舊的實作: 先查配額，再逐假別查已核准假單並在 Python 加總
+    year = date.today().year
+    quotas = (
+        db.query(LeaveQuota)
+        .join(LeaveType, LeaveQuota.leave_type_id == LeaveType.id)
+        .filter(LeaveQuota.user_id == user_id, LeaveQuota.year == year)
+        .all()
+    )
+    balances = []
+    for quota_entry in quotas:
+        leave_type = quota_entry.leave_type
+        approved_requests = (
+            db.query(LeaveRequest)
+            .filter(
+                LeaveRequest.user_id == user_id,
+                LeaveRequest.leave_type_id == leave_type.id,
+                func.extract('year', LeaveRequest.start_date) == year,
+                LeaveRequest.status == 'approved'
+            )
+            .all()
+        )
+        used_days = sum([r.days_count for r in approved_requests])
+        balances.append(LeaveBalanceItem(
+            leave_type=LeaveTypeInfo.from_orm(leave_type),
+            quota=quota_entry.quota,
+            used_days=used_days,
+            remaining_days=quota_entry.quota - used_days,
+            leave_requests=[LeaveRequestSummary.from_orm(r) for r in approved_requests]
+        ))
+    return LeaveBalanceResponse(year=year, balances=balances)
+
+
+def seed(connection, leave_types: int, requests_per_type: int) -> int:
+    year = date.today().year
+    user_id = connection.execute(text("""
+        INSERT INTO users (employee_id, first_name, last_name, email, password_hash, position, hire_date, is_manager)
+        VALUES ('LBBENCH', 'Balance', 'Bench', 'leave-balance-bench@example.com', 'x', 'Engineer', DATE '2010-01-01', false)
+        RETURNING id
+    """)).scalar()
+    leave_type_ids = connection.execute(text("""
+        INSERT INTO leave_types (name, color_code) SELECT 'balance-bench-' || g, '#000000' FROM generate_series(1, :leave_types) AS g
+        RETURNING id
+    """), {"leave_types": leave_types}).scalars().all()
+    params = {"user_id": user_id, "type_ids": list(leave_type_ids), "year": year}
+    connection.execute(text("""
+        INSERT INTO leave_quotas (user_id, leave_type_id, year, quota)
+        SELECT :user_id, t.id, :year, 30 FROM unnest(CAST(:type_ids AS INTEGER[])) AS t(id)
+    """), params)
+    # 每張假單一天，依序排在今年的不同日期 (排他約束不允許同一人的假期重疊)
+    connection.execute(text("""
+        INSERT INTO leave_requests (request_id, user_id, leave_type_id, proxy_user_id, start_date, end_date,
+                                    days_count, reason, status, approved_at)
+        SELECT 'LBBENCH' || g, :user_id, t.ids[1 + g % array_length(t.ids, 1)], :user_id,
+               make_date(:year, 1, 1) + g, make_date(:year, 1, 1) + g,
+               1, 'benchmark leave request ' || g, 'approved', now()
+        FROM generate_series(0, :requests - 1) AS g, (SELECT CAST(:type_ids AS INTEGER[]) AS ids) AS t
+    """), {**params, "requests": leave_types * requests_per_type})
+    connection.execute(text("""
+        INSERT INTO leave_usage (user_id, leave_type_id, year, used_days, pending_days)
+        SELECT user_id, leave_type_id, :year, sum(days_count), 0 FROM leave_requests
+        WHERE user_id = :user_id GROUP BY user_id, leave_type_id
+    """), params)
+    return user_id
+
+
+def measure(fn, repeat: int):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = fn()
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return result, elapsed / repeat, len(statements) // repeat
+
+
+def run(leave_types: int, requests_per_type: int, repeat: int):
+    if leave_types * requests_per_type > 365:
+        raise ValueError("leave types x requests per type must fit in one year (365 days)")
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            user_id = seed(connection, leave_types, requests_per_type)
+            db = Session(bind=connection)
+
+            def legacy():
+                response = legacy_leave_balances(db, user_id)
+                db.expunge_all()
+                return response
+
+            results = {
+                "per type": measure(legacy, repeat),
+                "aggregate": measure(lambda: get_leave_balances(db, user_id), repeat),
+            }
+            totals = {name: sorted((b.leave_type.id, float(b.used_days)) for b in response.balances)
+                      for name, (response, _, _) in results.items()}
+            assert totals["per type"] == totals["aggregate"], "both paths must report the same used days"
+
+            for name, (_, elapsed, statements) in results.items():
+                print(f"{leave_types:>4} leave types | {name:<9} | {elapsed * 1000:>8.2f} ms/call | {statements:>4} queries")
+        finally:
+            transaction.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the leave balance query paths")
+    parser.add_argument("--leave-types", type=int, nargs="+", default=[1, 5, 12, 30])
+    parser.add_argument("--requests-per-type", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    for leave_types in args.leave_types:
+        run(leave_types, args.requests_per_type, args.repeat)
@@ -0,0 +1,95 @@
+# 量測假單匯出的串流吞吐量與記憶體 (伺服器端游標 + 分批編碼)
+# 用法: python -m app.benchmarks.leave_export --rows 5000000
+# 匯出使用自己的連線，假資料必須 commit；結束後刪除 (建議之後執行 VACUUM)
+import argparse
+import resource
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.crud.report import build_team_export_query, iter_export, gzip_chunks
+
+
+def seed(connection, members: int, rows: int) -> int:
+    manager_id = connection.execute(text("""
+        INSERT INTO users (employee_id, first_name, last_name, email, password_hash, position, hire_date, is_manager)
+        VALUES ('EXPMGR', 'Export', 'Manager', 'export-manager@example.com', 'x', 'Manager', DATE '2020-01-01', true)
+        RETURNING id
+    """)).scalar_one()
+    user_ids = connection.execute(text("""
+        INSERT INTO users (employee_id, first_name, last_name, email, password_hash, position, hire_date)
+        SELECT 'EXP' || g, 'First' || g, 'Last' || g, 'export' || g || '@example.com', 'x', 'Engineer', DATE '2020-01-01'
+        FROM generate_series(1, :members) AS g
+        RETURNING id
+    """), {"members": members}).scalars().all()
+    connection.execute(text("""
+        INSERT INTO managers (user_id, manager_id) SELECT u.id, :manager_id FROM unnest(CAST(:user_ids AS INTEGER[])) AS u(id)
+    """), {"user_ids": list(user_ids), "manager_id": manager_id})
+    # 每位成員的假單逐日排開，彼此不重疊
+    connection.execute(text("""
+        INSERT INTO leave_requests (request_id, user_id, leave_type_id, proxy_user_id, approver_id, start_date, end_date,
+                                    days_count, reason, status, approved_at)
+        SELECT 'EXP' || g,
+               team.ids[1 + g % :members],
+               (SELECT min(id) FROM leave_types),
+               :manager_id,
+               :manager_id,
+               DATE '1900-01-01' + g / :members,
+               DATE '1900-01-01' + g / :members,
+               1,
+               '匯出測試 export benchmark ' || g,
+               'approved',
+               now()
+        FROM generate_series(1, :rows) AS g, (SELECT CAST(:user_ids AS INTEGER[]) AS ids) AS team
+    """), {"user_ids": list(user_ids), "members": members, "rows": rows, "manager_id": manager_id})
+    return manager_id
+
+
+def cleanup(connection, manager_id: int):
+    member_ids = connection.execute(
+        text("SELECT user_id FROM managers WHERE manager_id = :manager_id"), {"manager_id": manager_id}
+    ).scalars().all()
+    params = {"user_ids": list(member_ids), "manager_id": manager_id}
+    connection.execute(text("DELETE FROM leave_requests WHERE user_id = ANY(CAST(:user_ids AS INTEGER[]))"), params)
+    connection.execute(text("DELETE FROM managers WHERE manager_id = :manager_id"), params)
+    connection.execute(text("DELETE FROM users WHERE id = ANY(CAST(:user_ids AS INTEGER[])) OR id = :manager_id"), params)
+
+
+def measure(label: str, chunks):
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{label:<12} | {elapsed:>6.1f} s | {size / elapsed / 1024 / 1024:>6.1f} MiB/s | {size / 1024 / 1024:>8.1f} MiB"
+          f" | peak RSS {rss_after / 1024:>6.1f} MiB (+{(rss_after - rss_before) / 1024:.1f})")
+    return elapsed
+
+
+def run(members: int, rows: int):
+    with engine.begin() as connection:
+        started = time.perf_counter()
+        manager_id = seed(connection, members, rows)
+    print(f"seeded {rows} rows in {time.perf_counter() - started:.1f} s")
+    try:
+        with Session(engine) as db:
+            queries = {export_format: build_team_export_query(db, manager_id, export_format) for export_format in ("csv", "ndjson")}
+        for export_format in ("csv", "ndjson"):
+            elapsed = measure(export_format, iter_export(queries[export_format], export_format))
+            print(f"{'':<12} | {rows / elapsed:>8.0f} rows/s")
+            measure(f"{export_format}+gzip", gzip_chunks(iter_export(queries[export_format], export_format)))
+    finally:
+        with engine.begin() as connection:
+            cleanup(connection, manager_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the streaming leave request export")
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    run(args.members, args.rows)
@@ -0,0 +1,117 @@
+# 比較團隊假單列表「joinedload + from_orm」與「欄位投影 + 批次查詢」兩種路徑
+# 用法: python -m app.benchmarks.list_projection --rows 10000 100000
+# 假資料在交易中建立，結束後 rollback
+import argparse
+import time
+import tracemalloc
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session, joinedload
+
+from app.database import engine
+from app.crud.leave import get_team_leave_requests
+from app.models.leave_request import LeaveRequest
+from app.models.manager import Manager
+from app.schemas.leave import LeaveRequestTeamItem, LeaveTypeBasic, ProxyUserOut
+
+
+def legacy_team_listing(db: Session, team_user_ids, limit: int):
+    # 舊的實作: 四個 joinedload，逐筆 from_orm
+    query = db.query(LeaveRequest).options(
+        joinedload(LeaveRequest.user),
+        joinedload(LeaveRequest.leave_type),
+        joinedload(LeaveRequest.proxy_user),
+        joinedload(LeaveRequest.approver)
+    ).filter(LeaveRequest.user_id.in_(team_user_ids))
+    query.count()
+    results = query.order_by(LeaveRequest.start_date.desc()).limit(limit).all()
+    return [
+        LeaveRequestTeamItem(
+            id=req.id,
+            request_id=req.request_id,
+            leave_type=LeaveTypeBasic.from_orm(req.leave_type),
+            start_date=req.start_date,
+            end_date=req.end_date,
+            days_count=req.days_count,
+            reason=req.reason,
+            status=req.status,
+            rejection_reason=req.rejection_reason,
+            proxy_person=ProxyUserOut.from_orm(req.proxy_user),
+            approver=ProxyUserOut.from_orm(req.approver) if req.approver else None,
+            approved_at=req.approved_at,
+            created_at=req.created_at,
+            user=ProxyUserOut.from_orm(req.user)
+        )
+        for req in results
+    ]
+
+
+def seed(connection, manager_id: int, rows: int):
+    # 同一位成員的假單依序排在不重疊的三天區段，從 2200 年起排，不會碰到既有資料 (排他約束)
+    connection.execute(text("""
+        INSERT INTO leave_requests (request_id, user_id, leave_type_id, proxy_user_id, approver_id, start_date, end_date,
+                                    days_count, reason, status, approved_at)
+        SELECT 'BENCH' || g,
+               team.ids[1 + g % array_length(team.ids, 1)],
+               t.ids[1 + g % array_length(t.ids, 1)],
+               team.ids[1 + (g + 1) % array_length(team.ids, 1)],
+               :manager_id,
+               DATE '2200-01-01' + 3 * (g / array_length(team.ids, 1)),
+               DATE '2200-01-01' + 3 * (g / array_length(team.ids, 1)) + 2,
+               3,
+               'benchmark leave request ' || g,
+               'approved',
+               now()
+        FROM generate_series(1, :rows) AS g,
+             (SELECT array_agg(user_id) AS ids FROM managers WHERE manager_id = :manager_id) AS team,
+             (SELECT array_agg(id) AS ids FROM leave_types) AS t
+    """), {"manager_id": manager_id, "rows": rows})
+
+
+def measure(fn):
+    # 時間與記憶體分開量測，避免 tracemalloc 的額外開銷影響吞吐量
+    started = time.perf_counter()
+    count = len(fn())
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def run(rows: int):
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            manager_id = connection.execute(text("SELECT manager_id FROM managers LIMIT 1")).scalar()
+            if manager_id is None:
+                raise RuntimeError("The benchmark needs at least one manager relation")
+            seed(connection, manager_id, rows)
+
+            db = Session(bind=connection)
+            team_user_ids = [r[0] for r in db.query(Manager.user_id).filter(Manager.manager_id == manager_id)]
+
+            def legacy():
+                items = legacy_team_listing(db, team_user_ids, rows)
+                db.expunge_all()
+                return items
+
+            results = {
+                "joinedload": measure(legacy),
+                "projection": measure(lambda: get_team_leave_requests(db, manager_id, page=1, per_page=rows)["items"]),
+            }
+
+            for name, (count, elapsed, peak) in results.items():
+                print(f"{rows:>8} rows | {name:<10} | {count / elapsed:>10.0f} rows/s | peak {peak / 1024 / 1024:>7.1f} MiB")
+        finally:
+            transaction.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the team leave listing paths")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+    for rows in args.rows:
+        run(rows)
@@ -0,0 +1,103 @@
+# 模擬上班時段的大量登入：同時送出多個登入請求，並持續以 /api/users/me 探測 event loop 是否被阻塞
+# 用法: python -m app.benchmarks.login_storm --logins 200 --concurrency 50
+#       python -m app.benchmarks.login_storm --base-url http://localhost:8000   (對執行中的服務)
+#       加上 --baseline 則在 event loop 上直接驗證密碼 (舊的行為)，僅限同一行程內的測試
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.main import app
+from app.routes import auth as auth_routes
+from app.utils.auth import verify_and_update_password
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summary(name: str, latencies):
+    if not latencies:
+        return f"{name:<6} | no samples"
+    return (f"{name:<6} | n={len(latencies):>5} | p50 {percentile(latencies, 50) * 1000:>8.1f} ms"
+            f" | p99 {percentile(latencies, 99) * 1000:>8.1f} ms | max {max(latencies) * 1000:>8.1f} ms")
+
+
+async def login_storm(client: httpx.AsyncClient, logins: int, concurrency: int, username: str, password: str):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def login():
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post("/api/auth/login", json={"username": username, "password": password})
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                failures += 1
+
+    await asyncio.gather(*(login() for _ in range(logins)))
+    return latencies, failures
+
+
+async def probe(client: httpx.AsyncClient, token: str, stop: asyncio.Event, interval: float):
+    # 一般 API 的延遲；若密碼驗證佔住 event loop，這裡會一起變慢
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"})
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def run(args):
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        transport, base_url = httpx.ASGITransport(app=app), "http://benchmark"
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=120) as client:
+        response = await client.post("/api/auth/login", json={"username": args.username, "password": args.password})
+        response.raise_for_status()
+        token = response.json()["access_token"]
+
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, token, stop, args.probe_interval))
+        started = time.perf_counter()
+        login_latencies, failures = await login_storm(client, args.logins, args.concurrency, args.username, args.password)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        probe_latencies = await probe_task
+
+    print(f"{args.logins} logins, concurrency {args.concurrency}: {args.logins / elapsed:.1f} logins/s, {failures} failures")
+    print(summary("login", login_latencies))
+    print(summary("probe", probe_latencies))
+    if probe_latencies:
+        print(f"probe mean {statistics.mean(probe_latencies) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Login storm load test")
+    parser.add_argument("--base-url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--username", default="carolyn50@example.com")
+    parser.add_argument("--password", default="test")
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+    parser.add_argument("--baseline", action="store_true", help="Verify passwords on the event loop (previous behaviour)")
+    args = parser.parse_args()
+
+    if args.baseline:
+        if args.base_url:
+            parser.error("--baseline only applies to the in-process app")
+
+        async def verify_on_event_loop(plain_password, hashed_password):
+            return verify_and_update_password(plain_password, hashed_password)
+
+        auth_routes.verify_and_update_password_async = verify_on_event_loop
+
+    asyncio.run(run(args))
@@ -0,0 +1,46 @@
+# 比較主管 / 團隊查詢走資料庫與走行程內組織圖快取的耗時
+# 用法: python -m app.benchmarks.org_chart --lookups 20000
+import argparse
+import time
+
+from sqlalchemy import select
+
+from app.database import SessionLocal
+from app.crud.org import get_org_chart
+from app.models.manager import Manager
+
+
+def sql_lookup(db, user_id: int):
+    manager_id = db.scalar(select(Manager.manager_id).where(Manager.user_id == user_id).limit(1))
+    return db.scalars(select(Manager.user_id).where(Manager.manager_id == manager_id)).all()
+
+
+def cached_lookup(db, user_id: int):
+    chart = get_org_chart(db)
+    return chart.reports_of(chart.manager_of(user_id) or 0)
+
+
+def run(lookups: int):
+    db = SessionLocal()
+    try:
+        user_ids = db.scalars(select(Manager.user_id)).all()
+        if not user_ids:
+            raise RuntimeError("The benchmark needs at least one manager relation")
+        started = time.perf_counter()
+        chart = get_org_chart(db)
+        print(f"loaded org chart version {chart.version} with {len(chart.report_ids)} edges in {(time.perf_counter() - started) * 1000:.1f} ms")
+        for name, lookup in (("sql", sql_lookup), ("org chart", cached_lookup)):
+            started = time.perf_counter()
+            for i in range(lookups):
+                lookup(db, user_ids[i % len(user_ids)])
+            elapsed = time.perf_counter() - started
+            print(f"{name:<10} | {lookups:>8} lookups | {elapsed / lookups * 1e6:>8.1f} us/lookup")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark manager and team lookups")
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+    run(args.lookups)
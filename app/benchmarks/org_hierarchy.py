@@ -0,0 +1,86 @@
+# 量測閉包表解析整個下層組織: 多層級、大量人員的組織樹
+# 用法: python -m app.benchmarks.org_hierarchy --users 20000 --levels 10
+# 重建閉包表會 commit，假資料也必須 commit；結束後刪除
+import argparse
+import time
+
+from sqlalchemy import select, func, text
+
+from app.database import engine, SessionLocal
+from app.crud.org import org_member_ids, rebuild_org_hierarchy
+from app.models.manager import Manager
+
+
+def seed(connection, users: int, levels: int):
+    user_ids = connection.execute(text("""
+        INSERT INTO users (employee_id, first_name, last_name, email, password_hash, position, hire_date, is_manager)
+        SELECT 'ORGB' || g, 'First' || g, 'Last' || g, 'org-bench' || g || '@example.com', 'x', 'Engineer', DATE '2020-01-01', true
+        FROM generate_series(1, :users) AS g
+        RETURNING id
+    """), {"users": users}).scalars().all()
+    # 依序把人員分到各層，每層的人平均掛在上一層的主管底下
+    per_level = [user_ids[:1]]
+    remaining = user_ids[1:]
+    for level in range(1, levels):
+        size = len(remaining) if level == levels - 1 else min(len(remaining), len(per_level[-1]) * 3)
+        per_level.append(remaining[:size])
+        remaining = remaining[size:]
+    edges = [
+        {"user_id": user_id, "manager_id": parents[i % len(parents)]}
+        for parents, level_ids in zip(per_level, per_level[1:])
+        for i, user_id in enumerate(level_ids)
+    ]
+    connection.execute(Manager.__table__.insert(), edges)
+    return list(user_ids), per_level
+
+
+def cleanup(connection, user_ids):
+    params = {"user_ids": user_ids}
+    connection.execute(text("DELETE FROM managers WHERE user_id = ANY(CAST(:user_ids AS INTEGER[]))"), params)
+    connection.execute(text("DELETE FROM users WHERE id = ANY(CAST(:user_ids AS INTEGER[]))"), params)
+
+
+def walk_levels(db, manager_id: int) -> int:
+    # 舊的做法: 每一層一次查詢
+    frontier, members = [manager_id], 0
+    while frontier:
+        frontier = db.scalars(select(Manager.user_id).where(Manager.manager_id.in_(frontier))).all()
+        members += len(frontier)
+    return members
+
+
+def closure(db, manager_id: int) -> int:
+    return db.scalar(select(func.count()).select_from(org_member_ids(manager_id).subquery()))
+
+
+def measure(label: str, resolve, db, manager_id: int, repeat: int = 20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        members = resolve(db, manager_id)
+    print(f"{label:<14} | {members:>6} members | {(time.perf_counter() - started) / repeat * 1000:>8.2f} ms")
+
+
+def run(users: int, levels: int):
+    with engine.begin() as connection:
+        user_ids, per_level = seed(connection, users, levels)
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        rows = rebuild_org_hierarchy(db)
+        print(f"rebuilt closure with {rows} rows in {time.perf_counter() - started:.2f} s")
+        for level in (0, levels // 2):
+            manager_id = per_level[level][0]
+            measure(f"walk L{level}", walk_levels, db, manager_id)
+            measure(f"closure L{level}", closure, db, manager_id)
+    finally:
+        db.close()
+        with engine.begin() as connection:
+            cleanup(connection, user_ids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark resolving an org subtree")
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--levels", type=int, default=10)
+    args = parser.parse_args()
+    run(args.users, args.levels)
@@ -0,0 +1,84 @@
+# 量測代理人建議: 團隊請假位元組建立一次後，每次查詢只做位元 AND
+# 用法: python -m app.benchmarks.proxy_candidates --members 300 --queries 1000
+# 假資料在交易中建立，結束後 rollback
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.crud.availability import availability_index, get_proxy_candidates
+
+YEAR = 2033
+
+
+def seed(connection, members: int, requests_per_member: int) -> int:
+    manager_id = connection.execute(text("""
+        INSERT INTO users (employee_id, first_name, last_name, email, password_hash, position, hire_date, is_manager)
+        VALUES ('PRXMGR', 'Proxy', 'Manager', 'proxy-manager@example.com', 'x', 'Manager', DATE '2020-01-01', true)
+        RETURNING id
+    """)).scalar_one()
+    user_ids = connection.execute(text("""
+        INSERT INTO users (employee_id, first_name, last_name, email, password_hash, position, hire_date)
+        SELECT 'PRX' || g, 'First' || g, 'Last' || g, 'proxy' || g || '@example.com', 'x', 'Engineer', DATE '2020-01-01'
+        FROM generate_series(1, :members) AS g
+        RETURNING id
+    """), {"members": members}).scalars().all()
+    connection.execute(text("""
+        INSERT INTO managers (user_id, manager_id) SELECT u.id, :manager_id FROM unnest(CAST(:user_ids AS INTEGER[])) AS u(id)
+    """), {"user_ids": list(user_ids), "manager_id": manager_id})
+    # 每位成員的假單間隔 60 天，彼此不重疊
+    connection.execute(text("""
+        INSERT INTO leave_requests (request_id, user_id, leave_type_id, proxy_user_id, start_date, end_date,
+                                    days_count, reason, status)
+        SELECT 'PRX' || u.id || '-' || g,
+               u.id,
+               (SELECT min(id) FROM leave_types),
+               :manager_id,
+               DATE '2033-01-01' + (u.id % 53) + g * 60,
+               DATE '2033-01-01' + (u.id % 53) + g * 60 + (u.id + g) % 5,
+               1 + (u.id + g) % 5,
+               'proxy benchmark',
+               'approved'
+        FROM unnest(CAST(:user_ids AS INTEGER[])) AS u(id), generate_series(0, :requests - 1) AS g
+    """), {"user_ids": list(user_ids), "requests": requests_per_member, "manager_id": manager_id})
+    connection.execute(text("ANALYZE leave_requests"))
+    return manager_id
+
+
+def run(members: int, requests_per_member: int, queries: int):
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            manager_id = seed(connection, members, requests_per_member)
+            db = Session(bind=connection)
+            availability_index.invalidate()
+
+            started = time.perf_counter()
+            get_proxy_candidates(db, manager_id, True, date(YEAR, 3, 1), date(YEAR, 3, 3))
+            cold = time.perf_counter() - started
+
+            rng = random.Random(0)
+            total = 0
+            started = time.perf_counter()
+            for _ in range(queries):
+                start = date(YEAR, 1, 20) + timedelta(days=rng.randrange(300))
+                total += len(get_proxy_candidates(db, manager_id, True, start, start + timedelta(days=rng.randrange(5))))
+            warm = time.perf_counter() - started
+            print(f"{members:>5} members | cold {cold * 1000:>7.1f} ms | warm {warm / queries * 1000:>6.2f} ms/query"
+                  f" | avg {total / queries:>6.1f} candidates")
+        finally:
+            availability_index.invalidate()
+            transaction.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark proxy candidate ranking")
+    parser.add_argument("--members", type=int, default=300)
+    parser.add_argument("--requests-per-member", type=int, default=6)
+    parser.add_argument("--queries", type=int, default=1_000)
+    args = parser.parse_args()
+    run(args.members, args.requests_per_member, args.queries)
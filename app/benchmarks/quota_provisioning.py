@@ -0,0 +1,87 @@
+# 量測年度額度發放: 大量使用者 × 假別，COPY 到暫存表後一次 upsert
+# 用法: python -m app.benchmarks.quota_provisioning --users 100000 --leave-types 10
+# 發放作業每批 commit，假資料也必須 commit；結束後刪除
+import argparse
+import time
+
+from sqlalchemy import text
+
+from app.database import engine, SessionLocal
+from app.crud.leave_quota import provision_leave_quotas
+from app.schemas.leave_quota import QuotaProvisionRequest, LeaveTypeQuotaPolicy, SeniorityStep
+
+YEAR = 2099
+
+
+def seed(connection, users: int, leave_types: int):
+    user_ids = connection.execute(text("""
+        INSERT INTO users (employee_id, first_name, last_name, email, password_hash, position, hire_date)
+        SELECT 'QP' || g, 'First' || g, 'Last' || g, 'quota' || g || '@example.com', 'x', 'Engineer',
+               DATE '2070-01-01' + (g * 37) % 10000
+        FROM generate_series(1, :users) AS g
+        RETURNING id
+    """), {"users": users}).scalars().all()
+    leave_type_ids = connection.execute(text("""
+        INSERT INTO leave_types (name, color_code) SELECT 'quota-bench-' || g, '#000000' FROM generate_series(1, :leave_types) AS g
+        RETURNING id
+    """), {"leave_types": leave_types}).scalars().all()
+    # 一半的使用者在前一年度有額度與用量，用來驗證遞延
+    connection.execute(text("""
+        INSERT INTO leave_quotas (user_id, leave_type_id, year, quota)
+        SELECT u.id, t.id, :year - 1, 15 FROM unnest(CAST(:user_ids AS INTEGER[])) AS u(id), unnest(CAST(:type_ids AS INTEGER[])) AS t(id)
+        WHERE u.id % 2 = 0
+    """), {"user_ids": list(user_ids), "type_ids": list(leave_type_ids), "year": YEAR})
+    connection.execute(text("""
+        INSERT INTO leave_usage (user_id, leave_type_id, year, used_days, pending_days)
+        SELECT user_id, leave_type_id, year, (user_id % 16), 0 FROM leave_quotas
+        WHERE year = :year - 1 AND leave_type_id = ANY(CAST(:type_ids AS INTEGER[]))
+    """), {"type_ids": list(leave_type_ids), "year": YEAR})
+    return list(user_ids), list(leave_type_ids)
+
+
+def cleanup(connection, user_ids, leave_type_ids):
+    params = {"user_ids": user_ids, "type_ids": leave_type_ids}
+    connection.execute(text("DELETE FROM leave_usage WHERE leave_type_id = ANY(CAST(:type_ids AS INTEGER[]))"), params)
+    connection.execute(text("DELETE FROM leave_quotas WHERE leave_type_id = ANY(CAST(:type_ids AS INTEGER[]))"), params)
+    connection.execute(text("DELETE FROM leave_types WHERE id = ANY(CAST(:type_ids AS INTEGER[]))"), params)
+    connection.execute(text("DELETE FROM users WHERE id = ANY(CAST(:user_ids AS INTEGER[]))"), params)
+
+
+def provision(request: QuotaProvisionRequest, label: str):
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        summary = provision_leave_quotas(db, request)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    rows = summary["users"] * summary["leave_types"]
+    print(f"{label:<10} | {elapsed:>6.2f} s | {rows / elapsed:>9.0f} rows/s | "
+          f"{summary['inserted']} inserted, {summary['updated']} updated, {summary['unchanged']} unchanged")
+
+
+def run(users: int, leave_types: int):
+    with engine.begin() as connection:
+        user_ids, leave_type_ids = seed(connection, users, leave_types)
+    try:
+        steps = [SeniorityStep(years=1, days=7), SeniorityStep(years=2, days=10), SeniorityStep(years=3, days=14),
+                 SeniorityStep(years=5, days=15), SeniorityStep(years=10, days=20)]
+        policies = [LeaveTypeQuotaPolicy(leave_type_id=leave_type_id, base_days=3, seniority_steps=steps, carry_over_max=5, max_days=30)
+                    for leave_type_id in leave_type_ids]
+        request = QuotaProvisionRequest(year=YEAR, leave_types=policies)
+        provision(request, "first run")
+        provision(request, "rerun")
+        request.overwrite = True
+        request.leave_types[0].base_days = 4
+        provision(request, "overwrite")
+    finally:
+        with engine.begin() as connection:
+            cleanup(connection, user_ids, leave_type_ids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bulk leave quota provisioning")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--leave-types", type=int, default=10)
+    args = parser.parse_args()
+    run(args.users, args.leave_types)
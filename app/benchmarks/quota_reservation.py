@@ -0,0 +1,91 @@
+# 模擬年底大量送單：多個執行緒同時對同一個使用者 / 假別 / 年度預留額度
+# 比較「讀取-檢查-寫入」與單一條件式 UPDATE (reserve_pending_days) 的正確性與吞吐量
+# 用法: python -m app.benchmarks.quota_reservation --submissions 2000 --workers 32 --quota 500
+# 使用獨立的年度 (預設 2099)，結束後刪除該年度的額度與帳本列
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import delete, select
+
+from app.database import SessionLocal
+from app.crud.leave_usage import get_leave_usage, apply_leave_usage, reserve_pending_days
+from app.models.leave_quota import LeaveQuota
+from app.models.leave_usage import LeaveUsage
+
+
+def legacy_reserve(db, user_id: int, leave_type_id: int, year: int, days: float) -> bool:
+    # 舊的做法: 先讀額度與用量，在 Python 判斷後再寫入
+    quota = db.execute(select(LeaveQuota.quota).filter_by(user_id=user_id, leave_type_id=leave_type_id, year=year)).scalar()
+    usage = get_leave_usage(db, user_id, leave_type_id, year)
+    reserved = usage.used_days + usage.pending_days if usage else 0
+    if quota is None or reserved + days > quota:
+        return False
+    apply_leave_usage(db, user_id, leave_type_id, year, pending_delta=days)
+    return True
+
+
+def guarded_reserve(db, user_id: int, leave_type_id: int, year: int, days: float) -> bool:
+    return reserve_pending_days(db, user_id, leave_type_id, year, days) is not None
+
+
+def submit(reserve, user_id: int, leave_type_id: int, year: int) -> bool:
+    db = SessionLocal()
+    try:
+        reserved = reserve(db, user_id, leave_type_id, year, 1)
+        db.commit()
+        return reserved
+    finally:
+        db.close()
+
+
+def reset(user_id: int, leave_type_id: int, year: int, quota: int = None):
+    db = SessionLocal()
+    try:
+        db.execute(delete(LeaveUsage).filter_by(user_id=user_id, leave_type_id=leave_type_id, year=year))
+        db.execute(delete(LeaveQuota).filter_by(user_id=user_id, leave_type_id=leave_type_id, year=year))
+        if quota is not None:
+            db.add(LeaveQuota(user_id=user_id, leave_type_id=leave_type_id, year=year, quota=quota))
+        db.commit()
+    finally:
+        db.close()
+
+
+def run(name: str, reserve, user_id: int, leave_type_id: int, year: int, quota: int, submissions: int, workers: int):
+    reset(user_id, leave_type_id, year, quota)
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            accepted = sum(executor.map(lambda _: submit(reserve, user_id, leave_type_id, year), range(submissions)))
+        elapsed = time.perf_counter() - started
+
+        db = SessionLocal()
+        try:
+            usage = get_leave_usage(db, user_id, leave_type_id, year)
+            reserved = usage.pending_days if usage else 0
+        finally:
+            db.close()
+        print(f"{name:<8} | {submissions / elapsed:>8.0f} submissions/s | accepted {accepted:>5} | "
+              f"reserved {reserved:>7} of quota {quota} | oversubscribed {max(0, reserved - quota)}")
+    finally:
+        reset(user_id, leave_type_id, year)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent quota reservation")
+    parser.add_argument("--submissions", type=int, default=2_000)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--quota", type=int, default=500)
+    parser.add_argument("--year", type=int, default=2099)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        target = db.execute(select(LeaveQuota.user_id, LeaveQuota.leave_type_id).limit(1)).first()
+    finally:
+        db.close()
+    if target is None:
+        raise RuntimeError("The benchmark needs at least one leave quota")
+
+    for name, reserve in (("legacy", legacy_reserve), ("guarded", guarded_reserve)):
+        run(name, reserve, target.user_id, target.leave_type_id, args.year, args.quota, args.submissions, args.workers)
@@ -0,0 +1,71 @@
+# 量測假單原因全文檢索 (search_vector GIN 索引) 在大量資料下的回應時間
+# 用法: python -m app.benchmarks.reason_search --rows 1000000
+# 假資料在交易中建立，結束後 rollback (回滾留下的失效索引項目需 VACUUM 清除，重複執行前建議先 VACUUM)
+import argparse
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.crud.leave import get_team_leave_requests
+
+# 常見原因 (約 10% 的假單) 與大量較少見的詞彙 (各約 0.2%)，接近真實資料的詞頻分布
+COMMON_REASONS = ["身體不適就醫", "家人住院陪同照顧", "出國旅遊", "family trip"]
+RARE_TERMS = ["膝蓋手術後復健", "參加朋友婚禮", "年度健康檢查", "knee surgery", "dentist appointment"] + [
+    chr(0x4E00 + i * 37) + chr(0x4E00 + i * 53 + 11) + chr(0x4E00 + i * 71 + 29) for i in range(400)
+] + [f"term{i}" for i in range(100)]
+QUERIES = ["手術", "婚禮", "surgery", "健康檢查", "膝", "dentist -appointment", "term42", "旅遊", "not-present-anywhere"]
+
+
+def seed(connection, manager_id: int, rows: int):
+    # 同一位成員的假單依序排在不重疊的兩天區段，從 2200 年起排，不會碰到既有資料 (排他約束)
+    connection.execute(text("""
+        INSERT INTO leave_requests (request_id, user_id, leave_type_id, proxy_user_id, start_date, end_date,
+                                    days_count, reason, status)
+        SELECT 'SRCH' || g,
+               team.ids[1 + g % array_length(team.ids, 1)],
+               (SELECT min(id) FROM leave_types),
+               team.ids[1 + (g + 1) % array_length(team.ids, 1)],
+               DATE '2200-01-01' + 2 * (g / array_length(team.ids, 1)),
+               DATE '2200-01-01' + 2 * (g / array_length(team.ids, 1)) + 1,
+               2,
+               CASE WHEN g % 10 = 0 THEN (CAST(:common AS TEXT[]))[1 + (g / 10) % array_length(CAST(:common AS TEXT[]), 1)]
+                    ELSE (CAST(:rare AS TEXT[]))[1 + (g * 7) % array_length(CAST(:rare AS TEXT[]), 1)]
+               END || ' #' || g,
+               'approved'
+        FROM generate_series(1, :rows) AS g,
+             (SELECT array_agg(user_id) AS ids FROM managers WHERE manager_id = :manager_id) AS team
+    """), {"manager_id": manager_id, "rows": rows, "common": COMMON_REASONS, "rare": RARE_TERMS})
+    connection.execute(text("ANALYZE leave_requests"))
+
+
+def run(rows: int, repeat: int):
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            manager_id = connection.execute(text("SELECT manager_id FROM managers LIMIT 1")).scalar_one()
+            started = time.perf_counter()
+            seed(connection, manager_id, rows)
+            print(f"seeded {rows} rows in {time.perf_counter() - started:.1f} s")
+            db = Session(bind=connection)
+
+            for q in QUERIES:
+                for use_cursor in (False, True):
+                    timings = []
+                    for _ in range(repeat):
+                        started = time.perf_counter()
+                        result = get_team_leave_requests(db, manager_id, q=q, per_page=20, use_cursor=use_cursor)
+                        timings.append(time.perf_counter() - started)
+                    mode = "cursor" if use_cursor else "ranked"
+                    print(f"{q:<22} | {mode:<6} | {result['total']:>8} matches | best {min(timings) * 1000:>7.1f} ms")
+        finally:
+            transaction.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark leave reason full-text search")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
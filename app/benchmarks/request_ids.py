@@ -0,0 +1,53 @@
+# 比較兩種 request_id 產生方式的寫入吞吐量與唯一索引大小
+#   uuid4: 舊做法，uuid4 hex 前 16 碼 (隨機插入索引各處)
+#   ulid:  utils.request_id 時間排序編號 (插入集中在索引右側)
+# 用法: python -m app.benchmarks.request_ids --rows 200000 --batch 500
+# 使用暫存表 (ON COMMIT DROP)，不影響正式資料
+import argparse
+import time
+from uuid import uuid4
+
+from sqlalchemy import text
+
+from app.database import engine
+from app.utils.request_id import RequestIdGenerator
+
+
+def uuid4_request_id() -> str:
+    return uuid4().hex[:16].upper()
+
+
+def run(name: str, generate, rows: int, batch: int):
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            connection.execute(text("""
+                CREATE TEMP TABLE request_id_bench (
+                    id serial PRIMARY KEY,
+                    request_id varchar(20) COLLATE "C" NOT NULL UNIQUE
+                ) ON COMMIT DROP
+            """))
+            started = time.perf_counter()
+            for _ in range(0, rows, batch):
+                connection.execute(
+                    text("INSERT INTO request_id_bench (request_id) SELECT unnest(CAST(:ids AS varchar[]))"),
+                    {"ids": [generate() for _ in range(batch)]}
+                )
+            elapsed = time.perf_counter() - started
+            index_size = connection.execute(text("""
+                SELECT pg_relation_size(i.indexrelid)
+                FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+                WHERE i.indrelid = 'request_id_bench'::regclass AND c.relname = 'request_id_bench_request_id_key'
+            """)).scalar_one()
+            print(f"{name:<6} | {rows / elapsed:>9.0f} rows/s | unique index {index_size / 1024 / 1024:>6.1f} MiB")
+        finally:
+            transaction.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark request id schemes")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+    for name, generate in (("uuid4", uuid4_request_id), ("ulid", RequestIdGenerator())):
+        run(name, generate, args.rows, args.batch)
@@ -0,0 +1,69 @@
+# 量測大型團隊的季檢視行事曆 (一次範圍查詢 + 依天數位移展開)
+# 用法: python -m app.benchmarks.team_calendar --members 500 --requests-per-member 6
+# 假資料在交易中建立，結束後 rollback
+import argparse
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.crud.calendar import get_team_calendar
+
+YEAR = 2031
+
+
+def seed(connection, members: int, requests_per_member: int):
+    user_ids = connection.execute(text("""
+        INSERT INTO users (employee_id, first_name, last_name, email, password_hash, position, hire_date)
+        SELECT 'CAL' || g, 'First' || g, 'Last' || g, 'calendar' || g || '@example.com', 'x', 'Engineer', DATE '2020-01-01'
+        FROM generate_series(1, :members) AS g
+        RETURNING id
+    """), {"members": members}).scalars().all()
+    # 請假區間散布在整年，其中部分跨月
+    connection.execute(text("""
+        INSERT INTO leave_requests (request_id, user_id, leave_type_id, proxy_user_id, start_date, end_date,
+                                    days_count, reason, status)
+        SELECT 'CAL' || u.id || '-' || g,
+               u.id,
+               (SELECT min(id) FROM leave_types),
+               u.id,
+               DATE '2031-01-01' + ((u.id * 7 + g * 61) % 360),
+               DATE '2031-01-01' + ((u.id * 7 + g * 61) % 360) + (g % 5),
+               1 + g % 5,
+               'calendar benchmark',
+               'approved'
+        FROM unnest(CAST(:user_ids AS INTEGER[])) AS u(id), generate_series(1, :requests) AS g
+    """), {"user_ids": list(user_ids), "requests": requests_per_member})
+    connection.execute(text("ANALYZE leave_requests"))
+    return list(user_ids)
+
+
+def run(members: int, requests_per_member: int, repeat: int):
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            team_member_ids = seed(connection, members, requests_per_member)
+            db = Session(bind=connection)
+
+            for label, month, months in (("month", 3, 1), ("quarter", 1, 3), ("year", 1, 12)):
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    calendar = get_team_calendar(db, team_member_ids, YEAR, month, months)
+                    calendar.model_dump()
+                    timings.append(time.perf_counter() - started)
+                entries = sum(len(day.members_on_leave) for day in calendar.days)
+                print(f"{members:>6} members | {label:<7} | {len(calendar.days):>3} days | {entries:>6} member-days"
+                      f" | best {min(timings) * 1000:>7.1f} ms")
+        finally:
+            transaction.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the team calendar builder")
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--requests-per-member", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.members, args.requests_per_member, args.repeat)
@@ -0,0 +1,118 @@
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy import select, func, event
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from ..config import settings
+from ..models.leave_request import LeaveRequest
+from ..models.manager import Manager
+from ..models.user import User
+from ..utils.availability import TeamAvailabilityIndex, day_mask
+from ..utils.date_range import year_range
+from .user import get_manager_id
+from .org import get_org_chart
+
+# 各 worker 共用的團隊請假位元組，核准 commit 後就地更新，主管關係異動後整份失效
+availability_index = TeamAvailabilityIndex(ttl=settings.AVAILABILITY_CACHE_TTL)
+
+# 代理人排序時，區間前後各看幾天的請假狀況
+PROXY_NEARBY_DAYS = 14
+MAX_PROXY_INTERVAL_DAYS = 366
+
+
+def record_approved_leave(db: Session, absences: Iterable[Tuple[int, date, date]]):
+    """
+    Queue (user_id, start_date, end_date) of approved requests; applied to the index after commit
+    """
+    db.info.setdefault("approved_absences", []).extend(absences)
+
+
+@event.listens_for(Manager, "after_insert")
+@event.listens_for(Manager, "after_update")
+@event.listens_for(Manager, "after_delete")
+def _mark_managers_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info["managers_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _update_availability(session):
+    absences = session.info.pop("approved_absences", None)
+    if session.info.pop("managers_changed", False):
+        availability_index.invalidate()
+    elif absences:
+        availability_index.mark_absent(absences)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_availability_changes(session):
+    session.info.pop("approved_absences", None)
+    session.info.pop("managers_changed", None)
+
+
+def get_team_absences(db: Session, manager_id: int, year: int) -> Dict[int, int]:
+    """
+    user_id -> absent-day bitset for the subordinates of manager_id in `year`
+    """
+    def load():
+        member_ids = get_org_chart(db).reports_of(manager_id)
+        year_start, next_year_start = year_range(year)
+        absences = db.execute(
+            select(LeaveRequest.user_id, LeaveRequest.start_date, LeaveRequest.end_date)
+            .where(
+                LeaveRequest.user_id.in_(member_ids),
+                LeaveRequest.status == "approved",
+                LeaveRequest.period.overlaps(func.daterange(year_start, next_year_start))
+            )
+        ).all()
+        return member_ids, absences
+
+    return availability_index.get(manager_id, year, load)
+
+
+def get_proxy_candidates(db: Session, user_id: int, is_manager: bool, start: date, end: date) -> List[dict]:
+    """
+    Teammates with no approved leave in [start, end], least busy around the interval first.
+    Managers pick from their subordinates, other users from the colleagues under the same manager.
+    """
+    if start > end:
+        raise ValueError("start must be on or before end")
+    if (end - start).days + 1 > MAX_PROXY_INTERVAL_DAYS:
+        raise ValueError(f"Interval cannot exceed {MAX_PROXY_INTERVAL_DAYS} days")
+
+    manager_id = user_id if is_manager else get_manager_id(db, user_id)
+    if manager_id is None:
+        return []
+
+    nearby_start = start - timedelta(days=PROXY_NEARBY_DAYS)
+    nearby_end = end + timedelta(days=PROXY_NEARBY_DAYS)
+    free: Optional[set] = None
+    nearby_days: Dict[int, int] = {}
+    for year in range(nearby_start.year, nearby_end.year + 1):
+        masks = get_team_absences(db, manager_id, year)
+        interval = day_mask(year, start, end)
+        nearby = day_mask(year, nearby_start, nearby_end)
+        if interval:
+            year_free = {member_id for member_id, mask in masks.items() if not mask & interval}
+            free = year_free if free is None else free & year_free
+        for member_id, mask in masks.items():
+            nearby_days[member_id] = nearby_days.get(member_id, 0) + (mask & nearby).bit_count()
+
+    free = (free or set()) - {user_id}
+    if not free:
+        return []
+    users = db.execute(
+        select(User.id, User.first_name, User.last_name, User.position).where(User.id.in_(free))
+    ).all()
+    candidates = [
+        {
+            "id": user.id,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "position": user.position,
+            "absent_days_nearby": nearby_days.get(user.id, 0)
+        }
+        for user in users
+    ]
+    candidates.sort(key=lambda candidate: (candidate["absent_days_nearby"], candidate["id"]))
+    return candidates
@@ -1,62 +1,137 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import extract
-from datetime import date
-from typing import List, Dict
-from ..models.leave_request import LeaveRequest, LeaveStatus
+from sqlalchemy import select, func
+from sqlalchemy.sql import Select
+from datetime import date, timedelta
+from typing import List, Optional, Iterator, Union
+import json
+from ..models.leave_request import LeaveRequest
 from ..models.user import User
 from ..models.leave_type import LeaveType
+from ..utils.date_range import months_range
 from ..schemas.calendar import DayInfo, MemberOnLeave, TeamCalendarResponse
 
 
 def get_team_calendar(
     db: Session,
-    team_member_ids: List[int],
+    team_member_ids: Union[List[int], Select],
     year: int,
-    month: int
+    month: int,
+    months: int = 1
 ) -> TeamCalendarResponse:
-    # Get all approved leave requests for team members in the specified month
-    leave_requests = (
-        db.query(LeaveRequest)
+    """
+    Approved leave of the team for `months` consecutive months starting at year-month.
+    Every request overlapping the window is fetched with one range query and spread
+    over the days by offset, sharing one MemberOnLeave per request.
+    """
+    window_start, window_end = months_range(year, month, months)
+    rows = db.execute(
+        select(
+            LeaveRequest.start_date,
+            LeaveRequest.end_date,
+            User.id,
+            User.first_name,
+            User.last_name,
+            LeaveType.name
+        )
         .join(User, LeaveRequest.user_id == User.id)
         .join(LeaveType, LeaveRequest.leave_type_id == LeaveType.id)
-        .filter(
+        .where(
             LeaveRequest.user_id.in_(team_member_ids),
             LeaveRequest.status == "approved",
-            extract('year', LeaveRequest.start_date) == year,
-            extract('month', LeaveRequest.start_date) == month
+            # 與視窗 [window_start, window_end) 重疊的假單，可使用 period 的 GiST 索引
+            LeaveRequest.period.overlaps(func.daterange(window_start, window_end))
         )
-        .all()
-    )
+        .order_by(LeaveRequest.start_date, User.id)
+    ).all()
+
+    # 每一天對應一個列表，以相對於視窗起點的天數為索引
+    day_count = (window_end - window_start).days
+    members_by_day: List[List[MemberOnLeave]] = [[] for _ in range(day_count)]
+
+    for start_date, end_date, user_id, first_name, last_name, leave_type in rows:
+        member = MemberOnLeave(
+            id=user_id,
+            first_name=first_name,
+            last_name=last_name,
+            leave_type=leave_type
+        )
+        first = max((start_date - window_start).days, 0)
+        last = min((end_date - window_start).days, day_count - 1)
+        for offset in range(first, last + 1):
+            members_by_day[offset].append(member)
 
-    # Create a dictionary to store members on leave for each day
-    calendar_data: Dict[date, List[MemberOnLeave]] = {}
-
-    # Process each leave request
-    for request in leave_requests:
-        current_date = request.start_date
-        while current_date <= request.end_date:
-            if current_date.month == month:  # Only include dates in the specified month
-                if current_date not in calendar_data:
-                    calendar_data[current_date] = []
-                
-                calendar_data[current_date].append(
-                    MemberOnLeave(
-                        id=request.user.id,
-                        first_name=request.user.first_name,
-                        last_name=request.user.last_name,
-                        leave_type=request.leave_type.name
-                    )
-                )
-            current_date = date(current_date.year, current_date.month, current_date.day + 1)
-
-    # Convert the dictionary to a list of DayInfo objects
     days = [
-        DayInfo(date=day, members_on_leave=members)
-        for day, members in sorted(calendar_data.items())
+        DayInfo(date=window_start + timedelta(days=offset), members_on_leave=members)
+        for offset, members in enumerate(members_by_day)
+        if members
     ]
 
     return TeamCalendarResponse(
         year=year,
         month=month,
+        months=months,
         days=days
     )
+
+
+# 可用性查詢一次最多涵蓋的天數
+MAX_AVAILABILITY_DAYS = 366
+
+
+def get_absent_user_ids(
+    db: Session,
+    date_from: date,
+    date_to: date,
+    department_id: Optional[int] = None,
+    user_ids: Optional[Union[List[int], Select]] = None
+) -> List[List[int]]:
+    """
+    User ids on approved leave for each day of [date_from, date_to], indexed by
+    day offset from date_from. One overlap query on the period GiST index.
+    user_ids (a list or an IN subquery) limits the result to those users.
+    """
+    if date_from > date_to:
+        raise ValueError("from must be on or before to")
+    day_count = (date_to - date_from).days + 1
+    if day_count > MAX_AVAILABILITY_DAYS:
+        raise ValueError(f"Date range cannot exceed {MAX_AVAILABILITY_DAYS} days")
+
+    query = (
+        select(LeaveRequest.user_id, LeaveRequest.start_date, LeaveRequest.end_date)
+        .where(
+            LeaveRequest.status == "approved",
+            LeaveRequest.period.overlaps(func.daterange(date_from, date_to, "[]"))
+        )
+        .order_by(LeaveRequest.user_id)
+    )
+    if user_ids is not None:
+        query = query.where(LeaveRequest.user_id.in_(user_ids))
+    if department_id is not None:
+        query = query.join(User, LeaveRequest.user_id == User.id).where(User.department_id == department_id)
+
+    absent_by_day: List[List[int]] = [[] for _ in range(day_count)]
+    for user_id, start_date, end_date in db.execute(query):
+        first = max((start_date - date_from).days, 0)
+        last = min((end_date - date_from).days, day_count - 1)
+        for offset in range(first, last + 1):
+            absent_by_day[offset].append(user_id)
+    return absent_by_day
+
+
+def iter_availability_json(
+    date_from: date,
+    date_to: date,
+    department_id: Optional[int],
+    absent_by_day: List[List[int]]
+) -> Iterator[str]:
+    """
+    Serialize get_absent_user_ids output as {"from", "to", "department_id", "days": {date: [user ids]}},
+    one chunk per day
+    """
+    yield json.dumps({"from": date_from.isoformat(), "to": date_to.isoformat(), "department_id": department_id})[:-1]
+    yield ',"days":{'
+    for offset, user_ids in enumerate(absent_by_day):
+        separator = "," if offset else ""
+        day = (date_from + timedelta(days=offset)).isoformat()
+        yield f'{separator}"{day}":[{",".join(map(str, user_ids))}]'
+    yield "}}"
@@ -0,0 +1,64 @@
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy import select, event
+from datetime import date
+from typing import List, Optional
+from ..config import settings
+from ..models.holiday import Holiday
+from ..utils.business_days import BusinessDayCache, BusinessDayCalendar
+from ..utils.date_range import year_range
+
+# 各 worker 共用的工作天行事曆，假日異動 commit 後失效
+business_day_cache = BusinessDayCache(ttl=settings.HOLIDAY_CACHE_TTL)
+
+
+def get_business_day_calendar(db: Session) -> BusinessDayCalendar:
+    """
+    Current business-day calendar, loaded from the holidays table on first use
+    """
+    return business_day_cache.get(lambda: db.scalars(select(Holiday.date)).all())
+
+
+@event.listens_for(Holiday, "after_insert")
+@event.listens_for(Holiday, "after_update")
+@event.listens_for(Holiday, "after_delete")
+def _mark_holidays_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info["holidays_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_business_days(session):
+    if session.info.pop("holidays_changed", False):
+        business_day_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_holiday_changes(session):
+    session.info.pop("holidays_changed", None)
+
+
+def get_holidays(db: Session, year: Optional[int] = None) -> List[Holiday]:
+    query = db.query(Holiday)
+    if year is not None:
+        year_start, next_year_start = year_range(year)
+        query = query.filter(Holiday.date >= year_start, Holiday.date < next_year_start)
+    return query.order_by(Holiday.date).all()
+
+
+def create_holiday(db: Session, day: date, name: str, category: str = "national") -> Holiday:
+    if db.query(Holiday.id).filter(Holiday.date == day).first():
+        raise ValueError(f"Holiday on {day} already exists")
+    holiday = Holiday(date=day, name=name, category=category)
+    db.add(holiday)
+    db.commit()
+    db.refresh(holiday)
+    return holiday
+
+
+def delete_holiday(db: Session, holiday_id: int):
+    holiday = db.get(Holiday, holiday_id)
+    if holiday is None:
+        raise ValueError("Holiday not found")
+    db.delete(holiday)
+    db.commit()
@@ -1,6 +1,10 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
-from typing import Optional
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, tuple_, select, update, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql import Select
+from typing import Optional, List, Union
+from pydantic import TypeAdapter
 from fastapi import HTTPException
 from datetime import datetime, date
 from ..models.leave_request import LeaveRequest, LeaveStatus
@@ -8,38 +12,35 @@ from ..models.user import User
 from ..models.leave_type import LeaveType
 from ..models.leave_quota import LeaveQuota 
 from ..models.manager import Manager
-from ..schemas.leave import LeaveRequestDetail, LeaveRequestCreate, LeaveRequestOut, LeaveRequestListItem, LeaveTypeBasic, ProxyUserOut, LeaveRequestTeamItem, LeaveRequestApprovalResponse, LeaveRequestRejectionResponse
-from uuid import uuid4
+from .leave_usage import get_leave_usage, apply_leave_usage, apply_leave_usage_many, reserve_pending_days
+from .notification import add_leave_request_notifications
+from .holiday import get_business_day_calendar
+from .availability import record_approved_leave
+from .org import ORG_SCOPES, is_in_org, org_member_ids, get_org_chart
+from ..utils.pagination import encode_cursor, decode_cursor, estimate_count
+from ..utils.search import build_tsquery
+from ..schemas.leave import LeaveRequestDetail, LeaveRequestCreate, LeaveRequestOut, LeaveRequestListItem, LeaveTypeBasic, ProxyUserOut, LeaveRequestTeamItem, LeaveRequestApprovalResponse, LeaveRequestRejectionResponse, LeaveRequestBulkDecisionItem, LeaveRequestBulkDecisionResponse
+from ..utils.request_id import generate_request_id
 
 ALLOWED_STATUSES = {"pending", "approved", "rejected"}
-
-def generate_request_id():
-    id = str(uuid4().hex[:16].upper())
-    return id
-
-def calculate_leave_days_excluding_weekends(start_date: date, end_date: date) -> int:
+OVERLAP_CONSTRAINT = "ex_leave_requests_user_period"
+REQUEST_ID_CONSTRAINT = "leave_requests_request_id_key"
+# request_id 撞號時重新產生並重跑整筆交易的次數上限
+REQUEST_ID_ATTEMPTS = 3
+
+def calculate_leave_days(db: Session, start_date: date, end_date: date, start_half_day: bool = False, end_half_day: bool = False) -> float:
+    """
+    Leave days over [start_date, end_date], excluding weekends and holidays;
+    half-day flags count the first / last day as 0.5
+    """
     if start_date > end_date:
-        raise ValueError("Invalid date: End_date should be after Start_day") 
-
-    total_days = (end_date - start_date).days + 1
-    full_weeks = total_days // 7
-    weekend_days = full_weeks * 2
-
-    extra_days = total_days % 7
-    start_weekday = start_date.weekday()
+        raise ValueError("Invalid date: End_date should be after Start_day")
+    return get_business_day_calendar(db).leave_days(start_date, end_date, start_half_day, end_half_day)
 
-    for i in range(extra_days):
-        if (start_weekday + i) % 7 >= 5:  # 週六或週日
-            weekend_days += 1
 
-    return total_days - weekend_days
-
-
-def create_leave_request(db: Session, user_id: int, data: LeaveRequestCreate):
-    # 計算請假天數（整天制）
-    # days_requested = (data.end_date - data.start_date).days + 1
-    days_requested = calculate_leave_days_excluding_weekends(data.start_date, data.end_date)
-    current_year = datetime.now().year
+def create_leave_request(db: Session, user_id: int, data: LeaveRequestCreate, _attempt: int = 1):
+    # 計算請假天數（扣除週末與假日，可選擇首日 / 末日半天）
+    days_requested = calculate_leave_days(db, data.start_date, data.end_date, data.start_half_day, data.end_half_day)
     if days_requested <= 0:
         raise ValueError("Invalid date: End_date should be after Start_day") 
 
@@ -52,31 +53,30 @@ def create_leave_request(db: Session, user_id: int, data: LeaveRequestCreate):
     proxy_user = db.query(User).filter(User.id == data.proxy_user_id).first()
     if not proxy_user:
         raise ValueError("Invalid leave_type_id or proxy_user_id")
-
-    # check quota per year
-    quota = db.query(LeaveQuota).filter_by(
-        user_id=user_id,
-        leave_type_id=data.leave_type_id,
-        year=current_year
+    proxy_on_leave = db.query(LeaveRequest.id).filter(
+        LeaveRequest.user_id == data.proxy_user_id,
+        LeaveRequest.status == "approved",
+        LeaveRequest.period.overlaps(func.daterange(data.start_date, data.end_date, "[]"))
     ).first()
-    if not quota:
-        raise ValueError("No leave quota found for this leave type")
-    
-    # calculate remaining quota
-    approved_requests = (
-        db.query(LeaveRequest)
-        .filter(
-            LeaveRequest.user_id == user_id,
-            LeaveRequest.leave_type_id == data.leave_type_id,
-            func.extract('year', LeaveRequest.start_date) == current_year,
-            LeaveRequest.status == 'approved'
-        )
-        .all()
-    )
-
-    used_days = sum([r.days_count for r in approved_requests])
-    remaining_days = quota.quota - used_days
-    if remaining_days < days_requested:
+    if proxy_on_leave:
+        raise ValueError("Proxy user is on leave during the requested period")
+
+    # 以單一條件式 UPDATE 檢查並預留額度 (已核准 + 審核中 + 本次 <= 該年度額度)
+    quota_year = data.start_date.year
+    remaining_days = reserve_pending_days(db, user_id, data.leave_type_id, quota_year, days_requested)
+    if remaining_days is None:
+        quota = db.query(LeaveQuota.quota).filter_by(
+            user_id=user_id,
+            leave_type_id=data.leave_type_id,
+            year=quota_year
+        ).scalar()
+        usage = get_leave_usage(db, user_id, data.leave_type_id, quota_year)
+        reserved_days = usage.used_days + usage.pending_days if usage else 0
+        # 釋放交易 (含可能剛建立的帳本列)
+        db.rollback()
+        if quota is None:
+            raise ValueError("No leave quota found for this leave type")
+        remaining_days = quota - reserved_days
         raise ValueError(f"Not enough leave balance. Remaining: {remaining_days}, Requested: {days_requested}")
 
     new_request = LeaveRequest(
@@ -85,6 +85,8 @@ def create_leave_request(db: Session, user_id: int, data: LeaveRequestCreate):
         leave_type_id = data.leave_type_id,
         start_date = data.start_date,
         end_date = data.end_date,
+        start_half_day = data.start_half_day,
+        end_half_day = data.end_half_day,
         days_count = days_requested,
         reason = data.reason,
         proxy_user_id = data.proxy_user_id,
@@ -93,7 +95,17 @@ def create_leave_request(db: Session, user_id: int, data: LeaveRequestCreate):
     )
 
     db.add(new_request)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        # 與同一使用者其他未被否決的假單期間重疊 (ex_leave_requests_user_period)
+        if OVERLAP_CONSTRAINT in str(e.orig):
+            raise ValueError("Leave request overlaps another leave request of this user")
+        # 其他 worker 在同一毫秒產生了相同編號：整筆交易 (含額度預留) 已回滾，換新編號重試
+        if REQUEST_ID_CONSTRAINT in str(e.orig) and _attempt < REQUEST_ID_ATTEMPTS:
+            return create_leave_request(db, user_id, data, _attempt + 1)
+        raise
     db.refresh(new_request)
     db.refresh(leave_type)
     db.refresh(proxy_user)
@@ -111,139 +123,253 @@ def create_leave_request(db: Session, user_id: int, data: LeaveRequestCreate):
     )
 
 
-def get_leave_requests_for_user(
-    db: Session,
-    user_id: int,
+def _paginate(
+    query,
+    page: int,
+    per_page: int,
+    cursor: Optional[str] = None,
+    use_cursor: bool = False,
+    include_total: bool = False,
+    rank=None
+):
+    """
+    Offset pagination by default. In cursor mode the page is located with a
+    (start_date, id) keyset predicate so its cost does not depend on how deep the
+    page is, and the total is a planner estimate unless include_total is set.
+    For a team listing (user_id IN (...)) the predicate runs once per member on
+    the (user_id, start_date, id) index and the results are merged, so a page
+    still costs more for larger teams or org scopes.
+    A search rank, when given, orders offset pages by relevance; cursor pages
+    stay in (start_date, id) order.
+    """
+    if not (use_cursor or cursor):
+        total = query.count()
+        order_by = (LeaveRequest.start_date.desc(),)
+        if rank is not None:
+            order_by = (rank.desc(), LeaveRequest.start_date.desc(), LeaveRequest.id.desc())
+        results = query.order_by(*order_by) \
+            .offset((page - 1) * per_page).limit(per_page).all()
+        return results, {
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "total_pages": (total + per_page - 1) // per_page,
+            "next_cursor": None,
+            "total_is_estimate": False
+        }
+
+    total = query.count() if include_total else estimate_count(query)
+    if cursor:
+        cursor_start_date, cursor_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(LeaveRequest.start_date, LeaveRequest.id) < tuple_(cursor_start_date, cursor_id)
+        )
+
+    results = query.order_by(LeaveRequest.start_date.desc(), LeaveRequest.id.desc()) \
+        .limit(per_page + 1).all()
+    next_cursor = None
+    if len(results) > per_page:
+        results = results[:per_page]
+        next_cursor = encode_cursor(results[-1].start_date, results[-1].id)
+
+    return results, {
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "total_pages": (total + per_page - 1) // per_page,
+        "next_cursor": next_cursor,
+        "total_is_estimate": not include_total
+    }
+
+
+def _search(query, q: Optional[str]):
+    """
+    Filter the query to requests whose reason or rejection reason matches q,
+    using the GIN index on search_vector. Returns the query and its rank expression.
+    """
+    if q is None or not q.strip():
+        return query, None
+    tsquery = build_tsquery(q)
+    query = query.filter(LeaveRequest.search_vector.bool_op("@@")(tsquery))
+    return query, func.ts_rank(LeaveRequest.search_vector, tsquery)
+
+
+def filter_leave_requests(
+    query,
     status: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     leave_type_id: Optional[int] = None,
-    page: int = 1,
-    per_page: int = 10
+    q: Optional[str] = None
 ):
+    """
+    Apply the list filters shared by the listing and export endpoints to a query
+    or select. Returns the filtered query and the search rank (None without q).
+    """
     if status and status not in ALLOWED_STATUSES:
         raise ValueError(f"Invalid status: '{status}'. Must be one of {ALLOWED_STATUSES}")
-    
-    query = db.query(LeaveRequest).options(
-        joinedload(LeaveRequest.leave_type),
-        joinedload(LeaveRequest.proxy_user),
-        joinedload(LeaveRequest.approver)
-    ).filter(LeaveRequest.user_id == user_id)
-
     if status:
         query = query.filter(LeaveRequest.status == status)
-
     if start_date:
         query = query.filter(LeaveRequest.start_date >= start_date)
-
     if end_date:
         query = query.filter(LeaveRequest.end_date <= end_date)
-        
     if leave_type_id:
         query = query.filter(LeaveRequest.leave_type_id == leave_type_id)
+    return _search(query, q)
 
-    total = query.count()
-    results = query.order_by(LeaveRequest.start_date.desc()) \
-        .offset((page - 1) * per_page).limit(per_page).all()
+
+def get_team_target_ids(
+    db: Session,
+    manager_id: int,
+    user_id: Optional[int] = None,
+    scope: str = "team"
+) -> Union[List[int], Select]:
+    """
+    Users whose requests the manager may list: the given subordinate, the direct reports
+    (scope="team"), or everyone below the manager as a closure table subquery (scope="org")
+    """
+    if scope not in ORG_SCOPES:
+        raise ValueError(f"Invalid scope: '{scope}'. Must be one of {ORG_SCOPES}")
+
+    if scope == "org":
+        if user_id and not is_in_org(db, manager_id, user_id):
+            raise PermissionError("You are not authorized to view this user's leave requests.")
+        return [user_id] if user_id else org_member_ids(manager_id)
+
+    # get list of user_id for team member of that manager (from the cached org chart)
+    team_user_ids = get_org_chart(db).reports_of(manager_id)
+
+    if user_id and user_id not in team_user_ids:
+        # the target user_id is not the team member
+        raise PermissionError("You are not authorized to view this user's leave requests.")
+
+    return [user_id] if user_id else team_user_ids
+
+
+# 列表只查詢回應需要的欄位，關聯的使用者與假別再用一次 IN 查詢批次取回
+LIST_COLUMNS = (
+    LeaveRequest.id,
+    LeaveRequest.request_id,
+    LeaveRequest.user_id,
+    LeaveRequest.leave_type_id,
+    LeaveRequest.proxy_user_id,
+    LeaveRequest.approver_id,
+    LeaveRequest.start_date,
+    LeaveRequest.end_date,
+    LeaveRequest.days_count,
+    LeaveRequest.reason,
+    LeaveRequest.status,
+    LeaveRequest.rejection_reason,
+    LeaveRequest.approved_at,
+    LeaveRequest.created_at
+)
+
+_list_item_adapter = TypeAdapter(List[LeaveRequestListItem])
+_team_item_adapter = TypeAdapter(List[LeaveRequestTeamItem])
+
+
+def _build_list_items(db: Session, rows, include_user: bool = False):
+    """
+    Resolve users and leave types of the rows with one IN lookup each and
+    validate all items in a single pass
+    """
+    user_ids = set()
+    leave_type_ids = set()
+    for row in rows:
+        user_ids.add(row.proxy_user_id)
+        if row.approver_id is not None:
+            user_ids.add(row.approver_id)
+        if include_user:
+            user_ids.add(row.user_id)
+        leave_type_ids.add(row.leave_type_id)
+
+    users = {}
+    if user_ids:
+        users = {
+            u.id: {"id": u.id, "first_name": u.first_name, "last_name": u.last_name}
+            for u in db.query(User.id, User.first_name, User.last_name).filter(User.id.in_(user_ids))
+        }
+    leave_types = {}
+    if leave_type_ids:
+        leave_types = {
+            t.id: {"id": t.id, "name": t.name}
+            for t in db.query(LeaveType.id, LeaveType.name).filter(LeaveType.id.in_(leave_type_ids))
+        }
 
     items = []
+    for row in rows:
+        item = {
+            "id": row.id,
+            "request_id": row.request_id,
+            "leave_type": leave_types.get(row.leave_type_id),
+            "start_date": row.start_date,
+            "end_date": row.end_date,
+            "days_count": row.days_count,
+            "reason": row.reason,
+            "status": row.status,
+            "rejection_reason": row.rejection_reason,
+            "proxy_person": users.get(row.proxy_user_id),
+            "approver": users.get(row.approver_id) if row.approver_id is not None else None,
+            "approved_at": row.approved_at,
+            "created_at": row.created_at
+        }
+        if include_user:
+            item["user"] = users.get(row.user_id)
+        items.append(item)
+
+    adapter = _team_item_adapter if include_user else _list_item_adapter
+    return adapter.validate_python(items)
 
-    for req in results:
-        items.append(LeaveRequestListItem(
-            id=req.id,
-            request_id= req.request_id,
-            leave_type=LeaveTypeBasic.from_orm(req.leave_type),
-            start_date=req.start_date,
-            end_date=req.end_date,
-            days_count=req.days_count,
-            reason=req.reason,
-            status=req.status,
-            rejection_reason=req.rejection_reason,
-            proxy_person=ProxyUserOut.from_orm(req.proxy_user),
-            approver=ProxyUserOut.from_orm(req.approver) if req.approver else None,
-            approved_at=req.approved_at,
-            created_at=req.created_at
-        ))
-
-    return {
-        "items": items,
-        "total": total,
-        "page": page,
-        "per_page": per_page,
-        "total_pages": (total + per_page - 1) // per_page
-    }
 
-def get_team_leave_requests(
+def get_leave_requests_for_user(
     db: Session,
-    manager_id: int,
-    user_id: Optional[int] = None,
+    user_id: int,
     status: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     leave_type_id: Optional[int] = None,
+    q: Optional[str] = None,
     page: int = 1,
-    per_page: int = 10
+    per_page: int = 10,
+    cursor: Optional[str] = None,
+    use_cursor: bool = False,
+    include_total: bool = False
 ):
-    if status and status not in ALLOWED_STATUSES:
-        raise ValueError(f"Invalid status: '{status}'. Must be one of {ALLOWED_STATUSES}")
+    query = db.query(*LIST_COLUMNS).filter(LeaveRequest.user_id == user_id)
+    query, rank = filter_leave_requests(query, status, start_date, end_date, leave_type_id, q)
 
-    # get list of user_id for team member of that manager
-    subquery = db.query(Manager.user_id).filter(Manager.manager_id == manager_id)
-    team_user_ids = [row[0] for row in subquery.all()]
+    results, pagination = _paginate(query, page, per_page, cursor, use_cursor, include_total, rank)
 
-    if user_id and user_id not in team_user_ids:
-        # the target user_id is not the team member
-        raise PermissionError("You are not authorized to view this user's leave requests.")
+    items = _build_list_items(db, results)
 
-    target_ids = [user_id] if user_id else team_user_ids
+    return {"items": items, **pagination}
 
-    query = db.query(LeaveRequest).options(
-        joinedload(LeaveRequest.user),
-        joinedload(LeaveRequest.leave_type),
-        joinedload(LeaveRequest.proxy_user),
-        joinedload(LeaveRequest.approver)
-    ).filter(LeaveRequest.user_id.in_(target_ids))
+def get_team_leave_requests(
+    db: Session,
+    manager_id: int,
+    user_id: Optional[int] = None,
+    status: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    leave_type_id: Optional[int] = None,
+    q: Optional[str] = None,
+    page: int = 1,
+    per_page: int = 10,
+    cursor: Optional[str] = None,
+    use_cursor: bool = False,
+    include_total: bool = False,
+    scope: str = "team"
+):
+    target_ids = get_team_target_ids(db, manager_id, user_id, scope)
+    query = db.query(*LIST_COLUMNS).filter(LeaveRequest.user_id.in_(target_ids))
+    query, rank = filter_leave_requests(query, status, start_date, end_date, leave_type_id, q)
 
-    if status:
-        query = query.filter(LeaveRequest.status == status)
-    if start_date:
-        query = query.filter(LeaveRequest.start_date >= start_date)
-    if end_date:
-        query = query.filter(LeaveRequest.end_date <= end_date)
-    if leave_type_id:
-        query = query.filter(LeaveRequest.leave_type_id == leave_type_id)
+    results, pagination = _paginate(query, page, per_page, cursor, use_cursor, include_total, rank)
 
-    total = query.count()
-    results = query.order_by(LeaveRequest.start_date.desc()) \
-        .offset((page - 1) * per_page).limit(per_page).all()
+    items = _build_list_items(db, results, include_user=True)
 
-    items = []
-    for req in results:
-        items.append(LeaveRequestTeamItem(
-            id=req.id,
-            request_id= req.request_id,
-            leave_type=LeaveTypeBasic.from_orm(req.leave_type),
-            start_date=req.start_date,
-            end_date=req.end_date,
-            days_count=req.days_count,
-            reason=req.reason,
-            status=req.status,
-            rejection_reason=req.rejection_reason,
-            proxy_person=ProxyUserOut.from_orm(req.proxy_user),
-            approver=ProxyUserOut.from_orm(req.approver) if req.approver else None,
-            approved_at=req.approved_at,
-            created_at=req.created_at,
-            user= ProxyUserOut.from_orm(req.user)
-        ))
-
-
-    return {
-        "items": items,
-        "total": total,
-        "page": page,
-        "per_page": per_page,
-        "total_pages": (total + per_page - 1) // per_page
-    }
+    return {"items": items, **pagination}
 
 def get_leave_request_by_id(db: Session, leave_request_id: int) -> LeaveRequestDetail:
     leave_request = db.query(LeaveRequest).filter(LeaveRequest.id == leave_request_id).first()
@@ -280,77 +406,295 @@ def get_detail_from_leave_request_by_id(db: Session, leave_request_id: int) -> i
     
     return leave_request
 
-def approve_leave_request(db: Session, leave_request_id: int, approver_id: int) -> LeaveRequestApprovalResponse:
-    leave_request = db.query(LeaveRequest).filter(LeaveRequest.id == leave_request_id).first()
-    if not leave_request:
+def _approval_notifications(leave_request_id: int, request_id: str, applicant_id: int, proxy_user_id: int,
+                            start_date: date, end_date: date, first_name: str, last_name: str) -> List[dict]:
+    # 通知申請人假單已核准，並通知代理人
+    return [
+        {
+            "user_id": applicant_id,
+            "title": "您的假單已被主管批准!",
+            "message": "您的假單(id: " + str(request_id) + ")已被批准!",
+            "related_id": leave_request_id
+        },
+        {
+            "user_id": proxy_user_id,
+            "title": "您已被指派為假單的職務代理人",
+            "message": "您已被指派於" + str(start_date) + "至" + str(end_date) + "擔任" + str(first_name) + str(last_name) + "的職務代理人。",
+            "related_id": leave_request_id
+        }
+    ]
+
+def _rejection_notifications(leave_request_id: int, request_id: str, applicant_id: int) -> List[dict]:
+    return [
+        {
+            "user_id": applicant_id,
+            "title": "您的假單已被否決",
+            "message": "您的假單(id: " + str(request_id) + ")已被否決",
+            "related_id": leave_request_id
+        }
+    ]
+
+LEAVE_REQUEST_LOCKED = "Leave request is being processed by another approver"
+
+class LeaveRequestLockedError(ValueError):
+    """Another approver holds the row lock; the client can retry (the route returns 409)."""
+    def __init__(self, message: str = LEAVE_REQUEST_LOCKED):
+        super().__init__(message)
+
+def _load_for_decision(db: Session, leave_request_id: int, approver_id: int, action: str):
+    """
+    Lock and load the request, the applicant name, the approver and the manager relation
+    in one statement, and run the approve/reject checks. The row lock is held until the
+    caller commits, so the status check cannot race with another approver.
+    """
+    applicant = aliased(User)
+    approver = aliased(User)
+    row = db.execute(
+        select(LeaveRequest, applicant.first_name, applicant.last_name, approver, Manager.user_id)
+        .join(applicant, applicant.id == LeaveRequest.user_id)
+        .outerjoin(approver, approver.id == approver_id)
+        .outerjoin(Manager, and_(Manager.manager_id == approver_id, Manager.user_id == LeaveRequest.user_id))
+        .where(LeaveRequest.id == leave_request_id)
+        # 正在被其他人審核的假單直接略過，不排隊等待鎖
+        .with_for_update(of=LeaveRequest, skip_locked=True)
+        .execution_options(populate_existing=True)
+    ).first()
+    if not row:
+        exists = db.query(LeaveRequest.id).filter(LeaveRequest.id == leave_request_id).first()
+        db.rollback()
+        if exists:
+            raise LeaveRequestLockedError()
         raise HTTPException(status_code=404, detail="Leave request not found")
-    
+    leave_request, first_name, last_name, approver_user, managed_user_id = row
 
+    # 檢查失敗時立即釋放鎖
     if leave_request.status != "pending":
-        raise ValueError("Can only approve pending leave requests")
-    
-    approver = db.query(User).filter(User.id == approver_id).first()
-    if not approver or not approver.is_manager:
-        raise PermissionError("Only managers can approve leave requests")
-    
+        db.rollback()
+        raise ValueError(f"Can only {action} pending leave requests")
+
+    if not approver_user or not approver_user.is_manager:
+        db.rollback()
+        raise PermissionError(f"Only managers can {action} leave requests")
+
     # Check if the approver is the manager of the request's user
-    is_manager = db.query(Manager).filter(
-        Manager.manager_id == approver_id,
-        Manager.user_id == leave_request.user_id
-    ).first()
-    
-    if not is_manager:
-        raise PermissionError("You are not authorized to approve this leave request")
-    
+    if managed_user_id is None:
+        db.rollback()
+        raise PermissionError(f"You are not authorized to {action} this leave request")
+
+    return leave_request, first_name, last_name, approver_user
+
+def approve_leave_request(db: Session, leave_request_id: int, approver_id: int) -> LeaveRequestApprovalResponse:
+    leave_request, first_name, last_name, approver = _load_for_decision(db, leave_request_id, approver_id, "approve")
+
     leave_request.status = "approved"
     leave_request.approver_id = approver_id
     leave_request.approved_at = datetime.utcnow()
-    
-    db.commit()
-    db.refresh(leave_request)
-    
-    return LeaveRequestApprovalResponse(
+    apply_leave_usage(
+        db, leave_request.user_id, leave_request.leave_type_id, leave_request.start_date.year,
+        used_delta=leave_request.days_count, pending_delta=-leave_request.days_count
+    )
+    add_leave_request_notifications(db, _approval_notifications(
+        leave_request.id, leave_request.request_id, leave_request.user_id, leave_request.proxy_user_id,
+        leave_request.start_date, leave_request.end_date, first_name, last_name
+    ))
+    record_approved_leave(db, [(leave_request.user_id, leave_request.start_date, leave_request.end_date)])
+
+    # commit 之後物件會過期，先組好回應避免重新查詢
+    response = LeaveRequestApprovalResponse(
         id=leave_request.id,
         request_id=leave_request.request_id,
         status=leave_request.status,
         approver=ProxyUserOut.from_orm(approver),
         approved_at=leave_request.approved_at
     )
+    db.commit()
+    return response
 
 def reject_leave_request(db: Session, leave_request_id: int, approver_id: int, rejection_reason: str) -> LeaveRequestRejectionResponse:
-    leave_request = db.query(LeaveRequest).filter(LeaveRequest.id == leave_request_id).first()
-    if not leave_request:
-        raise HTTPException(status_code=404, detail="Leave request not found")
-    
-    if leave_request.status != "pending":
-        raise ValueError("Can only reject pending leave requests")
-    
-    approver = db.query(User).filter(User.id == approver_id).first()
-    if not approver or not approver.is_manager:
-        raise PermissionError("Only managers can reject leave requests")
-    
-    # Check if the approver is the manager of the request's user
-    is_manager = db.query(Manager).filter(
-        Manager.manager_id == approver_id,
-        Manager.user_id == leave_request.user_id
-    ).first()
-    
-    if not is_manager:
-        raise PermissionError("You are not authorized to reject this leave request")
-    
+    leave_request, _, _, approver = _load_for_decision(db, leave_request_id, approver_id, "reject")
+
     leave_request.status = "rejected"
     leave_request.approver_id = approver_id
     leave_request.approved_at = datetime.utcnow()
     leave_request.rejection_reason = rejection_reason
-    
-    db.commit()
-    db.refresh(leave_request)
-    
-    return LeaveRequestRejectionResponse(
+    apply_leave_usage(
+        db, leave_request.user_id, leave_request.leave_type_id, leave_request.start_date.year,
+        pending_delta=-leave_request.days_count
+    )
+    add_leave_request_notifications(db, _rejection_notifications(
+        leave_request.id, leave_request.request_id, leave_request.user_id
+    ))
+
+    response = LeaveRequestRejectionResponse(
         id=leave_request.id,
         request_id=leave_request.request_id,
         status=leave_request.status,
         approver=ProxyUserOut.from_orm(approver),
         approved_at=leave_request.approved_at,
         rejection_reason=leave_request.rejection_reason
-    )
\ No newline at end of file
+    )
+    db.commit()
+    return response
+
+
+def bulk_decide_leave_requests(
+    db: Session,
+    leave_request_ids: List[int],
+    approver_id: int,
+    action: str,
+    rejection_reason: Optional[str] = None
+) -> LeaveRequestBulkDecisionResponse:
+    """
+    Approve or reject many leave requests in one transaction. Requests that are missing,
+    not pending or not managed by the approver are reported per item instead of failing the batch.
+    """
+    if action not in ("approve", "reject"):
+        raise ValueError("action must be approve or reject")
+    if action == "reject" and not rejection_reason:
+        raise ValueError("rejection_reason is required when rejecting leave requests")
+
+    approver = db.query(User).filter(User.id == approver_id).first()
+    if not approver or not approver.is_manager:
+        raise PermissionError("Only managers can approve or reject leave requests")
+    approver_out = ProxyUserOut.from_orm(approver)
+
+    # 保留輸入順序並去除重複
+    ids = list(dict.fromkeys(leave_request_ids))
+
+    # 以一次查詢判斷每筆假單是否存在、狀態、以及是否為此主管的下屬
+    # 同時鎖住這些假單；已被其他審核鎖住的略過，回報為處理中
+    checks = db.execute(
+        select(LeaveRequest.id, LeaveRequest.status, Manager.user_id.isnot(None).label("is_managed"))
+        .outerjoin(Manager, and_(Manager.manager_id == approver_id, Manager.user_id == LeaveRequest.user_id))
+        .where(LeaveRequest.id.in_(ids))
+        .with_for_update(of=LeaveRequest, skip_locked=True)
+    ).all()
+    errors = {leave_request_id: "Leave request not found" for leave_request_id in ids}
+    retryable = set()
+    missing_ids = set(ids) - {check.id for check in checks}
+    if missing_ids:
+        for (leave_request_id,) in db.execute(select(LeaveRequest.id).where(LeaveRequest.id.in_(missing_ids))):
+            errors[leave_request_id] = LEAVE_REQUEST_LOCKED
+            retryable.add(leave_request_id)
+    eligible_ids = []
+    for leave_request_id, status, is_managed in checks:
+        if not is_managed:
+            errors[leave_request_id] = f"You are not authorized to {action} this leave request"
+        elif status != "pending":
+            errors[leave_request_id] = f"Can only {action} pending leave requests"
+        else:
+            eligible_ids.append(leave_request_id)
+            del errors[leave_request_id]
+
+    decided_at = datetime.utcnow()
+    new_status = "approved" if action == "approve" else "rejected"
+    values = {"status": new_status, "approver_id": approver_id, "approved_at": decided_at}
+    if action == "reject":
+        values["rejection_reason"] = rejection_reason
+
+    updated = []
+    if eligible_ids:
+        # 列已被鎖住；status 條件保留作為最後一道保險
+        updated = db.execute(
+            update(LeaveRequest)
+            .where(
+                LeaveRequest.id.in_(eligible_ids),
+                LeaveRequest.status == "pending",
+                User.id == LeaveRequest.user_id
+            )
+            .values(**values)
+            .returning(
+                LeaveRequest.id, LeaveRequest.request_id, LeaveRequest.user_id, LeaveRequest.proxy_user_id,
+                LeaveRequest.leave_type_id, LeaveRequest.start_date, LeaveRequest.end_date, LeaveRequest.days_count,
+                User.first_name, User.last_name
+            ),
+            execution_options={"synchronize_session": False}
+        ).all()
+    updated_by_id = {row.id: row for row in updated}
+    for leave_request_id in eligible_ids:
+        if leave_request_id not in updated_by_id:
+            errors[leave_request_id] = f"Can only {action} pending leave requests"
+
+    # 假別用量與通知各以一個多列語句寫入
+    deltas = {}
+    notifications = []
+    for row in updated:
+        key = (row.user_id, row.leave_type_id, row.start_date.year)
+        used_delta, pending_delta = deltas.get(key, (0, 0))
+        if action == "approve":
+            deltas[key] = (used_delta + row.days_count, pending_delta - row.days_count)
+            notifications.extend(_approval_notifications(
+                row.id, row.request_id, row.user_id, row.proxy_user_id,
+                row.start_date, row.end_date, row.first_name, row.last_name
+            ))
+        else:
+            deltas[key] = (used_delta, pending_delta - row.days_count)
+            notifications.extend(_rejection_notifications(row.id, row.request_id, row.user_id))
+    apply_leave_usage_many(db, deltas)
+    add_leave_request_notifications(db, notifications)
+    if action == "approve":
+        record_approved_leave(db, [(row.user_id, row.start_date, row.end_date) for row in updated])
+    db.commit()
+
+    results = [
+        LeaveRequestBulkDecisionItem(
+            id=leave_request_id,
+            request_id=updated_by_id[leave_request_id].request_id,
+            success=True,
+            status=new_status
+        ) if leave_request_id in updated_by_id else LeaveRequestBulkDecisionItem(
+            id=leave_request_id,
+            success=False,
+            error=errors[leave_request_id],
+            retryable=leave_request_id in retryable
+        )
+        for leave_request_id in ids
+    ]
+    return LeaveRequestBulkDecisionResponse(
+        action=action,
+        approver=approver_out,
+        approved_at=decided_at,
+        succeeded=len(updated),
+        failed=len(ids) - len(updated),
+        results=results
+    )
+
+
+# Async variants: run the same ORM code on an AsyncSession (asyncpg) without blocking the event loop
+async def create_leave_request_async(db: AsyncSession, user_id: int, data: LeaveRequestCreate) -> LeaveRequestOut:
+    return await db.run_sync(create_leave_request, user_id, data)
+
+
+async def get_leave_requests_for_user_async(db: AsyncSession, user_id: int, **filters):
+    return await db.run_sync(get_leave_requests_for_user, user_id, **filters)
+
+
+async def get_team_leave_requests_async(db: AsyncSession, manager_id: int, **filters):
+    return await db.run_sync(get_team_leave_requests, manager_id, **filters)
+
+
+def _get_leave_request_detail(db: Session, leave_request_id: int) -> LeaveRequestDetail:
+    # 關聯在 run_sync 內載入；回傳後 asyncpg 連線無法再延遲載入
+    return LeaveRequestDetail.model_validate(get_leave_request_by_id(db, leave_request_id), from_attributes=True)
+
+
+async def get_leave_request_by_id_async(db: AsyncSession, leave_request_id: int) -> LeaveRequestDetail:
+    return await db.run_sync(_get_leave_request_detail, leave_request_id)
+
+
+async def approve_leave_request_async(db: AsyncSession, leave_request_id: int, approver_id: int) -> LeaveRequestApprovalResponse:
+    return await db.run_sync(approve_leave_request, leave_request_id, approver_id)
+
+
+async def reject_leave_request_async(db: AsyncSession, leave_request_id: int, approver_id: int, rejection_reason: str) -> LeaveRequestRejectionResponse:
+    return await db.run_sync(reject_leave_request, leave_request_id, approver_id, rejection_reason)
+
+
+async def bulk_decide_leave_requests_async(
+    db: AsyncSession,
+    leave_request_ids: List[int],
+    approver_id: int,
+    action: str,
+    rejection_reason: Optional[str] = None
+) -> LeaveRequestBulkDecisionResponse:
+    return await db.run_sync(bulk_decide_leave_requests, leave_request_ids, approver_id, action, rejection_reason)
@@ -0,0 +1,143 @@
+import calendar
+from datetime import date
+from typing import List, Optional
+from sqlalchemy import select, func, case, literal, true, and_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from ..models.leave_accrual import LeaveAccrualRule, LeaveAccrual
+from ..models.leave_type import LeaveType
+from ..models.user import User
+
+
+class LeaveTypeNotFoundError(ValueError):
+    """The leave type of an accrual rule does not exist (the route returns 404)."""
+
+
+def completed_months(as_of: date) -> int:
+    """
+    Months of as_of's year whose month-end accrual has been credited by that date (0-12)
+    """
+    if as_of.day == calendar.monthrange(as_of.year, as_of.month)[1]:
+        return as_of.month
+    return as_of.month - 1
+
+
+def _accrual_select(year: int, month: int):
+    """
+    Accrued days of every user and accrual rule through the end of year/month, computed
+    set-based in one pass over users. A month counts once the user is eligible
+    (hire_date + waiting_months) on its first day.
+    """
+    eligible = User.hire_date + func.make_interval(0, LeaveAccrualRule.waiting_months)
+    # 以 year * 12 + month 為月份序號，第一個可累積的月份：可累積日不是 1 號時從下個月起算
+    first_month = (
+        func.extract("year", eligible) * 12
+        + func.extract("month", eligible)
+        + case((func.extract("day", eligible) > 1, 1), else_=0)
+    )
+    months = func.greatest(0, func.least(month, year * 12 + month - first_month + 1))
+    accrued = LeaveAccrualRule.days_per_month * months
+    accrued = func.least(accrued, func.coalesce(LeaveAccrualRule.max_days, accrued))
+    return (
+        select(
+            User.id.label("user_id"),
+            LeaveAccrualRule.leave_type_id.label("leave_type_id"),
+            literal(year).label("year"),
+            literal(month).label("month"),
+            accrued.label("accrued_days")
+        )
+        .select_from(User)
+        .join(LeaveAccrualRule, true())
+    )
+
+
+def materialize_accruals(db: Session, year: int, month: int) -> int:
+    """
+    Store the month-end accrual snapshot of year/month for every user and rule.
+    Rerunning replaces the snapshot. Returns the number of rows written.
+    """
+    if not 1 <= month <= 12:
+        raise ValueError("Month must be between 1 and 12")
+    accruals = _accrual_select(year, month).subquery()
+    stmt = insert(LeaveAccrual).from_select(
+        ["user_id", "leave_type_id", "year", "month", "accrued_days"],
+        select(accruals)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[LeaveAccrual.user_id, LeaveAccrual.leave_type_id, LeaveAccrual.year, LeaveAccrual.month],
+        set_={"accrued_days": stmt.excluded.accrued_days, "computed_at": func.now()}
+    )
+    result = db.execute(stmt)
+    db.commit()
+    return result.rowcount
+
+
+def get_accruals(db: Session, user_id: int, as_of: date) -> List[dict]:
+    """
+    Accrued days of each accrual leave type for the user as of the given date. Reads the
+    month-end snapshot and only computes the leave types it does not cover yet.
+    """
+    month = completed_months(as_of)
+    rows = db.execute(
+        select(LeaveType.id, LeaveType.name, LeaveAccrual.accrued_days)
+        .join(LeaveAccrual, LeaveAccrual.leave_type_id == LeaveType.id)
+        .where(
+            LeaveAccrual.user_id == user_id,
+            LeaveAccrual.year == as_of.year,
+            LeaveAccrual.month == month
+        )
+    ).all()
+    accruals = {row.id: {"leave_type_id": row.id, "leave_type_name": row.name, "accrued_days": float(row.accrued_days)} for row in rows}
+
+    computed = _accrual_select(as_of.year, month).where(User.id == user_id)
+    if accruals:
+        computed = computed.where(LeaveAccrualRule.leave_type_id.not_in(list(accruals)))
+    computed = computed.subquery()
+    for row in db.execute(
+        select(LeaveType.id, LeaveType.name, computed.c.accrued_days)
+        .join(computed, computed.c.leave_type_id == LeaveType.id)
+    ):
+        accruals[row.id] = {"leave_type_id": row.id, "leave_type_name": row.name, "accrued_days": float(row.accrued_days)}
+
+    return [accruals[leave_type_id] for leave_type_id in sorted(accruals)]
+
+
+def get_accrual_rules(db: Session) -> List[LeaveAccrualRule]:
+    return db.query(LeaveAccrualRule).order_by(LeaveAccrualRule.leave_type_id).all()
+
+
+def set_accrual_rule(
+    db: Session,
+    leave_type_id: int,
+    days_per_month: float,
+    waiting_months: int = 0,
+    max_days: Optional[float] = None
+) -> LeaveAccrualRule:
+    """
+    Create or replace the accrual rule of a leave type. Existing snapshots are kept
+    until the month-end job is rerun.
+    """
+    if db.get(LeaveType, leave_type_id) is None:
+        raise LeaveTypeNotFoundError(f"Leave type {leave_type_id} not found")
+    rule = db.get(LeaveAccrualRule, leave_type_id)
+    if rule is None:
+        rule = LeaveAccrualRule(leave_type_id=leave_type_id)
+        db.add(rule)
+    rule.days_per_month = days_per_month
+    rule.waiting_months = waiting_months
+    rule.max_days = max_days
+    db.commit()
+    db.refresh(rule)
+    return rule
+
+
+def accrual_snapshot_join(user_id_column, leave_type_id_column, as_of: date):
+    """
+    Join condition to the snapshot row of as_of, for queries such as the leave balance
+    """
+    return and_(
+        LeaveAccrual.user_id == user_id_column,
+        LeaveAccrual.leave_type_id == leave_type_id_column,
+        LeaveAccrual.year == as_of.year,
+        LeaveAccrual.month == completed_months(as_of)
+    )
@@ -1,52 +1,88 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_
 from datetime import datetime
 
 from ..models.leave_request import LeaveRequest
 from ..models.leave_quota import LeaveQuota
 from ..models.leave_type import  LeaveType
+from ..models.leave_usage import LeaveUsage
+from ..models.leave_accrual import LeaveAccrual
 from ..models.user import User
+from ..utils.date_range import year_range
+from .leave_accrual import accrual_snapshot_join
 from ..schemas.leave_balance import LeaveBalanceResponse, LeaveBalanceItem, LeaveTypeInfo, LeaveRequestSummary
 
 
+def _approved_requests_query(db: Session, user_id: int, year: int):
+    year_start, next_year_start = year_range(year)
+    return (
+        db.query(
+            LeaveRequest.id,
+            LeaveRequest.request_id,
+            LeaveRequest.leave_type_id,
+            LeaveRequest.start_date,
+            LeaveRequest.end_date,
+            LeaveRequest.days_count,
+            LeaveRequest.status
+        )
+        .filter(
+            LeaveRequest.user_id == user_id,
+            LeaveRequest.status == 'approved',
+            LeaveRequest.start_date >= year_start,
+            LeaveRequest.start_date < next_year_start
+        )
+        .order_by(LeaveRequest.start_date)
+    )
+
+
 def get_leave_balances(db: Session, user_id: int) -> LeaveBalanceResponse:
-    year = datetime.now().year
-    
-    # 查出該使用者的所有假別配額
-    quotas = (
-        db.query(LeaveQuota)
+    today = datetime.now().date()
+    year = today.year
+
+    # 配額 LEFT JOIN leave_usage 帳本與本月累積快照 (皆為主鍵查詢)，一次查出所有假別的餘額
+    rows = (
+        db.query(
+            LeaveType.id,
+            LeaveType.name,
+            LeaveType.color_code,
+            LeaveQuota.quota,
+            func.coalesce(LeaveUsage.used_days, 0).label("used_days"),
+            LeaveAccrual.accrued_days
+        )
         .join(LeaveType, LeaveQuota.leave_type_id == LeaveType.id)
+        .outerjoin(LeaveUsage, and_(
+            LeaveUsage.user_id == LeaveQuota.user_id,
+            LeaveUsage.leave_type_id == LeaveQuota.leave_type_id,
+            LeaveUsage.year == LeaveQuota.year
+        ))
+        .outerjoin(LeaveAccrual, accrual_snapshot_join(LeaveQuota.user_id, LeaveQuota.leave_type_id, today))
         .filter(LeaveQuota.user_id == user_id, LeaveQuota.year == year)
+        .order_by(LeaveType.id)
         .all()
     )
 
-    balances = []
-    print(quotas)
-
-    for quota_entry in quotas:
-        leave_type = quota_entry.leave_type
-
-        # 查詢該假別的已核准請假紀錄
-        approved_requests = (
-            db.query(LeaveRequest)
-            .filter(
-                LeaveRequest.user_id == user_id,
-                LeaveRequest.leave_type_id == leave_type.id,
-                func.extract('year', LeaveRequest.start_date) == year,
-                LeaveRequest.status == 'approved'
-            )
-            .all()
+    # 所有假別的已核准請假紀錄一次取回，再依假別分組
+    requests_by_type = {}
+    approved_requests = _approved_requests_query(db, user_id, year).all()
+    for r in approved_requests:
+        requests_by_type.setdefault(r.leave_type_id, []).append(LeaveRequestSummary.from_orm(r))
+
+    balances = [
+        LeaveBalanceItem(
+            leave_type=LeaveTypeInfo(id=row.id, name=row.name, color_code=row.color_code),
+            quota=row.quota,
+            used_days=row.used_days,
+            remaining_days=row.quota - row.used_days,
+            accrued_days=row.accrued_days,
+            leave_requests=requests_by_type.get(row.id, [])
         )
+        for row in rows
+    ]
 
-        used_days = sum([r.days_count for r in approved_requests])
-        remaining_days = quota_entry.quota - used_days
+    return LeaveBalanceResponse(year=year, balances=balances)
 
-        balances.append(LeaveBalanceItem(
-            leave_type=LeaveTypeInfo.from_orm(leave_type),
-            quota=quota_entry.quota,
-            used_days=used_days,
-            remaining_days=remaining_days,
-            leave_requests=[LeaveRequestSummary.from_orm(r) for r in approved_requests]
-        ))
 
-    return LeaveBalanceResponse(year=year, balances=balances)
+# Async variant: runs the same ORM code on an AsyncSession (asyncpg) without blocking the event loop
+async def get_leave_balances_async(db: AsyncSession, user_id: int) -> LeaveBalanceResponse:
+    return await db.run_sync(get_leave_balances, user_id)
@@ -0,0 +1,169 @@
+import io
+import math
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import select, func, text, and_
+from sqlalchemy.orm import Session
+from ..models.leave_quota import LeaveQuota
+from ..models.leave_type import LeaveType
+from ..models.leave_usage import LeaveUsage
+from ..models.user import User
+from ..schemas.leave_quota import LeaveTypeQuotaPolicy, QuotaProvisionRequest
+
+# 每批處理的使用者數；每批各自 COPY、upsert 與 commit，中斷後重跑即可從頭補齊
+PROVISION_BATCH_SIZE = 10_000
+
+_CREATE_STAGING = text("""
+    CREATE TEMP TABLE IF NOT EXISTS leave_quota_staging (
+        user_id INTEGER NOT NULL,
+        leave_type_id INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        quota INTEGER NOT NULL
+    ) ON COMMIT DELETE ROWS
+""")
+
+_UPSERT_FROM_STAGING = """
+    WITH written AS (
+        INSERT INTO leave_quotas (user_id, leave_type_id, year, quota)
+        SELECT user_id, leave_type_id, year, quota FROM leave_quota_staging
+        ON CONFLICT ON CONSTRAINT uq_user_leave_year {action}
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM written
+"""
+_KEEP_EXISTING = text(_UPSERT_FROM_STAGING.format(action="DO NOTHING"))
+_OVERWRITE_EXISTING = text(_UPSERT_FROM_STAGING.format(
+    action="DO UPDATE SET quota = EXCLUDED.quota WHERE leave_quotas.quota IS DISTINCT FROM EXCLUDED.quota"
+))
+
+
+def years_of_service(hire_date: date, year: int) -> int:
+    """
+    Full years of service on January 1st of the given year (0 for later hires)
+    """
+    years = year - hire_date.year - ((hire_date.month, hire_date.day) > (1, 1))
+    return max(years, 0)
+
+
+def entitlement_table(policy: LeaveTypeQuotaPolicy) -> List[int]:
+    """
+    Entitlement indexed by years of service; the last entry holds for any longer service
+    """
+    steps = sorted(policy.seniority_steps, key=lambda step: step.years)
+    table = [policy.base_days] * (steps[-1].years + 1 if steps else 1)
+    for step in steps:
+        for years in range(step.years, len(table)):
+            table[years] = step.days
+    return table
+
+
+def build_quota_rows(
+    year: int,
+    users: Sequence[Tuple[int, date]],
+    policies: Sequence[LeaveTypeQuotaPolicy],
+    unused_days: Dict[Tuple[int, int], float]
+) -> List[Tuple[int, int, int, int]]:
+    """
+    (user_id, leave_type_id, year, quota) for every user and policy. unused_days maps
+    (user_id, leave_type_id) to the days left over from the previous year.
+    """
+    seniority = [(user_id, years_of_service(hire_date, year)) for user_id, hire_date in users]
+    rows = []
+    for policy in policies:
+        table = entitlement_table(policy)
+        longest = len(table) - 1
+        for user_id, years in seniority:
+            quota = table[min(years, longest)]
+            if policy.carry_over_max:
+                unused = unused_days.get((user_id, policy.leave_type_id), 0)
+                quota += min(policy.carry_over_max, max(math.floor(unused), 0))
+            if policy.max_days is not None:
+                quota = min(quota, policy.max_days)
+            rows.append((user_id, policy.leave_type_id, year, quota))
+    return rows
+
+
+def _unused_days(db: Session, year: int, leave_type_ids: List[int], first_user_id: int, last_user_id: int) -> Dict[Tuple[int, int], float]:
+    """
+    Quota minus used and pending days of the previous year, for a range of users
+    """
+    if not leave_type_ids:
+        return {}
+    remaining = LeaveQuota.quota - func.coalesce(LeaveUsage.used_days, 0) - func.coalesce(LeaveUsage.pending_days, 0)
+    stmt = (
+        select(LeaveQuota.user_id, LeaveQuota.leave_type_id, remaining)
+        .outerjoin(LeaveUsage, and_(
+            LeaveUsage.user_id == LeaveQuota.user_id,
+            LeaveUsage.leave_type_id == LeaveQuota.leave_type_id,
+            LeaveUsage.year == LeaveQuota.year
+        ))
+        .where(
+            LeaveQuota.year == year - 1,
+            LeaveQuota.leave_type_id.in_(leave_type_ids),
+            LeaveQuota.user_id.between(first_user_id, last_user_id)
+        )
+    )
+    return {(user_id, leave_type_id): float(days) for user_id, leave_type_id, days in db.execute(stmt)}
+
+
+def _copy_rows(db: Session, rows: Iterable[Tuple[int, int, int, int]]):
+    """
+    Load rows into the staging table with COPY
+    """
+    buffer = io.StringIO("".join(f"{user_id}\t{leave_type_id}\t{year}\t{quota}\n" for user_id, leave_type_id, year, quota in rows))
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert("COPY leave_quota_staging (user_id, leave_type_id, year, quota) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+
+
+def provision_leave_quotas(
+    db: Session,
+    request: QuotaProvisionRequest,
+    batch_size: int = PROVISION_BATCH_SIZE,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> dict:
+    """
+    Create the quotas of request.year for every user and listed leave type: the seniority
+    entitlement from User.hire_date plus capped carry-over of the previous year's unused days.
+    Users are processed in id order, batch_size at a time; each batch is COPYed into a
+    staging table and upserted on (user, leave_type, year), then committed. Existing quotas
+    are kept unless request.overwrite, so running the job again is safe.
+    progress(users_done, users_total) is called after every batch.
+    """
+    leave_type_ids = [policy.leave_type_id for policy in request.leave_types]
+    if len(set(leave_type_ids)) != len(leave_type_ids):
+        raise ValueError("Each leave type can only appear once in the policy")
+    missing = set(leave_type_ids) - set(db.scalars(select(LeaveType.id).where(LeaveType.id.in_(leave_type_ids))))
+    if missing:
+        raise ValueError(f"Leave types not found: {sorted(missing)}")
+
+    carry_over_ids = [policy.leave_type_id for policy in request.leave_types if policy.carry_over_max]
+    upsert = _OVERWRITE_EXISTING if request.overwrite else _KEEP_EXISTING
+    total_users = db.scalar(select(func.count()).select_from(User))
+    summary = {"year": request.year, "users": 0, "leave_types": len(leave_type_ids), "inserted": 0, "updated": 0, "unchanged": 0}
+
+    last_user_id = 0
+    while True:
+        users = db.execute(
+            select(User.id, User.hire_date).where(User.id > last_user_id).order_by(User.id).limit(batch_size)
+        ).all()
+        if not users:
+            break
+        first_user_id, last_user_id = users[0].id, users[-1].id
+
+        unused = _unused_days(db, request.year, carry_over_ids, first_user_id, last_user_id)
+        rows = build_quota_rows(request.year, users, request.leave_types, unused)
+        db.execute(_CREATE_STAGING)
+        _copy_rows(db, rows)
+        inserted, updated = db.execute(upsert).one()
+        db.commit()
+
+        summary["users"] += len(users)
+        summary["inserted"] += inserted
+        summary["updated"] += updated
+        summary["unchanged"] += len(rows) - inserted - updated
+        if progress:
+            progress(summary["users"], total_users)
+    return summary
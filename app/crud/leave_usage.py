@@ -0,0 +1,173 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select, update, and_, or_
+from sqlalchemy.dialects.postgresql import insert
+from typing import List, Optional, Dict, Tuple
+
+from ..models.leave_request import LeaveRequest
+from ..models.leave_usage import LeaveUsage
+from ..models.leave_quota import LeaveQuota
+
+
+def get_leave_usage(db: Session, user_id: int, leave_type_id: int, year: int) -> Optional[LeaveUsage]:
+    """
+    Get the ledger row of a user / leave type / year by primary key
+    """
+    return db.get(LeaveUsage, (user_id, leave_type_id, year))
+
+
+def apply_leave_usage(
+    db: Session,
+    user_id: int,
+    leave_type_id: int,
+    year: int,
+    used_delta: float = 0,
+    pending_delta: float = 0
+):
+    """
+    Atomically add the given deltas to the ledger row, creating it if needed.
+    Does not commit, so the change lands in the caller's transaction.
+    """
+    stmt = insert(LeaveUsage).values(
+        user_id=user_id,
+        leave_type_id=leave_type_id,
+        year=year,
+        used_days=used_delta,
+        pending_days=pending_delta
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[LeaveUsage.user_id, LeaveUsage.leave_type_id, LeaveUsage.year],
+        set_={
+            "used_days": LeaveUsage.used_days + stmt.excluded.used_days,
+            "pending_days": LeaveUsage.pending_days + stmt.excluded.pending_days,
+            "updated_at": func.now()
+        }
+    )
+    db.execute(stmt)
+
+
+def reserve_pending_days(db: Session, user_id: int, leave_type_id: int, year: int, days: float) -> Optional[float]:
+    """
+    Atomically add `days` to pending_days when used + pending + days fits in the quota of
+    that year, with one guarded UPDATE on the ledger row. Concurrent reservations queue on
+    the row lock and re-check the guard, so a balance can never be oversubscribed.
+    Returns the remaining days after the reservation, or None when the quota is missing
+    or too small. Does not commit.
+    """
+    stmt = (
+        update(LeaveUsage)
+        .where(
+            LeaveUsage.user_id == user_id,
+            LeaveUsage.leave_type_id == leave_type_id,
+            LeaveUsage.year == year,
+            LeaveQuota.user_id == LeaveUsage.user_id,
+            LeaveQuota.leave_type_id == LeaveUsage.leave_type_id,
+            LeaveQuota.year == LeaveUsage.year,
+            LeaveUsage.used_days + LeaveUsage.pending_days + days <= LeaveQuota.quota
+        )
+        .values(pending_days=LeaveUsage.pending_days + days, updated_at=func.now())
+        .returning(LeaveQuota.quota - LeaveUsage.used_days - LeaveUsage.pending_days)
+        .execution_options(synchronize_session=False)
+    )
+    remaining = db.execute(stmt).scalar()
+    if remaining is None:
+        # 第一次在這個年度請此假別時帳本列還不存在：先建立 (或等待同時建立的交易完成) 再重試
+        db.execute(
+            insert(LeaveUsage)
+            .values(user_id=user_id, leave_type_id=leave_type_id, year=year)
+            .on_conflict_do_nothing(index_elements=[LeaveUsage.user_id, LeaveUsage.leave_type_id, LeaveUsage.year])
+        )
+        remaining = db.execute(stmt).scalar()
+    return remaining
+
+
+def apply_leave_usage_many(db: Session, deltas: Dict[Tuple[int, int, int], Tuple[float, float]]):
+    """
+    Batched apply_leave_usage: {(user_id, leave_type_id, year): (used_delta, pending_delta)}
+    applied with one multi-row upsert. Does not commit.
+    """
+    if not deltas:
+        return
+    stmt = insert(LeaveUsage).values([
+        {
+            "user_id": user_id,
+            "leave_type_id": leave_type_id,
+            "year": year,
+            "used_days": used_delta,
+            "pending_days": pending_delta
+        }
+        # 依主鍵排序，讓同時進行的批次以相同順序取得列鎖，避免死結
+        for (user_id, leave_type_id, year), (used_delta, pending_delta) in sorted(deltas.items())
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[LeaveUsage.user_id, LeaveUsage.leave_type_id, LeaveUsage.year],
+        set_={
+            "used_days": LeaveUsage.used_days + stmt.excluded.used_days,
+            "pending_days": LeaveUsage.pending_days + stmt.excluded.pending_days,
+            "updated_at": func.now()
+        }
+    )
+    db.execute(stmt)
+
+
+def _usage_from_requests():
+    """
+    Aggregate of leave_requests in the same shape as the ledger
+    """
+    year = func.extract('year', LeaveRequest.start_date).cast(LeaveUsage.year.type)
+    return (
+        select(
+            LeaveRequest.user_id.label("user_id"),
+            LeaveRequest.leave_type_id.label("leave_type_id"),
+            year.label("year"),
+            func.coalesce(func.sum(LeaveRequest.days_count).filter(LeaveRequest.status == 'approved'), 0).label("used_days"),
+            func.coalesce(func.sum(LeaveRequest.days_count).filter(LeaveRequest.status == 'pending'), 0).label("pending_days")
+        )
+        .group_by(LeaveRequest.user_id, LeaveRequest.leave_type_id, year)
+        .subquery()
+    )
+
+
+def check_leave_usage_consistency(db: Session) -> List[dict]:
+    """
+    Compare the ledger with the leave_requests table and return every mismatch
+    """
+    expected = _usage_from_requests()
+    key_match = and_(
+        LeaveUsage.user_id == expected.c.user_id,
+        LeaveUsage.leave_type_id == expected.c.leave_type_id,
+        LeaveUsage.year == expected.c.year
+    )
+    stmt = (
+        select(
+            func.coalesce(LeaveUsage.user_id, expected.c.user_id).label("user_id"),
+            func.coalesce(LeaveUsage.leave_type_id, expected.c.leave_type_id).label("leave_type_id"),
+            func.coalesce(LeaveUsage.year, expected.c.year).label("year"),
+            func.coalesce(LeaveUsage.used_days, 0).label("ledger_used_days"),
+            func.coalesce(expected.c.used_days, 0).label("actual_used_days"),
+            func.coalesce(LeaveUsage.pending_days, 0).label("ledger_pending_days"),
+            func.coalesce(expected.c.pending_days, 0).label("actual_pending_days")
+        )
+        .select_from(LeaveUsage.__table__.join(expected, key_match, full=True))
+        .where(or_(
+            func.coalesce(LeaveUsage.used_days, 0) != func.coalesce(expected.c.used_days, 0),
+            func.coalesce(LeaveUsage.pending_days, 0) != func.coalesce(expected.c.pending_days, 0)
+        ))
+        .order_by("user_id", "leave_type_id", "year")
+    )
+    return [dict(row._mapping) for row in db.execute(stmt)]
+
+
+def rebuild_leave_usage(db: Session) -> int:
+    """
+    Recompute the whole ledger from leave_requests. Returns the number of ledger rows.
+    """
+    expected = _usage_from_requests()
+    db.query(LeaveUsage).delete()
+    result = db.execute(
+        insert(LeaveUsage).from_select(
+            ["user_id", "leave_type_id", "year", "used_days", "pending_days"],
+            select(expected.c.user_id, expected.c.leave_type_id, expected.c.year, expected.c.used_days, expected.c.pending_days)
+        )
+    )
+    db.commit()
+    return result.rowcount
@@ -1,5 +1,7 @@
 from sqlalchemy.orm import Session
-from typing import Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert
+from typing import Optional, Dict, Any, List
 from ..models.notification import Notification
 from ..schemas.notification import NotificationBase, PaginationMeta, NotificationReadResponse, NotificationReadAllResponse
 from fastapi import HTTPException
@@ -113,3 +115,51 @@ def create_notifications(
     db.add(new_notification)
     db.commit()
     db.refresh(new_notification)
+
+def add_leave_request_notifications(db: Session, notifications: List[Dict[str, Any]]):
+    """
+    Insert many leave request notifications ({user_id, title, message, related_id})
+    with one multi-row INSERT. Does not commit, so they land in the caller's transaction.
+    """
+    if not notifications:
+        return
+    db.execute(insert(Notification).values([
+        {**notification, "related_to": "leave_request", "is_read": False}
+        for notification in notifications
+    ]))
+
+
+# Async variants: run the same ORM code on an AsyncSession (asyncpg) without blocking the event loop
+async def get_user_notifications_async(
+    db: AsyncSession,
+    user_id: int,
+    unread_only: bool = False,
+    page: int = 1,
+    per_page: int = 10
+) -> Dict[str, Any]:
+    return await db.run_sync(get_user_notifications, user_id, unread_only, page, per_page)
+
+
+async def mark_notification_as_read_async(
+    db: AsyncSession,
+    notification_id: int,
+    user_id: int
+) -> NotificationReadResponse:
+    return await db.run_sync(mark_notification_as_read, notification_id, user_id)
+
+
+async def mark_all_notifications_as_read_async(
+    db: AsyncSession,
+    user_id: int
+) -> NotificationReadAllResponse:
+    return await db.run_sync(mark_all_notifications_as_read, user_id)
+
+
+async def create_notifications_async(
+        db: AsyncSession,
+        receiver_id: int,
+        title: str,
+        message: str,
+        leave_request_id: int
+):
+    return await db.run_sync(create_notifications, receiver_id, title, message, leave_request_id)
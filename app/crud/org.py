@@ -0,0 +1,133 @@
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy import select, delete, text, event, inspect, exists, func, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql import Select, CompoundSelect
+from typing import Iterable, List, Union
+from ..config import settings
+from ..models.manager import Manager
+from ..models.org_hierarchy import OrgHierarchy, OrgChartVersion
+from ..utils.org_chart import OrgChart, OrgChartCache
+
+ORG_SCOPES = ("team", "org")
+# 向上追溯的層數上限，資料中若有循環也會在此停止
+ORG_MAX_DEPTH = 64
+
+# 各 worker 共用的組織圖 (直屬關係)，本行程的主管異動 commit 後立即重新確認版本
+org_chart_cache = OrgChartCache(check_interval=settings.ORG_CHART_CHECK_INTERVAL)
+
+# 由直屬關係 (managers) 向上遞迴，產生指定員工的所有上層主管
+_INSERT_ANCESTORS = text(f"""
+    INSERT INTO org_hierarchy (ancestor_id, descendant_id, depth)
+    WITH RECURSIVE up(descendant_id, ancestor_id, depth) AS (
+        SELECT user_id, manager_id, 1 FROM managers WHERE user_id = ANY(:user_ids)
+        UNION
+        SELECT up.descendant_id, m.manager_id, up.depth + 1
+        FROM up JOIN managers m ON m.user_id = up.ancestor_id
+        WHERE up.depth < {ORG_MAX_DEPTH}
+    )
+    SELECT ancestor_id, descendant_id, min(depth)
+    FROM up
+    WHERE ancestor_id <> descendant_id
+    GROUP BY ancestor_id, descendant_id
+""")
+
+
+def _refresh_closure(connection, user_ids: Iterable[int]):
+    """
+    Recompute the closure rows of the given users and everyone below them from managers
+    """
+    affected = set(user_ids)
+    affected.update(connection.scalars(
+        select(OrgHierarchy.descendant_id).where(OrgHierarchy.ancestor_id.in_(affected))
+    ))
+    user_ids = sorted(affected)
+    connection.execute(delete(OrgHierarchy).where(OrgHierarchy.descendant_id.in_(user_ids)))
+    connection.execute(_INSERT_ANCESTORS, {"user_ids": user_ids})
+
+
+def _bump_org_chart_version(connection):
+    stmt = insert(OrgChartVersion).values(id=1, version=1)
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=[OrgChartVersion.id],
+        set_={"version": OrgChartVersion.version + 1}
+    ))
+
+
+def _manager_changed(connection, target, user_ids: Iterable[int]):
+    _refresh_closure(connection, user_ids)
+    _bump_org_chart_version(connection)
+    session = object_session(target)
+    if session is not None:
+        session.info["org_chart_changed"] = True
+
+
+@event.listens_for(Manager, "after_insert")
+@event.listens_for(Manager, "after_delete")
+def _manager_edge_changed(mapper, connection, target):
+    _manager_changed(connection, target, [target.user_id])
+
+
+@event.listens_for(Manager, "after_update")
+def _manager_edge_updated(mapper, connection, target):
+    history = inspect(target).attrs.user_id.history
+    _manager_changed(connection, target, [target.user_id, *history.deleted])
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_org_chart(session):
+    if session.info.pop("org_chart_changed", False):
+        org_chart_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_org_chart_changes(session):
+    session.info.pop("org_chart_changed", None)
+
+
+def get_org_chart(db: Session) -> OrgChart:
+    """
+    Current manager -> reports / report -> manager maps of this worker
+    """
+    return org_chart_cache.get(
+        lambda: db.scalar(select(OrgChartVersion.version).where(OrgChartVersion.id == 1)) or 0,
+        lambda: db.execute(select(Manager.user_id, Manager.manager_id)).tuples().all()
+    )
+
+
+def rebuild_org_hierarchy(db: Session) -> int:
+    """
+    Recompute the whole closure table and bump the org chart version, e.g. after bulk
+    changes that bypass the ORM. Returns the number of rows.
+    """
+    db.execute(delete(OrgHierarchy))
+    db.execute(_INSERT_ANCESTORS, {"user_ids": list(db.scalars(select(Manager.user_id).distinct()))})
+    _bump_org_chart_version(db.connection())
+    db.commit()
+    org_chart_cache.invalidate()
+    return db.scalar(select(func.count()).select_from(OrgHierarchy))
+
+
+def org_member_ids(manager_id: int, include_self: bool = False) -> Union[Select, CompoundSelect]:
+    """
+    Everyone directly or indirectly under the manager, as a subquery for IN
+    """
+    members = select(OrgHierarchy.descendant_id).where(OrgHierarchy.ancestor_id == manager_id)
+    if include_self:
+        members = members.union_all(select(literal(manager_id)))
+    return members
+
+
+def is_in_org(db: Session, manager_id: int, user_id: int) -> bool:
+    return db.scalar(select(exists().where(
+        OrgHierarchy.ancestor_id == manager_id,
+        OrgHierarchy.descendant_id == user_id
+    )))
+
+
+def get_org_chain(db: Session, user_id: int) -> List[int]:
+    """
+    Managers above the user, nearest first
+    """
+    return db.scalars(
+        select(OrgHierarchy.ancestor_id).where(OrgHierarchy.descendant_id == user_id).order_by(OrgHierarchy.depth)
+    ).all()
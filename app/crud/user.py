@@ -1,10 +1,10 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import select
-from ..utils.auth import verify_password
+from ..utils.auth import verify_and_update_password
 from typing import List
 from ..models.user import User
 from ..models.department import Department
-from ..models.manager import Manager
+from .org import get_org_chart
 from sqlalchemy.orm import joinedload
 
 def get_user_by_email(db: Session, email: str):
@@ -15,9 +15,17 @@ def authenticate_user(db: Session, email: str, password: str):
     user = get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.password_hash): 
+    verified, new_hash = verify_and_update_password(password, user.password_hash)
+    if not verified:
         return None
+    if new_hash:
+        update_password_hash(db, user, new_hash)
     return user
+
+def update_password_hash(db: Session, user: User, new_hash: str):
+    # 以目前設定的 bcrypt 成本重新雜湊後寫回
+    user.password_hash = new_hash
+    db.commit()
     
 
 def get_user_by_id(db: Session, user_id: int):
@@ -27,11 +35,9 @@ def get_user_name_by_id(db: Session, user_id: int):
     return db.query(User.first_name, User.last_name).filter(User.id == user_id).first()
 
 
-def get_team_members(db: Session, manager_id: int, current_user_id: int) -> List[User]:
-    # get all user_id of team members whose manager is current user
-    team_member_ids = db.scalars(
-        select(Manager.user_id).where(Manager.manager_id == manager_id)
-    ).all()
+def get_team_member_ids(db: Session, manager_id: int, current_user_id: int) -> List[int]:
+    # get all user_id of team members whose manager is current user (from the cached org chart)
+    team_member_ids = get_org_chart(db).reports_of(manager_id) if manager_id is not None else []
 
     if not team_member_ids and manager_id != current_user_id:
         # if there is no manager above current user, then return profile of current user
@@ -39,18 +45,17 @@ def get_team_members(db: Session, manager_id: int, current_user_id: int) -> List
         print("higheset manger")
         team_member_ids.append(current_user_id)
         print(str(team_member_ids))
-        
+    return team_member_ids
+
+def get_team_members(db: Session, manager_id: int, current_user_id: int) -> List[User]:
+    team_member_ids = get_team_member_ids(db, manager_id, current_user_id)
     # get user profile based on team_member_ids list including department
     # Use joinedload to explicitly load the department relationship
     return db.query(User).options(joinedload(User.department)).filter(User.id.in_(team_member_ids)).all()
 
 def get_manager_id(db: Session, user_id: int):
-    # get manager_id firstly:
-    stmt = select(Manager.manager_id).where(Manager.user_id == user_id)
-    result = db.execute(stmt).first()
-    if result:
-        return result.manager_id
-    return None
+    # get manager_id firstly (from the cached org chart):
+    return get_org_chart(db).manager_of(user_id)
 
 def get_manager(db: Session, manager_id: int):
     # then get manager name
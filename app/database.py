@@ -1,16 +1,36 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
+from .utils.db_metrics import (
+    TimedQueuePool, TimedAsyncAdaptedQueuePool, sync_pool_metrics, async_pool_metrics, instrument_engine
+)
 
 
 # Create the engine that will interact with the database
 DATABASE_URL = settings.DATABASE_URL  # Fetch from config settings
-engine = create_engine(DATABASE_URL)
+pool_options = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+engine = create_engine(DATABASE_URL, poolclass=TimedQueuePool, **pool_options)
+instrument_engine(engine, sync_pool_metrics)
 
 # Create a session maker that will be used to establish DB connections
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine / session maker, only created when DB_ASYNC is enabled
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    async_engine = create_async_engine(settings.ASYNC_DATABASE_URL, poolclass=TimedAsyncAdaptedQueuePool, **pool_options)
+    instrument_engine(async_engine.sync_engine, async_pool_metrics)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create a base class for our database models to inherit
 Base = declarative_base()
 
@@ -21,3 +41,11 @@ def get_db():
         yield db  # Yield the session to the route
     finally:
         db.close()  # Ensure the session is closed after the
+
+# Dependency that provides an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Session dependency for routes that support both modes, chosen by DB_ASYNC
+get_session = get_async_db if settings.DB_ASYNC else get_db
@@ -0,0 +1,40 @@
+# 檢查 leave_usage 帳本與 leave_requests 是否一致
+# 用法: python -m app.leave_usage_check [--fix]
+import argparse
+import sys
+
+from app.database import SessionLocal
+from app.crud.leave_usage import check_leave_usage_consistency, rebuild_leave_usage
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check the leave_usage ledger against leave_requests")
+    parser.add_argument("--fix", action="store_true", help="Rebuild the ledger when mismatches are found")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        mismatches = check_leave_usage_consistency(db)
+        if not mismatches:
+            print("leave_usage ledger is consistent.")
+            return 0
+
+        print(f"Found {len(mismatches)} inconsistent ledger rows:")
+        for row in mismatches:
+            print(
+                f"  user={row['user_id']} leave_type={row['leave_type_id']} year={row['year']} "
+                f"used={row['ledger_used_days']} (expected {row['actual_used_days']}) "
+                f"pending={row['ledger_pending_days']} (expected {row['actual_pending_days']})"
+            )
+
+        if args.fix:
+            count = rebuild_leave_usage(db)
+            print(f"Rebuilt leave_usage ledger with {count} rows.")
+            return 0
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
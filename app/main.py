@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.database import engine, Base
+from app.models.leave_request import ensure_btree_gist
 import logging
 import sys
 import json
@@ -15,6 +16,10 @@ from .routes import calendar
 from .routes import notification
 from .routes import leave_type
 from .routes import leave_attachment
+from .routes import internal
+from .routes import holiday
+from .routes import report
+from .routes import leave_accrual
 
 
 # 配置更好的日誌記錄系統
@@ -117,6 +122,10 @@ app.include_router(calendar.router)
 app.include_router(notification.router)
 app.include_router(leave_type.router)
 app.include_router(leave_attachment.router)
+app.include_router(internal.router)
+app.include_router(holiday.router)
+app.include_router(report.router)
+app.include_router(leave_accrual.router)
 
 
 # Create database tables
@@ -124,6 +133,9 @@ app.include_router(leave_attachment.router)
 def create_tables():
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    # 假單的排他約束需要 btree_gist，缺少時在啟動階段就以明確訊息失敗
+    with engine.begin() as connection:
+        ensure_btree_gist(connection)
     print("Database tables created successfully!")
 
 
@@ -0,0 +1,45 @@
+# 月結作業: 產生每位使用者每個按月累積假別的月底累積快照，可重複執行
+# 用法: python -m app.materialize_leave_accruals [--year 2026 --month 9] [--backfill]
+# 未指定年月時取最近一個已結束的月份；--backfill 會一併補齊該年度之前的月份
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+
+from app.database import SessionLocal
+from app.crud.leave_accrual import completed_months, materialize_accruals
+
+
+def last_month_end(today: date) -> date:
+    if completed_months(today) == today.month:
+        return today
+    return today.replace(day=1) - timedelta(days=1)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Store month-end leave accrual snapshots")
+    parser.add_argument("--year", type=int)
+    parser.add_argument("--month", type=int)
+    parser.add_argument("--backfill", action="store_true", help="Also store the earlier months of that year")
+    args = parser.parse_args()
+
+    month_end = last_month_end(date.today())
+    year = args.year or month_end.year
+    month = args.month or month_end.month
+    if not 1 <= month <= 12:
+        print("Error: month must be between 1 and 12")
+        return 1
+
+    db = SessionLocal()
+    try:
+        for snapshot_month in range(1 if args.backfill else month, month + 1):
+            started = time.perf_counter()
+            rows = materialize_accruals(db, year, snapshot_month)
+            print(f"{year}-{snapshot_month:02d}: {rows} accruals in {time.perf_counter() - started:.2f} s")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
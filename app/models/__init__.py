@@ -7,4 +7,8 @@ from .leave_request import LeaveRequest, LeaveStatus
 from .leave_request_attachment import LeaveAttachment
 from .notification import Notification
 from .manager import Manager
-from .audit_log import AuditLog
\ No newline at end of file
+from .audit_log import AuditLog
+from .leave_usage import LeaveUsage
+from .holiday import Holiday
+from .leave_accrual import LeaveAccrualRule, LeaveAccrual
+from .org_hierarchy import OrgHierarchy, OrgChartVersion
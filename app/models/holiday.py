@@ -0,0 +1,16 @@
+from sqlalchemy import String, Date, TIMESTAMP, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime, date
+from .base import Base
+
+
+class Holiday(Base):
+    """國定假日與公司假日，計算請假天數時不算工作天"""
+    __tablename__ = "holidays"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    date: Mapped[date] = mapped_column(Date, unique=True, nullable=False)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    # national / company
+    category: Mapped[str] = mapped_column(String(20), server_default="national", nullable=False)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now(), nullable=False)
@@ -0,0 +1,29 @@
+from sqlalchemy import Integer, DECIMAL, ForeignKey, TIMESTAMP, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from typing import Optional
+from .base import Base
+
+
+class LeaveAccrualRule(Base):
+    """按月累積的假別規則：每月底入帳 days_per_month 天，到職滿 waiting_months 個月後開始累積"""
+    __tablename__ = "leave_accrual_rules"
+
+    leave_type_id: Mapped[int] = mapped_column(Integer, ForeignKey("leave_types.id"), primary_key=True)
+    days_per_month: Mapped[float] = mapped_column(DECIMAL(4, 2), nullable=False)
+    waiting_months: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
+    # 年度累積上限，NULL 表示不設限
+    max_days: Mapped[Optional[float]] = mapped_column(DECIMAL(5, 1), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class LeaveAccrual(Base):
+    """每位使用者每個假別截至某年某月底的累積天數快照 (由月結作業產生)"""
+    __tablename__ = "leave_accruals"
+
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), primary_key=True)
+    leave_type_id: Mapped[int] = mapped_column(Integer, ForeignKey("leave_types.id"), primary_key=True)
+    year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    month: Mapped[int] = mapped_column(Integer, primary_key=True)
+    accrued_days: Mapped[float] = mapped_column(DECIMAL(6, 2), nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now(), nullable=False)
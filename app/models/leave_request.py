@@ -1,7 +1,9 @@
-from sqlalchemy import String, Text, Boolean, Date, DECIMAL, Enum, ForeignKey, TIMESTAMP, func
+from sqlalchemy import String, Text, Boolean, Date, DECIMAL, Enum, ForeignKey, TIMESTAMP, Index, Computed, DDL, event, func, text
+from sqlalchemy.dialects.postgresql import DATERANGE, TSVECTOR, ExcludeConstraint
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime, date
-from typing import Optional
+from typing import Optional, Any
 from enum import Enum as PyEnum
 from .base import Base
 
@@ -11,11 +13,68 @@ class LeaveStatus(PyEnum):
     APPROVED = "Approved"
     REJECTED = "Rejected"
 
+# 請假原因與否決原因的全文檢索向量：以 simple 設定分詞，另外加入中日韓文字的相鄰兩字 (bigram)
+# 範圍需與 utils.search.CJK_RUN 一致
+SEARCH_VECTOR_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION leave_request_search_vector(reason text, rejection_reason text)
+RETURNS tsvector
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT to_tsvector('simple', coalesce(reason, '') || ' ' || coalesce(rejection_reason, ''))
+        || coalesce((
+            SELECT array_to_tsvector(array_agg(DISTINCT substr(m.run[1], i, 2)))
+            FROM regexp_matches(
+                     coalesce(reason, '') || ' ' || coalesce(rejection_reason, ''),
+                     '[\\u3040-\\u30ff\\u3400-\\u4dbf\\u4e00-\\u9fff\\uac00-\\ud7af]{2,}', 'g'
+                 ) AS m(run),
+                 generate_series(1, length(m.run[1]) - 1) AS i
+        ), ''::tsvector)
+$$
+""")
+
+# 排他約束中的 user_id WITH = 需要 btree_gist；Cloud SQL 上只有 cloudsqlsuperuser 角色 (例如 postgres 使用者) 可以建立
+BTREE_GIST_MISSING = (
+    "The btree_gist extension is required by ex_leave_requests_user_period but is not installed "
+    "and could not be created. Run CREATE EXTENSION btree_gist in this database as a role allowed "
+    "to create extensions (on Cloud SQL, a member of cloudsqlsuperuser such as the postgres user)."
+)
+
+
+def ensure_btree_gist(connection):
+    """
+    Create btree_gist if it is missing, raising RuntimeError with the privilege needed
+    when the connected role cannot create it
+    """
+    if connection.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'btree_gist'")).first():
+        return
+    try:
+        with connection.begin_nested():
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+    except DBAPIError as e:
+        raise RuntimeError(BTREE_GIST_MISSING) from e
+
+
 class LeaveRequest(Base):
     __tablename__ = "leave_requests"
+    __table_args__ = (
+        Index("ix_leave_requests_user_status_start", "user_id", "status", "start_date"),
+        Index("ix_leave_requests_leave_type_start", "leave_type_id", "start_date"),
+        Index("ix_leave_requests_user_start_id", "user_id", "start_date", "id"),
+        Index("ix_leave_requests_period", "period", postgresql_using="gist"),
+        Index("ix_leave_requests_search_vector", "search_vector", postgresql_using="gin"),
+        # 同一使用者未被否決的假單期間不可重疊 (需要 btree_gist)
+        ExcludeConstraint(
+            ("user_id", "="),
+            ("period", "&&"),
+            name="ex_leave_requests_user_period",
+            using="gist",
+            where=text("status <> 'rejected'")
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    request_id: Mapped[str] = mapped_column(String(20), unique=True, nullable=False)
+    # 時間排序的編號 (utils.request_id)；以 "C" 定序比較位元組，索引順序即建立順序
+    request_id: Mapped[str] = mapped_column(String(20, collation="C"), unique=True, nullable=False)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     leave_type_id: Mapped[int] = mapped_column(ForeignKey("leave_types.id"), nullable=False)
     proxy_user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False, server_default="1")
@@ -23,6 +82,8 @@ class LeaveRequest(Base):
     end_date: Mapped[date] = mapped_column(Date, nullable=False)
     start_half_day: Mapped[bool] = mapped_column(Boolean, server_default="False", nullable=False)
     end_half_day: Mapped[bool] = mapped_column(Boolean, server_default="False", nullable=False)
+    # [start_date, end_date] 的日期區間，由資料庫產生，供重疊查詢與排他約束使用
+    period: Mapped[Any] = mapped_column(DATERANGE, Computed("daterange(start_date, end_date, '[]')", persisted=True))
     days_count: Mapped[float] = mapped_column(DECIMAL(5, 1), nullable=False)
     reason: Mapped[str] = mapped_column(Text, nullable=False)
     # status: Mapped[LeaveStatus] = mapped_column(Enum(LeaveStatus), server_default="Pending", nullable=False)
@@ -30,6 +91,12 @@ class LeaveRequest(Base):
     approver_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id"))
     approved_at: Mapped[Optional[datetime]] = mapped_column()
     rejection_reason: Mapped[Optional[str]] = mapped_column(Text)
+    # 由資料庫產生 (leave_request_search_vector)，只在搜尋條件中使用，預設不載入
+    search_vector: Mapped[Any] = mapped_column(
+        TSVECTOR,
+        Computed("leave_request_search_vector(reason, rejection_reason)", persisted=True),
+        deferred=True
+    )
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), nullable=False)
 
@@ -39,3 +106,7 @@ class LeaveRequest(Base):
     approver: Mapped["User"] = relationship("User", back_populates="approvals", foreign_keys=[approver_id])
     leave_type: Mapped["LeaveType"] = relationship("LeaveType", back_populates="leave_requests")
     attachments: Mapped[list["LeaveAttachment"]] = relationship("LeaveAttachment", back_populates="leave_request", cascade="all, delete-orphan")
+
+
+event.listen(LeaveRequest.__table__, "before_create", SEARCH_VECTOR_FUNCTION)
+event.listen(LeaveRequest.__table__, "before_create", lambda target, connection, **kw: ensure_btree_gist(connection))
@@ -0,0 +1,16 @@
+from sqlalchemy import Integer, DECIMAL, ForeignKey, TIMESTAMP, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from .base import Base
+
+
+class LeaveUsage(Base):
+    """每位使用者每個假別每年度的已使用 / 審核中天數 (由請假流程同步維護)"""
+    __tablename__ = "leave_usage"
+
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), primary_key=True)
+    leave_type_id: Mapped[int] = mapped_column(Integer, ForeignKey("leave_types.id"), primary_key=True)
+    year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    used_days: Mapped[float] = mapped_column(DECIMAL(6, 1), server_default="0", nullable=False)
+    pending_days: Mapped[float] = mapped_column(DECIMAL(6, 1), server_default="0", nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), nullable=False)
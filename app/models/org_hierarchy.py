@@ -0,0 +1,23 @@
+from sqlalchemy import Integer, BigInteger, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from .base import Base
+
+
+class OrgHierarchy(Base):
+    """managers 的遞移閉包：ancestor 直接或間接管理 descendant，depth 為相隔層數 (直屬為 1)"""
+    __tablename__ = "org_hierarchy"
+    __table_args__ = (
+        Index("ix_org_hierarchy_descendant", "descendant_id", "ancestor_id"),
+    )
+
+    ancestor_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class OrgChartVersion(Base):
+    """單列計數器：每次主管關係異動時在同一交易中加一，各 worker 據此判斷組織圖快取是否過時"""
+    __tablename__ = "org_chart_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, server_default="0", nullable=False)
@@ -0,0 +1,52 @@
+# 依政策發放年度假別額度 (年資級距 + 上年度未休天數遞延)，可重複執行
+# 用法: python -m app.provision_leave_quotas --policy policy.json [--year 2027] [--overwrite]
+# policy.json 格式同 POST /internal/leave-quotas/provision 的 request body
+import argparse
+import sys
+import time
+
+from app.database import SessionLocal
+from app.crud.leave_quota import PROVISION_BATCH_SIZE, provision_leave_quotas
+from app.schemas.leave_quota import QuotaProvisionRequest
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Create the leave quotas of a year for every user")
+    parser.add_argument("--policy", required=True, help="JSON file with year, leave_types and overwrite")
+    parser.add_argument("--year", type=int, help="Override the year of the policy file")
+    parser.add_argument("--overwrite", action="store_true", help="Replace existing quotas of that year")
+    parser.add_argument("--batch-size", type=int, default=PROVISION_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with open(args.policy, encoding="utf-8") as policy_file:
+        request = QuotaProvisionRequest.model_validate_json(policy_file.read())
+    if args.year is not None:
+        request.year = args.year
+    if args.overwrite:
+        request.overwrite = True
+
+    started = time.perf_counter()
+
+    def progress(done: int, total: int):
+        print(f"\r{done}/{total} users ({time.perf_counter() - started:.1f} s)", end="", flush=True)
+
+    db = SessionLocal()
+    try:
+        summary = provision_leave_quotas(db, request, args.batch_size, progress)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        db.close()
+
+    print()
+    print(
+        f"Year {summary['year']}: {summary['users']} users x {summary['leave_types']} leave types, "
+        f"{summary['inserted']} inserted, {summary['updated']} updated, {summary['unchanged']} unchanged "
+        f"in {time.perf_counter() - started:.1f} s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, Body, Request
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from ..schemas.user import UserLogin, Token
 from ..crud import user as user_crud
-from ..utils.auth import create_access_token
+from ..utils.auth import create_access_token, verify_and_update_password_async
 from ..utils.dependencies import login_form_schema
 from ..database import get_db
 from pydantic import BaseModel
@@ -30,29 +31,23 @@ async def login(
     client_ip = request.client.host
     logger.info(f"Login attempt from {client_ip} with username: {login_data.username}")
     
-    current_user = user_crud.authenticate_user(db, login_data.username, login_data.password)
-    if not current_user:
+    # 資料庫查詢放到 threadpool，bcrypt 驗證放到專用的密碼執行緒池，皆不阻塞 event loop
+    current_user = await run_in_threadpool(user_crud.get_user_by_email, db, login_data.username)
+    verified = False
+    if current_user:
+        verified, new_hash = await verify_and_update_password_async(login_data.password, current_user.password_hash)
+    if not verified:
         logger.warning(f"Failed login attempt for {login_data.username} from {client_ip}")
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    
-    user_id = current_user.id
-    department = user_crud.get_department(db, user_id)
-    
-    # 記錄用戶詳細信息，使用安全序列化
-    logger.debug(f"User details: ID: {user_id}, Email: {current_user.email}, Department: {object_to_dict(department)}")
-    
-    user = {
-        "id": user_id,
-        "employee_id": current_user.employee_id,
-        "first_name": current_user.first_name,
-        "last_name": current_user.last_name,
-        "email": current_user.email,
-        "department":department,
-        "position": current_user.position,
-        "is_manager": current_user.is_manager        
-    }
-    
-    token = create_access_token(data={"sub": str(user['id'])})
+
+    # commit 會讓物件過期，先取出需要的欄位，避免之後在 event loop 上重新查詢
+    user_id, email = current_user.id, current_user.email
+    logger.debug(f"User details: ID: {user_id}, Email: {email}, Department: {current_user.department_id}")
+    if new_hash:
+        logger.info(f"Rehashing password for user {user_id} with the configured bcrypt cost")
+        await run_in_threadpool(user_crud.update_password_hash, db, current_user, new_hash)
+
+    token = create_access_token(data={"sub": str(user_id)})
     logger.debug(f"Generated token for user {user_id}: {token[:10]}...")
     
     cookie_response = JSONResponse(
@@ -67,7 +62,7 @@ async def login(
         max_age=3600,             # 1 hour
         path="/"
     )
-    logger.info(f"User {current_user.email} (ID: {user_id}) successfully logged in from {client_ip}")
+    logger.info(f"User {email} (ID: {user_id}) successfully logged in from {client_ip}")
     return cookie_response
 
 @router.post("/logout")
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import Optional
+from datetime import date
+from typing import Literal, Optional
 import logging
 from ..crud import calendar as calendar_crud
 from ..crud import user as user_crud
+from ..crud import org as org_crud
 from ..schemas.calendar import TeamCalendarResponse
 from ..utils.dependencies import get_current_user
 from ..models.user import User
@@ -21,7 +24,10 @@ router = APIRouter(
 @router.get("/team", response_model=TeamCalendarResponse)
 def get_team_calendar(
     year: Optional[int] = Query(..., description="Year (e.g., 2023)"),
-    month: Optional[int] = Query(..., description="Month (1-12)"),
+    month: Optional[int] = Query(None, description="Month (1-12), required unless quarter is given"),
+    months: int = Query(1, ge=1, le=12, description="Number of consecutive months starting at month"),
+    quarter: Optional[int] = Query(None, ge=1, le=4, description="Quarter (1-4); overrides month and months"),
+    scope: Literal["team", "org"] = Query("team", description="Managers only; team: direct reports, org: everyone below you"),
     request: Request = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -33,23 +39,31 @@ def get_team_calendar(
     logger.info(f"User {current_user.email} (ID: {current_user.id}) requesting team calendar from {client_ip}")
     
     try:
+        if quarter is not None:
+            month, months = quarter * 3 - 2, 3
         # Validate month
-        if not 1 <= month <= 12:
+        if month is None or not 1 <= month <= 12:
             raise ValueError("Month must be between 1 and 12")
-        
-        # Get team members
-        team_members = user_crud.get_team_members(db, current_user.id)
-        team_member_ids = [member.id for member in team_members]
-        
+
+        # 主管看自己與下屬 (org: 整個下層組織)，其他人看同一主管底下的同事
+        if current_user.is_manager and scope == "org":
+            team_member_ids = org_crud.org_member_ids(current_user.id, include_self=True)
+        elif current_user.is_manager:
+            team_member_ids = user_crud.get_team_member_ids(db, current_user.id, current_user.id) + [current_user.id]
+        else:
+            manager_id = user_crud.get_manager_id(db, current_user.id)
+            team_member_ids = user_crud.get_team_member_ids(db, manager_id, current_user.id)
+
         # Get calendar data
         calendar_data = calendar_crud.get_team_calendar(
             db=db,
             team_member_ids=team_member_ids,
             year=year,
-            month=month
+            month=month,
+            months=months
         )
-        
-        logger.info(f"Successfully returned team calendar for {year}-{month}")
+
+        logger.info(f"Successfully returned team calendar for {year}-{month} ({months} months)")
         return calendar_data
         
     except ValueError as e:
@@ -58,3 +72,39 @@ def get_team_calendar(
     except Exception as e:
         logger.error(f"Unexpected error in team calendar: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
+
+
+@router.get("/availability")
+def get_availability(
+    date_from: date = Query(..., alias="from", description="First day (YYYY-MM-DD)"),
+    date_to: date = Query(..., alias="to", description="Last day (YYYY-MM-DD), inclusive"),
+    department_id: Optional[int] = Query(None, description="Only users of this department"),
+    request: Request = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Who's out: user ids on approved leave for every day of [from, to], limited to
+    everyone below the calling manager.
+    Response: {"from", "to", "department_id", "days": {"YYYY-MM-DD": [user ids]}}
+    """
+    client_ip = request.client.host
+    logger.info(f"User {current_user.email} (ID: {current_user.id}) requesting availability "
+                f"{date_from} ~ {date_to} from {client_ip}")
+
+    if not current_user.is_manager:
+        raise HTTPException(status_code=403, detail="Only managers can view availability")
+
+    try:
+        # 查詢在回應開始前完成，串流時只做序列化，不再使用資料庫連線
+        absent_by_day = calendar_crud.get_absent_user_ids(
+            db, date_from, date_to, department_id, user_ids=org_crud.org_member_ids(current_user.id)
+        )
+    except ValueError as e:
+        logger.error(f"ValueError in availability: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        calendar_crud.iter_availability_json(date_from, date_to, department_id, absent_by_day),
+        media_type="application/json"
+    )
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+import logging
+from ..crud import holiday as holiday_crud
+from ..schemas.holiday import HolidayListResponse
+from ..utils.dependencies import get_current_user
+from ..models.user import User
+from ..database import get_db
+
+# 取得模組的日誌記錄器
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/holidays",
+    tags=["holidays"]
+)
+
+
+@router.get("", response_model=HolidayListResponse)
+def list_holidays(
+    year: Optional[int] = Query(None, description="Only holidays of this year"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List national and company holidays, which are not counted as leave days.
+    """
+    holidays = holiday_crud.get_holidays(db, year)
+    logger.info(f"Returned {len(holidays)} holidays for year {year} to user {current_user.id}")
+    return {"holidays": holidays}
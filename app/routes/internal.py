@@ -0,0 +1,154 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+import hmac
+import logging
+import os
+from ..config import settings
+from ..crud import leave_quota as leave_quota_crud
+from ..crud import leave_accrual as leave_accrual_crud
+from ..crud import holiday as holiday_crud
+from ..schemas.leave_quota import QuotaProvisionRequest, QuotaProvisionResponse
+from ..schemas.holiday import HolidayIn, HolidayOut
+from ..schemas.leave_accrual import AccrualRuleIn, AccrualRuleOut, AccrualMaterializeRequest, AccrualMaterializeResponse
+from ..database import engine, async_engine, get_db
+from ..utils.db_metrics import sync_pool_metrics, async_pool_metrics
+
+# 取得模組的日誌記錄器
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    include_in_schema=False
+)
+
+
+def _require_token(expected: Optional[str], given: Optional[str], detail: str):
+    # 未設定 token 時一律拒絕；以固定時間比較，避免從回應時間推測 token
+    if not expected or given is None or not hmac.compare_digest(given.encode("utf-8"), expected.encode("utf-8")):
+        raise HTTPException(status_code=403, detail=detail)
+
+
+@router.get("/metrics")
+def get_metrics(x_metrics_token: Optional[str] = Header(None)):
+    """
+    Connection pool telemetry of this worker process
+    """
+    _require_token(settings.METRICS_TOKEN, x_metrics_token, "Invalid metrics token")
+
+    pools = {"sync": sync_pool_metrics.snapshot(engine.pool)}
+    if async_engine is not None:
+        pools["async"] = async_pool_metrics.snapshot(async_engine.pool)
+
+    return {
+        "pid": os.getpid(),
+        "pool_config": {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pre_ping": settings.DB_POOL_PRE_PING,
+        },
+        "pools": pools,
+    }
+
+
+def _require_admin_token(x_admin_token: Optional[str]):
+    _require_token(settings.ADMIN_TOKEN, x_admin_token, "Invalid admin token")
+
+
+@router.post("/leave-quotas/provision", response_model=QuotaProvisionResponse)
+def provision_leave_quotas(
+    provision: QuotaProvisionRequest,
+    x_admin_token: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Create next year's leave quotas for every user from the given policy.
+    Safe to repeat: existing quotas are kept unless overwrite is set.
+    """
+    _require_admin_token(x_admin_token)
+
+    try:
+        summary = leave_quota_crud.provision_leave_quotas(db, provision)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info(f"Provisioned leave quotas: {summary}")
+    return summary
+
+
+@router.put("/leave-accrual-rules/{leave_type_id}", response_model=AccrualRuleOut)
+def set_accrual_rule(
+    leave_type_id: int,
+    rule: AccrualRuleIn,
+    x_admin_token: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Create or replace the monthly accrual rule of a leave type
+    """
+    _require_admin_token(x_admin_token)
+
+    try:
+        return leave_accrual_crud.set_accrual_rule(db, leave_type_id, rule.days_per_month, rule.waiting_months, rule.max_days)
+    except leave_accrual_crud.LeaveTypeNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/leave-accruals/materialize", response_model=AccrualMaterializeResponse)
+def materialize_accruals(
+    snapshot: AccrualMaterializeRequest,
+    x_admin_token: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Store the month-end accrual snapshot of every user (the monthly batch job)
+    """
+    _require_admin_token(x_admin_token)
+
+    rows = leave_accrual_crud.materialize_accruals(db, snapshot.year, snapshot.month)
+    logger.info(f"Materialized {rows} accruals for {snapshot.year}-{snapshot.month:02d}")
+    return {"year": snapshot.year, "month": snapshot.month, "rows": rows}
+
+
+@router.post("/holidays", response_model=HolidayOut, status_code=201)
+def create_holiday(
+    holiday: HolidayIn,
+    x_admin_token: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Add a national or company holiday; leave days requested afterwards skip it
+    """
+    _require_admin_token(x_admin_token)
+
+    try:
+        created = holiday_crud.create_holiday(db, holiday.date, holiday.name, holiday.category)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info(f"Created holiday {created.date} ({created.category})")
+    return created
+
+
+@router.delete("/holidays/{holiday_id}", status_code=204)
+def delete_holiday(
+    holiday_id: int,
+    x_admin_token: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Remove a holiday; existing leave requests keep their day counts
+    """
+    _require_admin_token(x_admin_token)
+
+    try:
+        holiday_crud.delete_holiday(db, holiday_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    logger.info(f"Deleted holiday {holiday_id}")
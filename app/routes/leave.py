@@ -1,16 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
-from sqlalchemy.orm import Session
-from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from typing import Literal, Optional
 from datetime import date
 import logging
 from ..crud import user as user_crud
 from ..crud import leave as leave_crud
 from ..crud import notification as notification_crud
 from ..schemas.user import UserOut, TeamListResponse
-from ..schemas.leave import LeaveRequestDetail, LeaveRequestOut, LeaveRequestCreate, LeaveRequestListResponse, LeaveRequestTeamListResponse, LeaveRequestApprovalResponse, LeaveRequestRejectionRequest, LeaveRequestRejectionResponse
+from ..schemas.leave import LeaveRequestDetail, LeaveRequestOut, LeaveRequestCreate, LeaveRequestListResponse, LeaveRequestTeamListResponse, LeaveRequestApprovalResponse, LeaveRequestRejectionRequest, LeaveRequestRejectionResponse, LeaveRequestBulkDecisionRequest, LeaveRequestBulkDecisionResponse
 from ..utils.dependencies import get_current_user
 from ..models.user import User
-from ..database import get_db
+from ..config import settings
+from ..database import get_session
 
 # 取得模組的日誌記錄器
 logger = logging.getLogger(__name__)
@@ -21,24 +22,32 @@ router = APIRouter(
 )
 
 @router.post("", response_model=LeaveRequestOut, status_code=status.HTTP_201_CREATED)
-def request_leave(
+async def request_leave(
     payload: LeaveRequestCreate, 
     current_user: User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    db = Depends(get_session)
 ):
     """
     Create a new leave request for current user
     """
     try: 
-        result = leave_crud.create_leave_request(db, current_user.id, payload)
-        # get manager id
-        manager_id = user_crud.get_manager_id(db, current_user.id)
+        if settings.DB_ASYNC:
+            result = await leave_crud.create_leave_request_async(db, current_user.id, payload)
+            # get manager id
+            manager_id = await db.run_sync(user_crud.get_manager_id, current_user.id)
+        else:
+            result = await run_in_threadpool(leave_crud.create_leave_request, db, current_user.id, payload)
+            # get manager id
+            manager_id = await run_in_threadpool(user_crud.get_manager_id, db, current_user.id)
         if manager_id != None:
             # then push a notification to his manager
             title = "有一筆新假單需要您的審核"
             message =  str(current_user.first_name) + str(current_user.last_name) + "的假單需要您的審核"
             leave_request_id = result.id
-            notification_crud.create_notifications(db, manager_id, title, message, leave_request_id)
+            if settings.DB_ASYNC:
+                await notification_crud.create_notifications_async(db, manager_id, title, message, leave_request_id)
+            else:
+                await run_in_threadpool(notification_crud.create_notifications, db, manager_id, title, message, leave_request_id)
             logger.info(f"Successfully send notification to manager whose use_id is: {manager_id}")
         else:
             logger.warning(f"Cannot find the manager of current user whose user_id: {current_user.id}")
@@ -49,15 +58,19 @@ def request_leave(
 
 
 @router.get("", response_model=LeaveRequestListResponse)
-def list_my_leave_requests(
+async def list_my_leave_requests(
     request: Request,
     status: Optional[str] = Query(None, description="Filter by status (pending, approved, rejected)"),
     start_date: Optional[date] = Query(None, description="Filter by start date (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="Filter by end date (YYYY-MM-DD)"),
     leave_type_id: Optional[int] = Query(None, description="Filter by leave type ID"),
+    q: Optional[str] = Query(None, description="Search reasons and rejection reasons (Chinese supported); page mode ranks by relevance"),
     page: Optional[int] = Query(1, ge=1, description="Page number"),
     per_page: Optional[int] = Query(10, ge=1, le=100, description="Items per page"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page (implies use_cursor)"),
+    use_cursor: Optional[bool] = Query(False, description="Use cursor pagination instead of page numbers"),
+    include_total: Optional[bool] = Query(False, description="In cursor mode, return an exact total instead of an estimate"),
+    db = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -128,16 +141,22 @@ def list_my_leave_requests(
         logger.debug(f"Final parameters: status={actual_status}, start_date={actual_start_date}, end_date={actual_end_date}, leave_type_id={actual_leave_type_id}, page={actual_page}, per_page={actual_per_page}")
         
         # 使用安全的參數呼叫 CRUD 方法
-        result = leave_crud.get_leave_requests_for_user(
-            db=db,
-            user_id=current_user.id,
+        filters = dict(
             status=actual_status,
             start_date=actual_start_date,
             end_date=actual_end_date,
             leave_type_id=actual_leave_type_id,
+            q=q,
             page=actual_page,
             per_page=actual_per_page,
+            cursor=cursor,
+            use_cursor=bool(use_cursor),
+            include_total=bool(include_total)
         )
+        if settings.DB_ASYNC:
+            result = await leave_crud.get_leave_requests_for_user_async(db, current_user.id, **filters)
+        else:
+            result = await run_in_threadpool(leave_crud.get_leave_requests_for_user, db, current_user.id, **filters)
         
         logger.debug(f"Found {result['total']} leave requests for user {current_user.id}")
         
@@ -173,7 +192,9 @@ def list_my_leave_requests(
             "total": result["total"],
             "page": result["page"],
             "per_page": result["per_page"],
-            "total_pages": result["total_pages"]
+            "total_pages": result["total_pages"],
+            "next_cursor": result["next_cursor"],
+            "total_is_estimate": result["total_is_estimate"]
         }
     }
     
@@ -181,7 +202,7 @@ def list_my_leave_requests(
     return response
 
 @router.get("/team", response_model=LeaveRequestTeamListResponse)
-def list_team_leave_requests(
+async def list_team_leave_requests(
     request: Request,
     user_id: Optional[int] = Query(None, description="Target user ID (deprecated, use employee_id instead)"),
     employee_id: Optional[int] = Query(None, description="Target employee ID"),
@@ -189,9 +210,14 @@ def list_team_leave_requests(
     start_date: Optional[date] = Query(None, description="Filter by start date (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="Filter by end date (YYYY-MM-DD)"),
     leave_type_id: Optional[int] = Query(None, description="Filter by leave type ID"),
+    q: Optional[str] = Query(None, description="Search reasons and rejection reasons (Chinese supported); page mode ranks by relevance"),
     page: Optional[int] = Query(1, ge=1, description="Page number"),
     per_page: Optional[int] = Query(10, ge=1, le=100, description="Items per page"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page (implies use_cursor)"),
+    use_cursor: Optional[bool] = Query(False, description="Use cursor pagination instead of page numbers"),
+    include_total: Optional[bool] = Query(False, description="In cursor mode, return an exact total instead of an estimate"),
+    scope: Literal["team", "org"] = Query("team", description="team: direct reports, org: everyone below you"),
+    db = Depends(get_session),
     current_user: User = Depends(get_current_user)    
 ): 
     """
@@ -284,17 +310,24 @@ def list_team_leave_requests(
 
         logger.debug(f"Final parameters: user_id={actual_user_id}, status={actual_status}, start_date={actual_start_date}, end_date={actual_end_date}, leave_type_id={actual_leave_type_id}, page={actual_page}, per_page={actual_per_page}")
             
-        result = leave_crud.get_team_leave_requests(
-            db=db,
-            manager_id=current_user.id,
+        filters = dict(
             user_id=actual_user_id,
             status=actual_status,
             start_date=actual_start_date,
             end_date=actual_end_date,
             leave_type_id=actual_leave_type_id,
+            q=q,
             page=actual_page,
-            per_page=actual_per_page
+            per_page=actual_per_page,
+            cursor=cursor,
+            use_cursor=bool(use_cursor),
+            include_total=bool(include_total),
+            scope=scope
         )
+        if settings.DB_ASYNC:
+            result = await leave_crud.get_team_leave_requests_async(db, current_user.id, **filters)
+        else:
+            result = await run_in_threadpool(leave_crud.get_team_leave_requests, db, current_user.id, **filters)
         
         logger.debug(f"Found {result['total']} team leave requests for manager {current_user.id}")
         
@@ -341,7 +374,9 @@ def list_team_leave_requests(
             "total": result["total"],
             "page": result["page"],
             "per_page": result["per_page"],
-            "total_pages": result["total_pages"]
+            "total_pages": result["total_pages"],
+            "next_cursor": result["next_cursor"],
+            "total_is_estimate": result["total_is_estimate"]
         }
     }
     
@@ -350,13 +385,14 @@ def list_team_leave_requests(
 
 
 @router.get("/pending", response_model=LeaveRequestTeamListResponse)
-def list_pending_leave_requests(
+async def list_pending_leave_requests(
     user_id: Optional[int] = Query(None, description="Target user ID (deprecated, use employee_id instead)"),
     employee_id: Optional[int] = Query(None, description="Target employee ID"),
     leave_type_id: Optional[int] = Query(None, description="Filter by leave type ID"),
     page: Optional[int] = Query(1, ge = 1),
     per_page: Optional[int] = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    scope: Literal["team", "org"] = Query("team", description="team: direct reports, org: everyone below you"),
+    db = Depends(get_session),
     current_user:  User = Depends(get_current_user)    
 ): 
     """
@@ -369,15 +405,18 @@ def list_pending_leave_requests(
         # Prioritize employee_id over user_id if both are provided
         target_id = employee_id if employee_id is not None else user_id
         
-        result = leave_crud.get_team_leave_requests(
-            db=db,
-            manager_id=current_user.id,
+        filters = dict(
             user_id=target_id,
             status="pending",
             leave_type_id=leave_type_id,
             page=page,
-            per_page=per_page
+            per_page=per_page,
+            scope=scope
         )
+        if settings.DB_ASYNC:
+            result = await leave_crud.get_team_leave_requests_async(db, current_user.id, **filters)
+        else:
+            result = await run_in_threadpool(leave_crud.get_team_leave_requests, db, current_user.id, **filters)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except PermissionError as e:
@@ -393,11 +432,41 @@ def list_pending_leave_requests(
         }
     }
 
+@router.post("/bulk-decision", response_model=LeaveRequestBulkDecisionResponse)
+async def bulk_decide_leave_requests(
+    payload: LeaveRequestBulkDecisionRequest,
+    request: Request,
+    db = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Approve or reject many leave requests of team members in one transaction.
+    Each request gets its own result; failures do not roll back the others.
+    Requests locked by a concurrent approver are marked retryable.
+    """
+    client_ip = request.client.host
+    logger.info(f"Manager {current_user.email} (ID: {current_user.id}) attempting to {payload.action} {len(payload.ids)} leave requests from {client_ip}")
+
+    try:
+        args = (payload.ids, current_user.id, payload.action, payload.rejection_reason)
+        if settings.DB_ASYNC:
+            result = await leave_crud.bulk_decide_leave_requests_async(db, *args)
+        else:
+            result = await run_in_threadpool(leave_crud.bulk_decide_leave_requests, db, *args)
+        logger.info(f"Bulk {payload.action} by manager {current_user.email}: {result.succeeded} succeeded, {result.failed} failed")
+        return result
+    except ValueError as e:
+        logger.error(f"ValueError in bulk leave decision: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except PermissionError as e:
+        logger.error(f"PermissionError in bulk leave decision: {str(e)}")
+        raise HTTPException(status_code=403, detail=str(e))
+
 @router.get("/{leave_request_id}", response_model=LeaveRequestDetail)
-def get_leave_request_details(
+async def get_leave_request_details(
     leave_request_id: int,
     request: Request,
-    db: Session = Depends(get_db),
+    db = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -407,7 +476,10 @@ def get_leave_request_details(
     logger.info(f"User {current_user.email} (ID: {current_user.id}) requesting leave details for ID {leave_request_id} from {client_ip}")
     
     try:
-        result = leave_crud.get_leave_request_by_id(db, leave_request_id)
+        if settings.DB_ASYNC:
+            result = await leave_crud.get_leave_request_by_id_async(db, leave_request_id)
+        else:
+            result = await run_in_threadpool(leave_crud.get_leave_request_by_id, db, leave_request_id)
         logger.info(f"Successfully returned leave details for ID {leave_request_id}")
         return result
     except HTTPException as e:
@@ -418,9 +490,9 @@ def get_leave_request_details(
         raise HTTPException(status_code=500, detail="An unexpected error occurred")
 
 @router.patch("/{leave_request_id}/approve", response_model=LeaveRequestApprovalResponse)
-def approve_leave_request(
+async def approve_leave_request(
     leave_request_id: int,
-    db: Session = Depends(get_db),
+    db = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -428,42 +500,27 @@ def approve_leave_request(
     """
     
     try:
-        result = leave_crud.approve_leave_request(db, leave_request_id, current_user.id)
-
-        # push a notification to the user of leave request
-        applicant_id = leave_crud.get_user_id_from_leave_request_by_id(db, leave_request_id)[0]
-        l_id = leave_crud.get_request_id_from_leave_request_by_id(db, leave_request_id)[0]
-        title = "您的假單已被主管批准!"
-        message = "您的假單(id: " + str(l_id) + ")已被批准!" 
-        leave_request_id = leave_request_id 
-        notification_crud.create_notifications(db, applicant_id, title, message, leave_request_id)
-        logger.info(f"Successfully send notification to applicant whose use_id is: {applicant_id}")
-
-        # push a notification to proxy user of the leave request
-        # proxy_user_id = leave_crud.get_proxy_id_from_leave_request_by_id(db, leave_request_id)[0]
-        detail = leave_crud.get_detail_from_leave_request_by_id(db, leave_request_id)
-        proxy_user_id = detail[0]
-        start_date = detail[1]
-        end_date = detail[2]
-        (applicant_first_name, applicant_last_name) = user_crud.get_user_name_by_id(db, applicant_id)
-
-        title = "您已被指派為假單的職務代理人"
-        message = "您已被指派於" + str(start_date) + "至" + str(end_date) + "擔任" + str(applicant_first_name) + str(applicant_last_name) + "的職務代理人。"
-        notification_crud.create_notifications(db, proxy_user_id, title, message, leave_request_id)
-        logger.info(f"Successfully send notification to proxy user whose use_id is: {proxy_user_id}")
+        # 狀態、假別用量與通知在同一個交易中寫入
+        if settings.DB_ASYNC:
+            result = await leave_crud.approve_leave_request_async(db, leave_request_id, current_user.id)
+        else:
+            result = await run_in_threadpool(leave_crud.approve_leave_request, db, leave_request_id, current_user.id)
+        logger.info(f"Successfully approved leave request {leave_request_id} and notified applicant and proxy user")
 
         return result
+    except leave_crud.LeaveRequestLockedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except PermissionError as e:
         raise HTTPException(status_code=403, detail=str(e))
 
 @router.patch("/{leave_request_id}/reject", response_model=LeaveRequestRejectionResponse)
-def reject_leave_request(
+async def reject_leave_request(
     leave_request_id: int,
     rejection_data: LeaveRequestRejectionRequest,
     request: Request,
-    db: Session = Depends(get_db),
+    db = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -473,24 +530,17 @@ def reject_leave_request(
     logger.info(f"Manager {current_user.email} (ID: {current_user.id}) attempting to reject leave request {leave_request_id} from {client_ip}")
     
     try:
-        result = leave_crud.reject_leave_request(
-            db, 
-            leave_request_id, 
-            current_user.id,
-            rejection_data.rejection_reason
-        )
+        args = (leave_request_id, current_user.id, rejection_data.rejection_reason)
+        if settings.DB_ASYNC:
+            result = await leave_crud.reject_leave_request_async(db, *args)
+        else:
+            result = await run_in_threadpool(leave_crud.reject_leave_request, db, *args)
         logger.info(f"Successfully rejected leave request {leave_request_id} by manager {current_user.email}")
 
-        # push a notification to the user of leave request
-        applicant_id = leave_crud.get_user_id_from_leave_request_by_id(db, leave_request_id)[0]
-        l_id = leave_crud.get_request_id_from_leave_request_by_id(db, leave_request_id)[0]
-        title = "您的假單已被否決"
-        message = "您的假單(id: " + str(l_id) + ")已被否決" 
-        leave_request_id = leave_request_id 
-        notification_crud.create_notifications(db, applicant_id, title, message, leave_request_id)
-        logger.info(f"Successfully send notification to applicant whose use_id is: {applicant_id}")
-
         return result
+    except leave_crud.LeaveRequestLockedError as e:
+        logger.warning(f"Leave request {leave_request_id} is locked by another approver")
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         logger.error(f"ValueError in leave request rejection: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
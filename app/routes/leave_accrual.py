@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import Optional
+import logging
+from ..crud import leave_accrual as leave_accrual_crud
+from ..crud.leave import get_team_target_ids
+from ..schemas.leave_accrual import LeaveAccrualResponse, AccrualRuleListResponse
+from ..utils.dependencies import get_current_user
+from ..models.user import User
+from ..database import get_db
+
+# 取得模組的日誌記錄器
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/leave-accruals",
+    tags=["leave accruals"]
+)
+
+
+@router.get("", response_model=LeaveAccrualResponse)
+def get_leave_accruals(
+    as_of: Optional[date] = Query(None, description="Accruals credited by this date (YYYY-MM-DD), default today"),
+    user_id: Optional[int] = Query(None, description="A team member (managers only)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Days accrued so far this year by each monthly-accrual leave type, credited at month end.
+    """
+    as_of = as_of or date.today()
+    target_id = current_user.id
+    if user_id is not None and user_id != current_user.id:
+        try:
+            get_team_target_ids(db, current_user.id, user_id)
+        except PermissionError as e:
+            raise HTTPException(status_code=403, detail=str(e))
+        target_id = user_id
+
+    accruals = leave_accrual_crud.get_accruals(db, target_id, as_of)
+    logger.info(f"Returned {len(accruals)} accruals of user {target_id} as of {as_of} to user {current_user.id}")
+    return {
+        "user_id": target_id,
+        "as_of": as_of,
+        "year": as_of.year,
+        "month": leave_accrual_crud.completed_months(as_of),
+        "accruals": accruals
+    }
+
+
+@router.get("/rules", response_model=AccrualRuleListResponse)
+def list_accrual_rules(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    List the monthly accrual rules per leave type
+    """
+    return {"rules": leave_accrual_crud.get_accrual_rules(db)}
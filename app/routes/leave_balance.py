@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi.concurrency import run_in_threadpool
+from app.config import settings
+from app.database import get_session
 from ..schemas.leave_balance import LeaveBalanceResponse
-from ..crud.leave_balance import get_leave_balances
+from ..crud.leave_balance import get_leave_balances, get_leave_balances_async
 from ..utils.dependencies import get_current_user
 from ..models.user import User
 
@@ -13,13 +14,17 @@ router = APIRouter(
 
 
 @router.get("", response_model=LeaveBalanceResponse)
-def read_my_leave_balance(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return get_leave_balances(db, current_user.id)
+async def read_my_leave_balance(db = Depends(get_session), current_user: User = Depends(get_current_user)):
+    if settings.DB_ASYNC:
+        return await get_leave_balances_async(db, current_user.id)
+    return await run_in_threadpool(get_leave_balances, db, current_user.id)
 
 
 @router.get("/{user_id}", response_model=LeaveBalanceResponse)
-def read_user_leave_balance(user_id: int, db: Session = Depends(get_db)):
+async def read_user_leave_balance(user_id: int, db = Depends(get_session)):
     try:
-        return get_leave_balances(db, user_id)
+        if settings.DB_ASYNC:
+            return await get_leave_balances_async(db, user_id)
+        return await run_in_threadpool(get_leave_balances, db, user_id)
     except ValueError:
         raise HTTPException(status_code=404, detail="User not found")
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
 import logging
 from ..crud import notification as notification_crud
 from ..schemas.notification import NotificationListResponse, NotificationReadResponse, NotificationReadAllResponse
 from ..utils.dependencies import get_current_user
 from ..models.user import User
-from ..database import get_db
+from ..config import settings
+from ..database import get_session
 
 # Get logger
 logger = logging.getLogger(__name__)
@@ -18,12 +19,12 @@ router = APIRouter(
 
 
 @router.get("", response_model=NotificationListResponse)
-def get_notifications(
+async def get_notifications(
     unread_only: Optional[bool] = Query(False, description="If true, only return unread notifications"),
     page: Optional[int] = Query(1, ge=1, description="Page number"),
     per_page: Optional[int] = Query(10, ge=1, le=100, description="Items per page"),
     request: Request = None,
-    db: Session = Depends(get_db),
+    db = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -38,13 +39,14 @@ def get_notifications(
         actual_per_page = min(max(1, per_page), 100) if per_page is not None else 10
         
         # Get notifications
-        result = notification_crud.get_user_notifications(
-            db=db,
-            user_id=current_user.id,
-            unread_only=unread_only,
-            page=actual_page,
-            per_page=actual_per_page
-        )
+        if settings.DB_ASYNC:
+            result = await notification_crud.get_user_notifications_async(
+                db, current_user.id, unread_only, actual_page, actual_per_page
+            )
+        else:
+            result = await run_in_threadpool(
+                notification_crud.get_user_notifications, db, current_user.id, unread_only, actual_page, actual_per_page
+            )
         
         logger.info(f"Successfully returned {len(result['notifications'])} notifications for user {current_user.email}")
         return result
@@ -55,10 +57,10 @@ def get_notifications(
 
 
 @router.patch("/{notification_id}/read", response_model=NotificationReadResponse)
-def mark_notification_as_read(
+async def mark_notification_as_read(
     notification_id: int,
     request: Request = None,
-    db: Session = Depends(get_db),
+    db = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -68,11 +70,12 @@ def mark_notification_as_read(
     logger.info(f"User {current_user.email} (ID: {current_user.id}) marking notification {notification_id} as read from {client_ip}")
     
     try:
-        result = notification_crud.mark_notification_as_read(
-            db=db,
-            notification_id=notification_id,
-            user_id=current_user.id
-        )
+        if settings.DB_ASYNC:
+            result = await notification_crud.mark_notification_as_read_async(db, notification_id, current_user.id)
+        else:
+            result = await run_in_threadpool(
+                notification_crud.mark_notification_as_read, db, notification_id, current_user.id
+            )
         logger.info(f"Successfully marked notification {notification_id} as read")
         return result
     except HTTPException as e:
@@ -84,9 +87,9 @@ def mark_notification_as_read(
 
 
 @router.patch("/read-all", response_model=NotificationReadAllResponse)
-def mark_all_notifications_as_read(
+async def mark_all_notifications_as_read(
     request: Request = None,
-    db: Session = Depends(get_db),
+    db = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -96,10 +99,10 @@ def mark_all_notifications_as_read(
     logger.info(f"User {current_user.email} (ID: {current_user.id}) marking all notifications as read from {client_ip}")
     
     try:
-        result = notification_crud.mark_all_notifications_as_read(
-            db=db,
-            user_id=current_user.id
-        )
+        if settings.DB_ASYNC:
+            result = await notification_crud.mark_all_notifications_as_read_async(db, current_user.id)
+        else:
+            result = await run_in_threadpool(notification_crud.mark_all_notifications_as_read, db, current_user.id)
         logger.info(f"Successfully marked {result.count} notifications as read")
         return result
     except Exception as e:
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from datetime import date
+from typing import Literal, Optional
+import logging
+from ..crud import report as report_crud
+from ..utils.dependencies import get_current_user
+from ..models.user import User
+from ..database import get_db
+
+# 取得模組的日誌記錄器
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/api/reports",
+    tags=["reports"]
+)
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+
+@router.get("/leave-requests/export")
+def export_team_leave_requests(
+    request: Request,
+    format: Literal["csv", "ndjson"] = Query("csv", description="csv or ndjson"),
+    user_id: Optional[int] = Query(None, description="Only this team member"),
+    status: Optional[str] = Query(None, description="Filter by status (pending, approved, rejected)"),
+    start_date: Optional[date] = Query(None, description="Filter by start date (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Filter by end date (YYYY-MM-DD)"),
+    leave_type_id: Optional[int] = Query(None, description="Filter by leave type ID"),
+    q: Optional[str] = Query(None, description="Search reasons and rejection reasons"),
+    scope: Literal["team", "org"] = Query("team", description="team: direct reports, org: everyone below you"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream every leave request of the manager's team as CSV or NDJSON, gzip-compressed
+    when the client accepts it. Same filters as GET /api/leave-requests/team.
+    """
+    client_ip = request.client.host
+    logger.info(f"User {current_user.email} (ID: {current_user.id}) exporting team leave requests as {format} from {client_ip}")
+
+    if not current_user.is_manager:
+        raise HTTPException(status_code=403, detail="Only managers can export leave requests")
+
+    try:
+        query = report_crud.build_team_export_query(
+            db, current_user.id, format, user_id=user_id, status=status, start_date=start_date,
+            end_date=end_date, leave_type_id=leave_type_id, q=q, scope=scope
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+
+    chunks = report_crud.iter_export(query, format)
+    headers = {"Content-Disposition": f'attachment; filename="leave-requests-{date.today():%Y%m%d}.{format}"'}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        chunks = report_crud.gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[format], headers=headers)
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
+from datetime import date
 from ..crud import user as user_crud
-from ..schemas.user import UserOut, TeamListResponse
+from ..crud import availability as availability_crud
+from ..schemas.user import UserOut, TeamListResponse, ProxyCandidateListResponse
 from ..utils.dependencies import get_current_user
 from ..models.user import User
 from ..database import get_db
@@ -134,6 +136,29 @@ def get_subordinates(request: Request, current_user: User = Depends(get_current_
     
     return {"team_members": team_members}
 
+@router.get("/proxy-candidates", response_model=ProxyCandidateListResponse)
+def get_proxy_candidates(
+    request: Request,
+    start: date = Query(..., description="First day of the leave (YYYY-MM-DD)"),
+    end: date = Query(..., description="Last day of the leave (YYYY-MM-DD)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Teammates free for the whole interval, ranked by how little leave they take around it
+    """
+    client_ip = request.client.host
+    logger.info(f"User {current_user.email} (ID: {current_user.id}) requesting proxy candidates {start} ~ {end} from {client_ip}")
+
+    try:
+        candidates = availability_crud.get_proxy_candidates(db, current_user.id, current_user.is_manager, start, end)
+    except ValueError as e:
+        logger.warning(f"Invalid proxy candidate query: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info(f"Successfully returned {len(candidates)} proxy candidates for user {current_user.email}")
+    return {"start": start, "end": end, "candidates": candidates}
+
 @router.get("/{user_id}", response_model=UserOut)
 def get_user_by_id(user_id: int, request: Request, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     client_ip = request.client.host
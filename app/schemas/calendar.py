@@ -20,4 +20,6 @@ class DayInfo(BaseModel):
 class TeamCalendarResponse(BaseModel):
     year: int
     month: int
+    # 從 year-month 起算涵蓋的月數 (季檢視為 3)
+    months: int = 1
     days: List[DayInfo]
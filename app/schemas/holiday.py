@@ -0,0 +1,22 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal
+from datetime import date
+
+
+class HolidayIn(BaseModel):
+    date: date
+    name: str = Field(..., min_length=1, max_length=100)
+    category: Literal["national", "company"] = "national"
+
+
+class HolidayOut(BaseModel):
+    id: int
+    date: date
+    name: str
+    category: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class HolidayListResponse(BaseModel):
+    holidays: List[HolidayOut]
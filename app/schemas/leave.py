@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional, Literal
 from datetime import date, datetime
 
 
@@ -30,7 +30,7 @@ class LeaveRequestDetail(BaseModel):
     leave_type: LeaveTypeBase
     start_date: date
     end_date: date
-    days_count: int
+    days_count: float
     reason: str
     status: str
     proxy_person: Optional[UserBase] = None
@@ -45,6 +45,9 @@ class LeaveRequestCreate(BaseModel):
     end_date: date
     reason: str
     proxy_user_id: int
+    # 首日 / 末日只請半天
+    start_half_day: bool = False
+    end_half_day: bool = False
 
 
 class LeaveTypeBasic(BaseModel):
@@ -99,6 +102,8 @@ class PaginationMeta(BaseModel):
     page: int
     per_page: int
     total_pages: int
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
 
 
 class LeaveRequestListResponse(BaseModel):
@@ -133,4 +138,30 @@ class LeaveRequestRejectionResponse(BaseModel):
     approved_at: datetime
     rejection_reason: str
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+# 一次批次審核的上限
+MAX_BULK_DECISION = 500
+
+class LeaveRequestBulkDecisionRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_DECISION)
+    action: Literal["approve", "reject"]
+    rejection_reason: Optional[str] = None
+
+class LeaveRequestBulkDecisionItem(BaseModel):
+    id: int
+    request_id: Optional[str] = None
+    success: bool
+    status: Optional[str] = None
+    error: Optional[str] = None
+    # 被其他審核鎖住的假單 (等同單筆審核的 409)，稍後可重送
+    retryable: bool = False
+
+class LeaveRequestBulkDecisionResponse(BaseModel):
+    action: str
+    approver: ProxyUserOut
+    approved_at: datetime
+    succeeded: int
+    failed: int
+    results: List[LeaveRequestBulkDecisionItem]
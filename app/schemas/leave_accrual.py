@@ -0,0 +1,43 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
+from datetime import date
+
+
+class AccrualRuleIn(BaseModel):
+    days_per_month: float = Field(..., gt=0, le=31)
+    waiting_months: int = Field(0, ge=0)
+    max_days: Optional[float] = Field(None, ge=0)
+
+
+class AccrualRuleOut(AccrualRuleIn):
+    leave_type_id: int
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AccrualRuleListResponse(BaseModel):
+    rules: List[AccrualRuleOut]
+
+
+class LeaveAccrualItem(BaseModel):
+    leave_type_id: int
+    leave_type_name: str
+    accrued_days: float
+
+
+class LeaveAccrualResponse(BaseModel):
+    user_id: int
+    as_of: date
+    year: int
+    month: int
+    accruals: List[LeaveAccrualItem]
+
+
+class AccrualMaterializeRequest(BaseModel):
+    year: int = Field(..., ge=2000, le=9999)
+    month: int = Field(..., ge=1, le=12)
+
+
+class AccrualMaterializeResponse(BaseModel):
+    year: int
+    month: int
+    rows: int
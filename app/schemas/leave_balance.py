@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict
-from typing import List
+from typing import List, Optional
 from datetime import date
 
 
@@ -25,6 +25,8 @@ class LeaveBalanceItem(BaseModel):
     quota: int
     used_days: float
     remaining_days: float
+    # 按月累積的假別：截至上個月底 (月結快照) 已累積的天數
+    accrued_days: Optional[float] = None
     leave_requests: List[LeaveRequestSummary]
     model_config = ConfigDict(from_attributes=True)
 
@@ -0,0 +1,30 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class SeniorityStep(BaseModel):
+    years: int = Field(..., ge=0, description="Full years of service on January 1st")
+    days: int = Field(..., ge=0, description="Entitlement from this seniority on")
+
+
+class LeaveTypeQuotaPolicy(BaseModel):
+    leave_type_id: int
+    base_days: int = Field(..., ge=0)
+    seniority_steps: List[SeniorityStep] = []
+    carry_over_max: int = Field(0, ge=0, description="Unused days of the previous year carried over, at most")
+    max_days: Optional[int] = Field(None, ge=0, description="Cap on entitlement plus carry-over")
+
+
+class QuotaProvisionRequest(BaseModel):
+    year: int = Field(..., ge=2000, le=9999)
+    leave_types: List[LeaveTypeQuotaPolicy] = Field(..., min_length=1)
+    overwrite: bool = Field(False, description="Replace existing quotas of that year instead of keeping them")
+
+
+class QuotaProvisionResponse(BaseModel):
+    year: int
+    users: int
+    leave_types: int
+    inserted: int
+    updated: int
+    unchanged: int
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from datetime import date
 from typing import List, Optional
 
 class UserLogin(BaseModel):
@@ -58,4 +59,15 @@ class TeamMemberOut(BaseModel):
 
 class TeamListResponse(BaseModel):
     team_members: List[TeamMemberOut]
-  
\ No newline at end of file
+  
+class ProxyCandidateOut(BaseModel):
+    id: int
+    first_name: str
+    last_name: str
+    position: str
+    absent_days_nearby: int
+
+class ProxyCandidateListResponse(BaseModel):
+    start: date
+    end: date
+    candidates: List[ProxyCandidateOut]
@@ -0,0 +1,35 @@
+from fastapi.testclient import TestClient
+from passlib.hash import bcrypt
+from app.main import app
+from app.config import settings
+from app.database import SessionLocal
+from app.models.user import User
+
+client = TestClient(app)
+
+def test_login_with_wrong_password():
+    response = client.post("/api/auth/login", json={"username": "carolyn50@example.com", "password": "wrong"})
+    assert response.status_code == 401
+    response = client.post("/api/auth/login", json={"username": "nobody@example.com", "password": "test"})
+    assert response.status_code == 401
+
+def test_login_rehashes_password_with_configured_cost():
+    db = SessionLocal()
+    try:
+        user = db.get(User, 17)
+        original_hash = user.password_hash
+        # 以不同成本的雜湊模擬成本調整前建立的帳號
+        outdated_rounds = 4 if settings.BCRYPT_ROUNDS != 4 else 5
+        user.password_hash = bcrypt.using(rounds=outdated_rounds).hash("test")
+        db.commit()
+        try:
+            response = client.post("/api/auth/login", json={"username": "carolyn50@example.com", "password": "test"})
+            assert response.status_code == 200
+            db.refresh(user)
+            assert bcrypt.from_string(user.password_hash).rounds == settings.BCRYPT_ROUNDS
+            assert bcrypt.verify("test", user.password_hash)
+        finally:
+            user.password_hash = original_hash
+            db.commit()
+    finally:
+        db.close()
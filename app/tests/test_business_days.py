@@ -0,0 +1,136 @@
+from datetime import date, timedelta
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+from app.database import SessionLocal
+from app.crud.holiday import create_holiday, delete_holiday, get_business_day_calendar
+from app.models.leave_quota import LeaveQuota
+from app.models.leave_request import LeaveRequest
+from app.models.leave_usage import LeaveUsage
+from app.models.notification import Notification
+from app.utils.business_days import BusinessDayCache, BusinessDayCalendar
+
+client = TestClient(app)
+
+def login_as(username: str, password: str):
+    response = client.post("/api/auth/login", json={"username": username, "password": password})
+    assert response.status_code == 200
+    # 取得 cookie
+    cookies = response.cookies
+    return cookies
+
+def count_by_walking(holidays, start: date, end: date) -> int:
+    days, current = 0, start
+    while current <= end:
+        if current.weekday() < 5 and current not in holidays:
+            days += 1
+        current += timedelta(days=1)
+    return days
+
+def test_business_day_count_matches_day_by_day_walk():
+    holidays = {date(2024, 2, 29), date(2024, 12, 31), date(2025, 1, 1), date(2026, 2, 16)}
+    calendar = BusinessDayCalendar(holidays)
+    start = date(2024, 1, 1)
+    for offset in range(0, 900, 7):
+        for length in (0, 1, 4, 30, 400):
+            first = start + timedelta(days=offset)
+            last = first + timedelta(days=length)
+            assert calendar.count(first, last) == count_by_walking(holidays, first, last)
+    assert calendar.count(date(2024, 3, 2), date(2024, 3, 1)) == 0
+
+def test_business_day_cache_can_be_reentered_while_loading():
+    cache = BusinessDayCache(ttl=60)
+    nested = []
+    def load_holidays():
+        if not nested:
+            nested.append(cache.get(lambda: [date(2024, 1, 2)]))
+        return [date(2024, 1, 1)]
+    calendar = cache.get(load_holidays)
+    assert calendar.holidays == {date(2024, 1, 1)}
+    assert nested[0].holidays == {date(2024, 1, 2)}
+
+def test_half_days():
+    calendar = BusinessDayCalendar({date(2025, 1, 1)})
+    # 2025-01-06 (Mon) ~ 2025-01-10 (Fri)
+    assert calendar.leave_days(date(2025, 1, 6), date(2025, 1, 10)) == 5
+    assert calendar.leave_days(date(2025, 1, 6), date(2025, 1, 10), start_half_day=True) == 4.5
+    assert calendar.leave_days(date(2025, 1, 6), date(2025, 1, 10), True, True) == 4
+    assert calendar.leave_days(date(2025, 1, 6), date(2025, 1, 6), end_half_day=True) == 0.5
+    # half days on a holiday or weekend do not subtract anything
+    assert calendar.leave_days(date(2025, 1, 1), date(2025, 1, 3), start_half_day=True) == 2
+    assert calendar.leave_days(date(2025, 1, 4), date(2025, 1, 4), start_half_day=True) == 0
+
+def test_leave_request_excludes_holidays_and_counts_half_days():
+    # 測試專用的年度與額度，結束時連同假單、通知與帳本列一起刪除
+    year = 2094
+    monday = date(year, 9, 1) + timedelta(days=-date(year, 9, 1).weekday() % 7)
+    db = SessionLocal()
+    quota = LeaveQuota(user_id=17, leave_type_id=5, year=year, quota=10)
+    db.add(quota)
+    db.commit()
+    holiday = create_holiday(db, monday + timedelta(days=2), "Test holiday", "company")
+    try:
+        # the cache is dropped when the holiday is committed
+        assert not get_business_day_calendar(db).is_business_day(holiday.date)
+
+        # login as subordinate (user id: 17)
+        cookie = login_as("carolyn50@example.com", "test")
+        response = client.post("/api/leave-requests", json={
+            "leave_type_id": 5,
+            "start_date": monday.isoformat(),
+            "end_date": (monday + timedelta(days=4)).isoformat(),
+            "reason": "Holiday test",
+            "proxy_user_id": 21,
+            "start_half_day": True
+        }, cookies=cookie)
+        assert response.status_code == 201
+        # 5 weekdays - 1 holiday - half of Monday
+        assert response.json()["days_count"] == 3.5
+
+        response = client.get(f"/api/holidays?year={year}", cookies=cookie)
+        assert response.status_code == 200
+        assert {"date": holiday.date.isoformat(), "name": "Test holiday", "category": "company"}.items() <= response.json()["holidays"][0].items()
+    finally:
+        holiday_date = holiday.date
+        delete_holiday(db, holiday.id)
+        assert get_business_day_calendar(db).is_business_day(holiday_date)
+        ids = [leave_request_id for (leave_request_id,) in db.query(LeaveRequest.id).filter(
+            LeaveRequest.user_id == 17, LeaveRequest.start_date == monday
+        )]
+        db.query(Notification).filter(
+            Notification.related_to == "leave_request",
+            Notification.related_id.in_(ids)
+        ).delete(synchronize_session=False)
+        db.query(LeaveRequest).filter(LeaveRequest.id.in_(ids)).delete(synchronize_session=False)
+        db.query(LeaveUsage).filter_by(user_id=17, leave_type_id=5, year=year).delete()
+        db.delete(quota)
+        db.commit()
+        db.close()
+
+def test_holidays_are_managed_through_the_admin_endpoints(monkeypatch):
+    day = date(2095, 3, 1)
+    body = {"date": day.isoformat(), "name": "Admin test holiday", "category": "company"}
+    db = SessionLocal()
+    try:
+        assert get_business_day_calendar(db).is_business_day(day)
+
+        response = client.post("/internal/holidays", json=body)
+        assert response.status_code == 403
+
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "admin-token")
+        headers = {"X-Admin-Token": "admin-token"}
+        response = client.post("/internal/holidays", json=body, headers=headers)
+        assert response.status_code == 201
+        holiday_id = response.json()["id"]
+        try:
+            # 新增後本行程的行事曆快取立即失效
+            assert not get_business_day_calendar(db).is_business_day(day)
+            assert client.post("/internal/holidays", json=body, headers=headers).status_code == 400
+            assert client.post("/internal/holidays", json={**body, "category": "other"}, headers=headers).status_code == 422
+        finally:
+            response = client.delete(f"/internal/holidays/{holiday_id}", headers=headers)
+        assert response.status_code == 204
+        assert get_business_day_calendar(db).is_business_day(day)
+        assert client.delete(f"/internal/holidays/{holiday_id}", headers=headers).status_code == 404
+    finally:
+        db.close()
@@ -0,0 +1,110 @@
+from datetime import date
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import SessionLocal
+from app.models.leave_request import LeaveRequest
+from app.models.user import User
+
+client = TestClient(app)
+
+def login_as(username: str, password: str):
+    response = client.post("/api/auth/login", json={"username": username, "password": password})
+    assert response.status_code == 200
+    # 取得 cookie
+    cookies = response.cookies
+    return cookies
+
+def members_by_date(data):
+    return {day["date"]: [member["id"] for member in day["members_on_leave"]] for day in data["days"]}
+
+def test_team_calendar_spans_month_end_and_quarter():
+    # 一筆跨月 (1/30 ~ 2/2) 的已核准假單
+    db = SessionLocal()
+    leave_request = LeaveRequest(
+        request_id="CALTEST000001", user_id=21, leave_type_id=1, proxy_user_id=17,
+        start_date=date(2030, 1, 30), end_date=date(2030, 2, 2), days_count=4,
+        reason="calendar test", status="approved", approver_id=19
+    )
+    db.add(leave_request)
+    db.commit()
+    try:
+        # login as manager (user id: 19)
+        cookie = login_as("jessicavalentine@example.org", "test")
+
+        response = client.get("/api/calendar/team?year=2030&month=1", cookies=cookie)
+        assert response.status_code == 200
+        assert members_by_date(response.json()) == {"2030-01-30": [21], "2030-01-31": [21]}
+
+        # 只從 2 月開始的視窗也要包含 1 月開始的假單
+        response = client.get("/api/calendar/team?year=2030&month=2", cookies=cookie)
+        assert response.status_code == 200
+        assert members_by_date(response.json()) == {"2030-02-01": [21], "2030-02-02": [21]}
+
+        # login as subordinate (user id: 17) and view the whole quarter
+        cookie = login_as("carolyn50@example.com", "test")
+        response = client.get("/api/calendar/team?year=2030&quarter=1", cookies=cookie)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["month"] == 1
+        assert data["months"] == 3
+        assert list(members_by_date(data)) == ["2030-01-30", "2030-01-31", "2030-02-01", "2030-02-02"]
+        assert data["days"][0]["members_on_leave"][0]["first_name"] == "Virginia"
+
+        response = client.get("/api/calendar/team?year=2030", cookies=cookie)
+        assert response.status_code == 400
+    finally:
+        db.delete(leave_request)
+        db.commit()
+        db.close()
+
+def test_availability_lists_absent_users_per_day():
+    db = SessionLocal()
+    department_id = db.get(User, 21).department_id
+    leave_request = LeaveRequest(
+        request_id="AVLTEST000001", user_id=21, leave_type_id=1, proxy_user_id=17,
+        start_date=date(2030, 3, 30), end_date=date(2030, 4, 2), days_count=2,
+        reason="availability test", status="approved", approver_id=19
+    )
+    # user 1 不在主管 19 的組織內，不應出現在結果中
+    outside_request = LeaveRequest(
+        request_id="AVLTEST000002", user_id=1, leave_type_id=1, proxy_user_id=17,
+        start_date=date(2030, 3, 31), end_date=date(2030, 3, 31), days_count=1,
+        reason="availability test", status="approved"
+    )
+    db.add_all([leave_request, outside_request])
+    db.commit()
+    try:
+        cookie = login_as("jessicavalentine@example.org", "test")
+        response = client.get("/api/calendar/availability?from=2030-03-31&to=2030-04-03", cookies=cookie)
+        assert response.status_code == 200
+        assert response.json() == {
+            "from": "2030-03-31",
+            "to": "2030-04-03",
+            "department_id": None,
+            "days": {"2030-03-31": [21], "2030-04-01": [21], "2030-04-02": [21], "2030-04-03": []}
+        }
+
+        response = client.get(
+            f"/api/calendar/availability?from=2030-03-31&to=2030-03-31&department_id={department_id}", cookies=cookie
+        )
+        assert response.json()["days"] == {"2030-03-31": [21]}
+        response = client.get(
+            f"/api/calendar/availability?from=2030-03-31&to=2030-03-31&department_id={department_id + 1000}",
+            cookies=cookie
+        )
+        assert response.json()["days"] == {"2030-03-31": []}
+
+        response = client.get("/api/calendar/availability?from=2030-04-03&to=2030-03-31", cookies=cookie)
+        assert response.status_code == 400
+        response = client.get("/api/calendar/availability?from=2030-01-01&to=2031-06-30", cookies=cookie)
+        assert response.status_code == 400
+
+        # 非主管不可查詢
+        cookie = login_as("carolyn50@example.com", "test")
+        response = client.get("/api/calendar/availability?from=2030-03-31&to=2030-04-03", cookies=cookie)
+        assert response.status_code == 403
+    finally:
+        db.delete(leave_request)
+        db.delete(outside_request)
+        db.commit()
+        db.close()
@@ -0,0 +1,29 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+
+client = TestClient(app)
+
+def test_get_pool_metrics(monkeypatch):
+    # 先打一個會用到資料庫的 API，確保連線池有 checkout 紀錄
+    response = client.post("/api/auth/login", json={"username": "carolyn50@example.com", "password": "test"})
+    assert response.status_code == 200
+
+    # 未設定 METRICS_TOKEN 時一律拒絕
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    response = client.get("/internal/metrics")
+    assert response.status_code == 403
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "metrics-token")
+    response = client.get("/internal/metrics", headers={"X-Metrics-Token": "wrong-token"})
+    assert response.status_code == 403
+    response = client.get("/internal/metrics", headers={"X-Metrics-Token": "metrics-token"})
+    assert response.status_code == 200
+    data = response.json()
+    assert "pid" in data
+    assert "pool_config" in data
+    sync_pool = data["pools"]["sync"]
+    assert sync_pool["checkouts"] >= 1
+    assert sync_pool["checkout_wait_seconds"]["count"] >= 1
+    assert sync_pool["checkout_wait_seconds"]["buckets"]["+Inf"] == sync_pool["checkout_wait_seconds"]["count"]
+    assert "connects" in sync_pool["churn"]
@@ -1,9 +1,81 @@
+from datetime import date, timedelta
 from fastapi.testclient import TestClient
 from app.main import app
 from app.schemas.leave import LeaveTypeBasic, ProxyUserOut
+from sqlalchemy import event, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from app.database import engine, SessionLocal
+from app.crud.leave import bulk_decide_leave_requests, approve_leave_request, reject_leave_request
+from app.crud.leave_usage import get_leave_usage, check_leave_usage_consistency, apply_leave_usage, apply_leave_usage_many
+from app.models.leave_request import LeaveRequest
+from app.models.leave_quota import LeaveQuota
+from app.models.leave_usage import LeaveUsage
+from app.models.notification import Notification
+from app.utils.request_id import generate_request_id
 
 client = TestClient(app)
 
+# 額度以假單開始日的年度計算：測試假單都放在測試專用的年度，額度由本模組建立與刪除
+YEAR = 2091
+TEST_QUOTAS = [(17, 5), (21, 1), (21, 2)]
+
+def setup_module():
+    db = SessionLocal()
+    try:
+        stmt = insert(LeaveQuota).values([
+            {"user_id": user_id, "leave_type_id": leave_type_id, "year": YEAR, "quota": 30}
+            for user_id, leave_type_id in TEST_QUOTAS
+        ])
+        db.execute(stmt.on_conflict_do_update(constraint="uq_user_leave_year", set_={"quota": stmt.excluded.quota}))
+        db.commit()
+    finally:
+        db.close()
+
+def teardown_module():
+    db = SessionLocal()
+    try:
+        db.query(LeaveQuota).filter(
+            LeaveQuota.year == YEAR,
+            LeaveQuota.user_id.in_([user_id for user_id, _ in TEST_QUOTAS])
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+def workdays(month: int, day: int, count: int = 1):
+    # 從指定日期之後的第一個星期一起算，連續 count 個工作天 (count <= 5)
+    start = date(YEAR, month, day)
+    start += timedelta(days=-start.weekday() % 7)
+    return [(start + timedelta(days=i)).isoformat() for i in range(count)]
+
+def delete_leave_requests(ids):
+    # 刪除測試建立的假單與通知，並從帳本扣回天數 (歸零的帳本列一併刪除)，讓測試可以重複執行
+    db = SessionLocal()
+    try:
+        deltas = {}
+        for leave_request in db.query(LeaveRequest).filter(LeaveRequest.id.in_(ids)):
+            key = (leave_request.user_id, leave_request.leave_type_id, leave_request.start_date.year)
+            used, pending = deltas.get(key, (0, 0))
+            if leave_request.status == "approved":
+                used -= leave_request.days_count
+            elif leave_request.status == "pending":
+                pending -= leave_request.days_count
+            deltas[key] = (used, pending)
+        apply_leave_usage_many(db, deltas)
+        db.query(LeaveUsage).filter(
+            tuple_(LeaveUsage.user_id, LeaveUsage.leave_type_id, LeaveUsage.year).in_(list(deltas)),
+            LeaveUsage.used_days == 0,
+            LeaveUsage.pending_days == 0
+        ).delete(synchronize_session=False)
+        db.query(Notification).filter(
+            Notification.related_to == "leave_request",
+            Notification.related_id.in_(ids)
+        ).delete(synchronize_session=False)
+        db.query(LeaveRequest).filter(LeaveRequest.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
 def login_as(username: str, password: str):
     response = client.post("/api/auth/login", json={"username": username, "password": password})
     assert response.status_code == 200
@@ -15,25 +87,30 @@ def test_create_leave_request():
     # login as subordinate (user id: 17)
     cookie = login_as("carolyn50@example.com", "test")
 
+    # 星期日到星期二，週末不計入，共 2 天
+    monday, tuesday = workdays(12, 1, 2)
     response = client.post("/api/leave-requests", json={
         "leave_type_id": 5,
-        "start_date": "2024-12-01",
-        "end_date": "2024-12-03",
+        "start_date": (date.fromisoformat(monday) - timedelta(days=1)).isoformat(),
+        "end_date": tuesday,
         "reason": "Unit test",
         "proxy_user_id": 21 
     }, cookies=cookie)
 
     assert response.status_code == 201
     data = response.json()
-    assert "id" in data
-    assert "request_id" in data
-    assert "leave_type" in data
-    assert "start_date" in data
-    assert "end_date" in data
-    assert isinstance(data["reason"], str) 
-    assert data["status"] == "pending"
-    assert data["days_count"] == 2 
-    assert "proxy_person" in data
+    try:
+        assert "id" in data
+        assert "request_id" in data
+        assert "leave_type" in data
+        assert "start_date" in data
+        assert "end_date" in data
+        assert isinstance(data["reason"], str) 
+        assert data["status"] == "pending"
+        assert data["days_count"] == 2 
+        assert "proxy_person" in data
+    finally:
+        delete_leave_requests([data["id"]])
 
 def test_list_my_leave_requests():
     # login as subordinate (user id: 17)
@@ -92,4 +169,299 @@ def test_list_pending_leave_requests():
     data = response.json()
     assert "leave_requests" in data
     assert isinstance(data["leave_requests"], list)
-    assert "pagination" in data
\ No newline at end of file
+    assert "pagination" in data
+
+def test_create_leave_request_updates_leave_usage():
+    # login as subordinate (user id: 17)
+    cookie = login_as("carolyn50@example.com", "test")
+    db = SessionLocal()
+    created_ids = []
+    try:
+        before = get_leave_usage(db, 17, 5, YEAR)
+        pending_before = before.pending_days if before else 0
+
+        response = client.post("/api/leave-requests", json={
+            "leave_type_id": 5,
+            "start_date": workdays(12, 8, 2)[0],
+            "end_date": workdays(12, 8, 2)[-1],
+            "reason": "Unit test",
+            "proxy_user_id": 21
+        }, cookies=cookie)
+        assert response.status_code == 201
+        created_ids.append(response.json()["id"])
+
+        db.expire_all()
+        after = get_leave_usage(db, 17, 5, YEAR)
+        assert after.pending_days == pending_before + 2
+        assert check_leave_usage_consistency(db) == []
+    finally:
+        db.close()
+        delete_leave_requests(created_ids)
+
+
+def test_list_team_leave_requests_with_cursor():
+    # login as manager (user id: 19)
+    cookie = login_as("jessicavalentine@example.org", "test")
+    response = client.get("/api/leave-requests/team?use_cursor=true&per_page=1", cookies=cookie)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["leave_requests"]) == 1
+    assert data["pagination"]["total_is_estimate"] is True
+    next_cursor = data["pagination"]["next_cursor"]
+    assert next_cursor is not None
+
+    # the next page continues strictly after the last row of the previous one
+    response = client.get(f"/api/leave-requests/team?cursor={next_cursor}&per_page=1&include_total=true", cookies=cookie)
+    assert response.status_code == 200
+    next_page = response.json()
+    assert next_page["pagination"]["total_is_estimate"] is False
+    assert next_page["leave_requests"][0]["id"] != data["leave_requests"][0]["id"]
+    assert next_page["leave_requests"][0]["start_date"] <= data["leave_requests"][0]["start_date"]
+
+    # 搜尋字串只會是參數，冒號與百分比不會被當成 SQL 的一部分
+    response = client.get("/api/leave-requests/team", params={"use_cursor": "true", "q": "foo :bar 100% 'x"}, cookies=cookie)
+    assert response.status_code == 200
+    assert response.json()["pagination"]["total_is_estimate"] is True
+
+
+def test_bulk_decision():
+    # login as subordinate (user id: 17) and file three leave requests
+    cookie = login_as("carolyn50@example.com", "test")
+    db = SessionLocal()
+    # an already approved request of manager 19's team
+    approved = LeaveRequest(
+        request_id=generate_request_id(), user_id=17, leave_type_id=5, proxy_user_id=21,
+        start_date=date.fromisoformat(workdays(11, 1, 4)[3]), end_date=date.fromisoformat(workdays(11, 1, 4)[3]),
+        days_count=1, reason="Bulk decision test", status="approved", approver_id=19
+    )
+    db.add(approved)
+    apply_leave_usage(db, 17, 5, YEAR, used_delta=1)
+    db.commit()
+    approved_id = approved.id
+    created_ids = []
+    try:
+        for day in workdays(11, 1, 3):
+            response = client.post("/api/leave-requests", json={
+                "leave_type_id": 5,
+                "start_date": day,
+                "end_date": day,
+                "reason": "Bulk decision test",
+                "proxy_user_id": 21
+            }, cookies=cookie)
+            assert response.status_code == 201
+            created_ids.append(response.json()["id"])
+
+        notifications_before = db.query(Notification).count()
+
+        # login as manager (user id: 19)
+        cookie = login_as("jessicavalentine@example.org", "test")
+        response = client.post("/api/leave-requests/bulk-decision", json={
+            "ids": created_ids[:2] + [approved_id, 999999],
+            "action": "approve"
+        }, cookies=cookie)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["succeeded"] == 2
+        assert data["failed"] == 2
+        assert [item["id"] for item in data["results"]] == created_ids[:2] + [approved_id, 999999]
+        assert [item["success"] for item in data["results"]] == [True, True, False, False]
+        assert data["results"][0]["status"] == "approved"
+        assert data["results"][2]["error"] == "Can only approve pending leave requests"
+        assert data["results"][3]["error"] == "Leave request not found"
+        # 申請人與代理人各一則通知
+        assert db.query(Notification).count() == notifications_before + 4
+
+        # rejecting needs a reason
+        response = client.post("/api/leave-requests/bulk-decision", json={
+            "ids": created_ids[2:],
+            "action": "reject"
+        }, cookies=cookie)
+        assert response.status_code == 400
+
+        # the whole batch takes a fixed number of statements
+        statements = []
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            result = bulk_decide_leave_requests(db, created_ids, 19, "reject", "Bulk decision test")
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        assert len(statements) == 5
+        assert [item.success for item in result.results] == [False, False, True]
+
+        assert db.get(LeaveRequest, created_ids[2]).status == "rejected"
+        assert check_leave_usage_consistency(db) == []
+    finally:
+        db.close()
+        delete_leave_requests(created_ids + [approved_id])
+
+
+def test_decisions_on_a_locked_request_return_conflict():
+    cookie = login_as("carolyn50@example.com", "test")
+    day = workdays(11, 22)[0]
+    response = client.post("/api/leave-requests", json={
+        "leave_type_id": 5,
+        "start_date": day,
+        "end_date": day,
+        "reason": "Locked decision test",
+        "proxy_user_id": 21
+    }, cookies=cookie)
+    assert response.status_code == 201
+    leave_request_id = response.json()["id"]
+
+    # another approver holds the row lock
+    locker = SessionLocal()
+    try:
+        locker.query(LeaveRequest).filter(LeaveRequest.id == leave_request_id).with_for_update().one()
+
+        cookie = login_as("jessicavalentine@example.org", "test")
+        response = client.patch(f"/api/leave-requests/{leave_request_id}/approve", cookies=cookie)
+        assert response.status_code == 409
+        response = client.patch(f"/api/leave-requests/{leave_request_id}/reject", json={
+            "rejection_reason": "Locked decision test"
+        }, cookies=cookie)
+        assert response.status_code == 409
+        response = client.post("/api/leave-requests/bulk-decision", json={
+            "ids": [leave_request_id],
+            "action": "approve"
+        }, cookies=cookie)
+        assert response.status_code == 200
+        assert response.json()["results"][0]["success"] is False
+        assert response.json()["results"][0]["retryable"] is True
+
+        # once the lock is released the retry goes through
+        locker.rollback()
+        response = client.patch(f"/api/leave-requests/{leave_request_id}/approve", cookies=cookie)
+        assert response.status_code == 200
+    finally:
+        locker.close()
+        delete_leave_requests([leave_request_id])
+
+
+def test_approve_and_reject_run_in_one_unit_of_work():
+    # login as subordinate (user id: 17)
+    cookie = login_as("carolyn50@example.com", "test")
+    created_ids = []
+    db = SessionLocal()
+    try:
+        for day in workdays(11, 15, 2):
+            response = client.post("/api/leave-requests", json={
+                "leave_type_id": 5,
+                "start_date": day,
+                "end_date": day,
+                "reason": "Approval pipeline test",
+                "proxy_user_id": 21
+            }, cookies=cookie)
+            assert response.status_code == 201
+            created_ids.append(response.json()["id"])
+
+        notifications_before = db.query(Notification).count()
+        statements = []
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            approved = approve_leave_request(db, created_ids[0], 19)
+            # load, status update, ledger upsert, notifications insert
+            assert len(statements) == 4
+            statements.clear()
+            rejected = reject_leave_request(db, created_ids[1], 19, "Approval pipeline test")
+            assert len(statements) == 4
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+        assert approved.status == "approved"
+        assert approved.approver.id == 19
+        assert rejected.status == "rejected"
+        assert rejected.rejection_reason == "Approval pipeline test"
+        # 核准通知申請人與代理人，否決只通知申請人
+        assert db.query(Notification).count() == notifications_before + 3
+        assert check_leave_usage_consistency(db) == []
+
+        # login as manager (user id: 19); deciding twice is rejected by the status check
+        cookie = login_as("jessicavalentine@example.org", "test")
+        response = client.patch(f"/api/leave-requests/{created_ids[0]}/approve", cookies=cookie)
+        assert response.status_code == 400
+    finally:
+        db.close()
+        delete_leave_requests(created_ids)
+
+
+def test_overlapping_leave_requests_are_rejected():
+    # login as subordinate (user id: 21)
+    cookie = login_as("coxlaurie@example.com", "test")
+    monday, tuesday, wednesday = workdays(6, 1, 3)
+    response = client.post("/api/leave-requests", json={
+        "leave_type_id": 1,
+        "start_date": monday,
+        "end_date": tuesday,
+        "reason": "Overlap test",
+        "proxy_user_id": 17
+    }, cookies=cookie)
+    assert response.status_code == 201
+    created_ids = [response.json()["id"]]
+
+    overlapping = {
+        "leave_type_id": 2,
+        "start_date": tuesday,
+        "end_date": wednesday,
+        "reason": "Overlap test",
+        "proxy_user_id": 17
+    }
+    db = SessionLocal()
+    try:
+        response = client.post("/api/leave-requests", json=overlapping, cookies=cookie)
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Leave request overlaps another leave request of this user"
+
+        # the quota reserved for the failed request is released
+        assert check_leave_usage_consistency(db) == []
+        # rejected requests no longer block the period
+        reject_leave_request(db, created_ids[0], 19, "Overlap test")
+
+        response = client.post("/api/leave-requests", json=overlapping, cookies=cookie)
+        assert response.status_code == 201
+        created_ids.append(response.json()["id"])
+    finally:
+        db.close()
+        delete_leave_requests(created_ids)
+
+
+def test_search_leave_requests_by_reason():
+    # login as subordinate (user id: 21)
+    cookie = login_as("coxlaurie@example.com", "test")
+    reasons = ["膝蓋手術後復健 knee surgery follow-up surgery", "參加朋友婚禮 wedding", "Dental surgery"]
+    created_ids = []
+    try:
+        for day, reason in zip(workdays(4, 20, 3), reasons):
+            response = client.post("/api/leave-requests", json={
+                "leave_type_id": 1,
+                "start_date": day,
+                "end_date": day,
+                "reason": reason,
+                "proxy_user_id": 17
+            }, cookies=cookie)
+            assert response.status_code == 201
+            created_ids.append(response.json()["id"])
+
+        def search(q, url="/api/leave-requests"):
+            response = client.get(url, params={"q": q, "per_page": 100}, cookies=cookie)
+            assert response.status_code == 200
+            return [item["reason"] for item in response.json()["leave_requests"]]
+
+        # 中文以相鄰兩字比對，單一字元以前綴比對
+        assert search("手術") == [reasons[0]]
+        assert search("婚禮") == [reasons[1]]
+        assert search("膝") == [reasons[0]]
+        assert search("朋友 wedding") == [reasons[1]]
+        assert search("手術婚禮") == []
+        # 依相關度排序：出現兩次 surgery 的假單排在前面
+        assert search("surgery") == [reasons[0], reasons[2]]
+        assert search("surgery -dental") == [reasons[0]]
+
+        # login as manager (user id: 19)
+        cookie = login_as("jessicavalentine@example.org", "test")
+        assert search("婚禮", "/api/leave-requests/team") == [reasons[1]]
+    finally:
+        delete_leave_requests(created_ids)
@@ -0,0 +1,72 @@
+from datetime import date
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+from app.database import SessionLocal
+from app.crud.leave_accrual import completed_months
+from app.models.leave_accrual import LeaveAccrualRule, LeaveAccrual
+from app.models.leave_type import LeaveType
+
+client = TestClient(app)
+
+def login_as(username: str, password: str):
+    response = client.post("/api/auth/login", json={"username": username, "password": password})
+    assert response.status_code == 200
+    # 取得 cookie
+    cookies = response.cookies
+    return cookies
+
+def test_completed_months():
+    assert completed_months(date(2026, 1, 15)) == 0
+    assert completed_months(date(2026, 1, 31)) == 1
+    assert completed_months(date(2024, 2, 29)) == 2
+    assert completed_months(date(2026, 12, 30)) == 11
+    assert completed_months(date(2026, 12, 31)) == 12
+
+def test_accruals_as_of_snapshot_and_computed(monkeypatch):
+    db = SessionLocal()
+    try:
+        leave_type_id = db.query(LeaveType.id).order_by(LeaveType.id).first()[0]
+    finally:
+        db.close()
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "admin-token")
+    headers = {"X-Admin-Token": "admin-token"}
+    # login as subordinate (user id: 17)
+    cookie = login_as("carolyn50@example.com", "test")
+
+    try:
+        response = client.put(f"/internal/leave-accrual-rules/{leave_type_id}",
+                              json={"days_per_month": 1.25, "max_days": 10}, headers=headers)
+        assert response.status_code == 200
+        response = client.put("/internal/leave-accrual-rules/999999", json={"days_per_month": 1}, headers=headers)
+        assert response.status_code == 404
+
+        # 尚未月結時即時計算
+        response = client.get("/api/leave-accruals?as_of=2099-06-30", cookies=cookie)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["month"] == 6
+        assert [(item["leave_type_id"], item["accrued_days"]) for item in data["accruals"]] == [(leave_type_id, 7.5)]
+
+        response = client.post("/internal/leave-accruals/materialize", json={"year": 2099, "month": 6}, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["rows"] >= 1
+
+        # 規則變更後，已月結的月份仍讀取快照，未月結的月份依新規則計算並受上限限制
+        client.put(f"/internal/leave-accrual-rules/{leave_type_id}", json={"days_per_month": 2, "max_days": 10}, headers=headers)
+        response = client.get("/api/leave-accruals?as_of=2099-07-15", cookies=cookie)
+        assert response.json()["accruals"][0]["accrued_days"] == 7.5
+        response = client.get("/api/leave-accruals?as_of=2099-07-31", cookies=cookie)
+        assert response.json()["accruals"][0]["accrued_days"] == 10
+
+        # 不是團隊成員
+        response = client.get("/api/leave-accruals?user_id=19", cookies=cookie)
+        assert response.status_code == 403
+    finally:
+        db = SessionLocal()
+        try:
+            db.query(LeaveAccrual).filter(LeaveAccrual.year == 2099).delete()
+            db.query(LeaveAccrualRule).filter(LeaveAccrualRule.leave_type_id == leave_type_id).delete()
+            db.commit()
+        finally:
+            db.close()
@@ -1,5 +1,8 @@
 from fastapi.testclient import TestClient
 from app.main import app
+from sqlalchemy import event
+from app.database import engine, SessionLocal
+from app.crud.leave_balance import get_leave_balances
 
 client = TestClient(app)
 
@@ -39,3 +42,20 @@ def test_read_user_leave_balance():
         assert "used_days" in balance
         assert "remaining_days" in balance
         assert "leave_requests" in balance
+
+def test_leave_balance_query_count_is_constant():
+    # 不論有幾種假別，餘額計算都只應發出固定數量的 SQL (配額彙總 + 請假紀錄)
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    db = SessionLocal()
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        result = get_leave_balances(db, 17)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+        db.close()
+
+    assert len(statements) == 2
@@ -0,0 +1,149 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from sqlalchemy import select
+from app.database import SessionLocal
+from app.crud.leave import create_leave_request, approve_leave_request, bulk_decide_leave_requests
+from app.crud.leave_usage import check_leave_usage_consistency
+from app.models.leave_request import LeaveRequest
+from app.models.leave_quota import LeaveQuota
+from app.models.leave_usage import LeaveUsage
+from app.models.notification import Notification
+from app.schemas.leave import LeaveRequestCreate
+
+# 200 個同時送出的核准請求打在同一批假單上
+ROWS = 10
+APPROVALS = 200
+WORKERS = 32
+# 測試專用的年度：額度列由各測試建立，結束時連同假單、通知與帳本列一起刪除
+TEST_YEAR = 2092
+
+
+def grant_quota(user_id: int, leave_type_id: int, days: int):
+    db = SessionLocal()
+    try:
+        db.add(LeaveQuota(user_id=user_id, leave_type_id=leave_type_id, year=TEST_YEAR, quota=days))
+        db.commit()
+    finally:
+        db.close()
+
+
+def remove_test_year(user_id: int, leave_type_id: int):
+    db = SessionLocal()
+    try:
+        ids = select(LeaveRequest.id).where(
+            LeaveRequest.user_id == user_id,
+            LeaveRequest.leave_type_id == leave_type_id,
+            LeaveRequest.start_date >= date(TEST_YEAR, 1, 1),
+            LeaveRequest.start_date < date(TEST_YEAR + 1, 1, 1)
+        )
+        db.query(Notification).filter(
+            Notification.related_to == "leave_request",
+            Notification.related_id.in_(ids)
+        ).delete(synchronize_session=False)
+        db.query(LeaveRequest).filter(LeaveRequest.id.in_(ids)).delete(synchronize_session=False)
+        db.query(LeaveUsage).filter_by(user_id=user_id, leave_type_id=leave_type_id, year=TEST_YEAR).delete()
+        db.query(LeaveQuota).filter_by(user_id=user_id, leave_type_id=leave_type_id, year=TEST_YEAR).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def create_pending_requests(rows: int):
+    # 只取平日，週末的請假天數為 0
+    days = [d for d in (date(TEST_YEAR, 10, 1) + timedelta(days=i) for i in range(2 * rows)) if d.weekday() < 5][:rows]
+    db = SessionLocal()
+    try:
+        return [
+            create_leave_request(db, 17, LeaveRequestCreate(
+                leave_type_id=5,
+                start_date=day,
+                end_date=day,
+                reason="Concurrency test",
+                proxy_user_id=21
+            )).id
+            for day in days
+        ]
+    finally:
+        db.close()
+
+
+def try_approve(leave_request_id: int):
+    # 每個執行緒使用自己的 session，就像各自的 API 請求
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        approve_leave_request(db, leave_request_id, 19)
+        outcome = "approved"
+    except ValueError as e:
+        outcome = str(e)
+    finally:
+        db.close()
+    return leave_request_id, outcome, time.perf_counter() - started
+
+
+def test_concurrent_approvals_transition_exactly_once():
+    grant_quota(17, 5, ROWS)
+    db = SessionLocal()
+    try:
+        ids = create_pending_requests(ROWS)
+        notifications_before = db.query(Notification).count()
+
+        with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+            results = list(executor.map(try_approve, [ids[i % ROWS] for i in range(APPROVALS)]))
+
+        approvals = Counter(leave_request_id for leave_request_id, outcome, _ in results if outcome == "approved")
+        assert approvals == Counter({leave_request_id: 1 for leave_request_id in ids})
+        # 其他請求不是看到已核准，就是看到別人正在處理，不會排隊等鎖
+        assert {outcome for _, outcome, _ in results} <= {
+            "approved",
+            "Can only approve pending leave requests",
+            "Leave request is being processed by another approver"
+        }
+        assert max(elapsed for _, _, elapsed in results) < 10
+
+        statuses = {r.id: r.status for r in db.query(LeaveRequest).filter(LeaveRequest.id.in_(ids))}
+        assert set(statuses.values()) == {"approved"}
+        # 每筆假單只通知一次申請人與代理人
+        assert db.query(Notification).count() == notifications_before + 2 * ROWS
+        assert check_leave_usage_consistency(db) == []
+
+        # a later bulk decision on the same rows changes nothing
+        result = bulk_decide_leave_requests(db, ids, 19, "approve")
+        assert result.succeeded == 0
+    finally:
+        db.close()
+        remove_test_year(17, 5)
+
+
+def try_create(user_id: int, leave_type_id: int, day: date):
+    db = SessionLocal()
+    try:
+        create_leave_request(db, user_id, LeaveRequestCreate(
+            leave_type_id=leave_type_id,
+            start_date=day,
+            end_date=day,
+            reason="Quota reservation test",
+            proxy_user_id=17
+        ))
+        return "created"
+    except ValueError as e:
+        return str(e).split(".")[0]
+    finally:
+        db.close()
+
+
+def test_concurrent_submissions_never_oversubscribe_quota():
+    # user 21 gets a 30 day quota for leave type 3 in a year no other data uses; 40 one-day requests arrive at once
+    grant_quota(21, 3, 30)
+    db = SessionLocal()
+    try:
+        days = [d for d in (date(TEST_YEAR, 8, 1) + timedelta(days=i) for i in range(70)) if d.weekday() < 5][:40]
+        with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+            outcomes = Counter(executor.map(lambda day: try_create(21, 3, day), days))
+        assert outcomes == Counter({"created": 30, "Not enough leave balance": 10})
+        assert check_leave_usage_consistency(db) == []
+    finally:
+        db.close()
+        remove_test_year(21, 3)
@@ -0,0 +1,49 @@
+import os
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.database import engine
+from app.crud.leave_balance import _approved_requests_query
+
+# 在交易中塞入假單，驗證查詢計畫有使用索引，最後 rollback 不留下資料
+# 預設只塞 20,000 筆；QUERY_PLAN_SEED_ROWS=1000000 可在接近正式環境的資料量下檢查 (約需數分鐘)
+SEED_ROWS = int(os.getenv("QUERY_PLAN_SEED_ROWS", "20000"))
+SEED_YEAR = 2200
+
+
+def seed_leave_requests(connection, rows: int):
+    # 第 g 筆給第 g % n 位使用者，放在他的第 g / n 個兩天區段：同一人的假單不重疊，
+    # 且從 SEED_YEAR 起排，不會碰到既有資料 (排他約束)
+    connection.execute(text("""
+        INSERT INTO leave_requests (request_id, user_id, leave_type_id, proxy_user_id, start_date, end_date, days_count, reason, status)
+        SELECT 'EXPLAIN' || g,
+               u.ids[1 + g % array_length(u.ids, 1)],
+               t.ids[1 + g % array_length(t.ids, 1)],
+               u.ids[1 + (g + 1) % array_length(u.ids, 1)],
+               make_date(:year, 1, 1) + 2 * (g / array_length(u.ids, 1)),
+               make_date(:year, 1, 1) + 2 * (g / array_length(u.ids, 1)) + 1,
+               2,
+               'query plan test',
+               (ARRAY['pending', 'approved', 'rejected'])[1 + (g / array_length(u.ids, 1)) % 3]
+        FROM generate_series(1, :rows) AS g,
+             (SELECT array_agg(id) AS ids FROM users) AS u,
+             (SELECT array_agg(id) AS ids FROM leave_types) AS t
+    """), {"rows": rows, "year": SEED_YEAR})
+    connection.execute(text("ANALYZE leave_requests"))
+
+
+def explain(connection, statement) -> str:
+    sql = statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    return "\n".join(row[0] for row in connection.execute(text(f"EXPLAIN {sql}")))
+
+
+def test_leave_balance_request_query_uses_index():
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            seed_leave_requests(connection, SEED_ROWS)
+            db = Session(bind=connection)
+            plan = explain(connection, _approved_requests_query(db, 17, SEED_YEAR).statement)
+            assert "ix_leave_requests_user_status_start" in plan
+            assert "Seq Scan on leave_requests" not in plan
+        finally:
+            transaction.rollback()
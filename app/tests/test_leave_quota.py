@@ -0,0 +1,69 @@
+from datetime import date
+from fastapi.testclient import TestClient
+from app.main import app
+from app.config import settings
+from app.database import SessionLocal
+from app.crud.leave_quota import build_quota_rows, years_of_service
+from app.models.leave_quota import LeaveQuota
+from app.models.leave_type import LeaveType
+from app.models.user import User
+from app.schemas.leave_quota import LeaveTypeQuotaPolicy, SeniorityStep
+
+client = TestClient(app)
+
+def test_years_of_service():
+    assert years_of_service(date(2020, 1, 1), 2027) == 7
+    assert years_of_service(date(2020, 6, 1), 2027) == 6
+    assert years_of_service(date(2026, 12, 31), 2027) == 0
+    assert years_of_service(date(2027, 3, 1), 2027) == 0
+
+def test_build_quota_rows_applies_seniority_carry_over_and_cap():
+    policy = LeaveTypeQuotaPolicy(
+        leave_type_id=1, base_days=3, carry_over_max=5, max_days=20,
+        seniority_steps=[SeniorityStep(years=5, days=15), SeniorityStep(years=1, days=7)]
+    )
+    users = [(1, date(2026, 6, 1)), (2, date(2024, 1, 1)), (3, date(2020, 1, 1)), (4, date(2000, 1, 1))]
+    unused = {(2, 1): 2.5, (3, 1): 12, (4, 1): -1}
+    rows = build_quota_rows(2027, users, [policy], unused)
+    assert rows == [(1, 1, 2027, 3), (2, 1, 2027, 9), (3, 1, 2027, 20), (4, 1, 2027, 15)]
+
+def test_provision_leave_quotas_is_idempotent(monkeypatch):
+    year = 2099
+    db = SessionLocal()
+    try:
+        leave_type_id = db.query(LeaveType.id).order_by(LeaveType.id).first()[0]
+        users = db.query(User.id).count()
+    finally:
+        db.close()
+    body = {"year": year, "leave_types": [{"leave_type_id": leave_type_id, "base_days": 7}]}
+
+    response = client.post("/internal/leave-quotas/provision", json=body)
+    assert response.status_code == 403
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "admin-token")
+    headers = {"X-Admin-Token": "admin-token"}
+    try:
+        response = client.post("/internal/leave-quotas/provision", json=body, headers=headers)
+        assert response.status_code == 200
+        assert response.json() == {"year": year, "users": users, "leave_types": 1, "inserted": users, "updated": 0, "unchanged": 0}
+
+        # 再跑一次不會重複建立；overwrite 才會改寫既有額度
+        response = client.post("/internal/leave-quotas/provision", json=body, headers=headers)
+        assert response.json()["inserted"] == 0 and response.json()["unchanged"] == users
+        body["leave_types"][0]["base_days"] = 8
+        body["overwrite"] = True
+        response = client.post("/internal/leave-quotas/provision", json=body, headers=headers)
+        assert response.json()["updated"] == users
+
+        body["leave_types"].append({"leave_type_id": leave_type_id, "base_days": 1})
+        response = client.post("/internal/leave-quotas/provision", json=body, headers=headers)
+        assert response.status_code == 400
+    finally:
+        db = SessionLocal()
+        try:
+            quotas = db.query(LeaveQuota.quota).filter(LeaveQuota.year == year).all()
+            db.query(LeaveQuota).filter(LeaveQuota.year == year).delete()
+            db.commit()
+        finally:
+            db.close()
+    assert {quota for (quota,) in quotas} == {8}
@@ -0,0 +1,54 @@
+from datetime import date
+from app.database import SessionLocal
+from app.crud.leave import get_team_leave_requests
+from app.crud.org import get_org_chain, is_in_org, org_member_ids
+from app.models.leave_request import LeaveRequest
+from app.models.manager import Manager
+from app.models.org_hierarchy import OrgHierarchy
+from app.models.user import User
+
+def make_manager(db, name: str) -> User:
+    user = User(employee_id=f"ORG-{name}", first_name=name, last_name="Org", email=f"org-{name}@example.com",
+                password_hash="x", position="Director", hire_date=date(2020, 1, 1), is_manager=True)
+    db.add(user)
+    db.flush()
+    return user
+
+def test_closure_follows_manager_changes_and_scopes_team_listing():
+    db = SessionLocal()
+    try:
+        # director -> senior manager -> manager 19 -> 19 的團隊 (17, 21, ...)
+        director = make_manager(db, "director")
+        senior = make_manager(db, "senior")
+        db.add_all([Manager(user_id=senior.id, manager_id=director.id), Manager(user_id=19, manager_id=senior.id)])
+        db.commit()
+
+        team_ids = set(db.scalars(org_member_ids(19)))
+        assert {17, 21} <= team_ids
+        assert set(db.scalars(org_member_ids(director.id))) == {senior.id, 19} | team_ids
+        assert get_org_chain(db, 17)[:3] == [19, senior.id, director.id]
+        assert db.get(OrgHierarchy, (director.id, 17)).depth == 3
+        assert is_in_org(db, director.id, 21) and not is_in_org(db, 19, director.id)
+
+        expected = db.query(LeaveRequest).filter(LeaveRequest.user_id.in_(list(team_ids | {19}))).count()
+        result = get_team_leave_requests(db, director.id, scope="org", per_page=100)
+        assert result["total"] == expected
+        assert get_team_leave_requests(db, director.id)["total"] == 0
+        assert get_team_leave_requests(db, director.id, user_id=17, scope="org")["total"] > 0
+
+        # 移除中間一層後，director 不再看得到下面的人
+        db.delete(db.query(Manager).filter(Manager.user_id == 19, Manager.manager_id == senior.id).one())
+        db.commit()
+        assert set(db.scalars(org_member_ids(director.id))) == {senior.id}
+        assert senior.id not in get_org_chain(db, 17)
+    finally:
+        db.rollback()
+        db.query(Manager).filter(Manager.manager_id.in_(
+            db.query(User.id).filter(User.email.like("org-%@example.com"))
+        )).delete(synchronize_session=False)
+        db.query(Manager).filter(Manager.user_id.in_(
+            db.query(User.id).filter(User.email.like("org-%@example.com"))
+        )).delete(synchronize_session=False)
+        db.query(User).filter(User.email.like("org-%@example.com")).delete(synchronize_session=False)
+        db.commit()
+        db.close()
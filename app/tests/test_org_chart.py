@@ -0,0 +1,80 @@
+from sqlalchemy import event, text
+from app.database import engine, SessionLocal
+from app.crud.org import org_chart_cache, get_org_chart
+from app.crud.user import get_manager_id, get_team_member_ids
+from app.models.manager import Manager
+from app.utils.org_chart import OrgChart, OrgChartCache
+
+def test_org_chart_arrays():
+    chart = OrgChart([(2, 1), (3, 1), (4, 2), (5, 2), (5, 3), (3, 1)], version=7)
+    assert chart.version == 7
+    assert chart.reports_of(1) == [2, 3]
+    assert chart.reports_of(2) == [4, 5]
+    assert chart.reports_of(4) == [] and chart.reports_of(99) == []
+    assert chart.manager_of(4) == 2
+    # 有多位主管時取最小的主管 id
+    assert chart.manager_of(5) == 2
+    assert chart.manager_of(1) is None and chart.manager_of(99) is None
+    assert OrgChart([]).reports_of(0) == []
+
+def test_org_chart_cache_reloads_only_on_version_change():
+    versions, loads = [1], []
+    def load_edges():
+        loads.append(versions[0])
+        return [(2, 1)]
+    cache = OrgChartCache(check_interval=60)
+    assert cache.get(lambda: versions[0], load_edges).version == 1
+    versions[0] = 2
+    # 在確認間隔內不查版本
+    assert cache.get(lambda: versions[0], load_edges).version == 1
+    cache.invalidate()
+    assert cache.get(lambda: versions[0], load_edges).version == 2
+    cache.invalidate()
+    assert cache.get(lambda: versions[0], load_edges).version == 2
+    assert loads == [1, 2]
+
+def test_org_chart_cache_can_be_reentered_while_loading():
+    # 非同步路徑在查詢中讓出事件迴圈，同一執行緒上的另一個請求會再進入 get()
+    cache = OrgChartCache(check_interval=0)
+    nested = []
+    def load_version():
+        if not nested:
+            nested.append(cache.get(lambda: 1, lambda: [(2, 1)]))
+        return 1
+    chart = cache.get(load_version, lambda: [(2, 1)])
+    assert chart.version == 1 and nested[0].reports_of(1) == [2]
+
+def test_manager_lookups_hit_the_cache(monkeypatch):
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    db = SessionLocal()
+    try:
+        # user 17 的主管是 19
+        assert get_manager_id(db, 17) == 19
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            assert get_manager_id(db, 17) == 19
+            assert 17 in get_team_member_ids(db, 19, 19)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        assert statements == []
+
+        # 本行程的異動 commit 後立即可見
+        edge = Manager(user_id=19, manager_id=17)
+        db.add(edge)
+        db.commit()
+        assert 19 in get_team_member_ids(db, 17, 17)
+        db.delete(edge)
+        db.commit()
+        assert get_team_member_ids(db, 17, 17) == []
+
+        # 其他行程的異動: 版本改變後，下一次確認時重新載入
+        version = get_org_chart(db).version
+        monkeypatch.setattr(org_chart_cache, "check_interval", 0)
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE org_chart_version SET version = version + 1 WHERE id = 1"))
+        assert get_org_chart(db).version == version + 1
+    finally:
+        db.close()
@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+from fastapi.testclient import TestClient
+from app.main import app
+from app.database import SessionLocal
+from app.models.leave_request import LeaveRequest
+from app.models.manager import Manager
+from app.crud.report import EXPORT_FIELDS
+
+client = TestClient(app)
+
+def login_as(username: str, password: str):
+    response = client.post("/api/auth/login", json={"username": username, "password": password})
+    assert response.status_code == 200
+    # 取得 cookie
+    cookies = response.cookies
+    return cookies
+
+def team_request_ids():
+    db = SessionLocal()
+    try:
+        team = db.query(Manager.user_id).filter(Manager.manager_id == 19)
+        return {row.request_id for row in db.query(LeaveRequest.request_id).filter(LeaveRequest.user_id.in_(team))}
+    finally:
+        db.close()
+
+def test_export_team_leave_requests_as_csv_and_ndjson():
+    expected = team_request_ids()
+    # login as manager (user id: 19)
+    cookie = login_as("jessicavalentine@example.org", "test")
+
+    response = client.get("/api/reports/leave-requests/export", cookies=cookie, headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "content-encoding" not in response.headers
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert list(rows[0]) == EXPORT_FIELDS
+    assert {row["request_id"] for row in rows} == expected
+
+    # gzip 壓縮 (httpx 會自動解壓)
+    response = client.get("/api/reports/leave-requests/export?format=ndjson&user_id=21&status=pending",
+                          cookies=cookie, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert items and all(item["status"] == "pending" and item["first_name"] == "Virginia" for item in items)
+    assert isinstance(items[0]["days_count"], float)
+
+    # 不屬於團隊的使用者 / 錯誤的狀態
+    response = client.get("/api/reports/leave-requests/export?user_id=1", cookies=cookie)
+    assert response.status_code == 403
+    response = client.get("/api/reports/leave-requests/export?status=unknown", cookies=cookie)
+    assert response.status_code == 400
+
+    # login as subordinate (user id: 17)
+    cookie = login_as("carolyn50@example.com", "test")
+    response = client.get("/api/reports/leave-requests/export", cookies=cookie)
+    assert response.status_code == 403
@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+from threading import Thread
+from app.database import SessionLocal
+from app.crud import leave as leave_crud
+from app.crud.leave_usage import check_leave_usage_consistency
+from app.models.leave_request import LeaveRequest
+from app.models.leave_quota import LeaveQuota
+from app.models.leave_usage import LeaveUsage
+from app.schemas.leave import LeaveRequestCreate
+from app.utils.request_id import CROCKFORD_ALPHABET, REQUEST_ID_LENGTH, RequestIdGenerator
+
+def test_request_ids_are_time_ordered_and_unique():
+    generate = RequestIdGenerator()
+    # 同一毫秒內產生大量編號，仍需嚴格遞增
+    ids = [generate() for _ in range(20_000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert all(len(request_id) == REQUEST_ID_LENGTH for request_id in ids)
+    assert set("".join(ids)) <= set(CROCKFORD_ALPHABET)
+
+def test_request_ids_are_unique_across_threads():
+    generate = RequestIdGenerator()
+    results = [[] for _ in range(8)]
+    def worker(out):
+        out.extend(generate() for _ in range(5_000))
+    threads = [Thread(target=worker, args=(out,)) for out in results]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ids = [request_id for out in results for request_id in out]
+    assert len(set(ids)) == len(ids)
+    # 各執行緒拿到的編號仍依序遞增
+    assert all(out == sorted(out) for out in results)
+
+def test_create_leave_request_retries_on_request_id_collision(monkeypatch):
+    # 測試專用的年度與額度，結束時連同假單與帳本列一起刪除
+    year = 2093
+    db = SessionLocal()
+    quota = LeaveQuota(user_id=21, leave_type_id=1, year=year, quota=5)
+    db.add(quota)
+    db.commit()
+    created = None
+    try:
+        existing_id = db.query(LeaveRequest.request_id).first().request_id
+        fresh_id = RequestIdGenerator()()
+        generated = iter([existing_id, fresh_id])
+        monkeypatch.setattr(leave_crud, "generate_request_id", lambda: next(generated))
+
+        start = date(year, 7, 1)
+        start += timedelta(days=-start.weekday() % 7)
+        # Virginia (21) 請一天假，Evelyn (17) 代理；第一次產生的編號已存在
+        created = leave_crud.create_leave_request(db, 21, LeaveRequestCreate(
+            leave_type_id=1,
+            start_date=start,
+            end_date=start,
+            reason="request id collision test",
+            proxy_user_id=17
+        ))
+        assert created.request_id == fresh_id
+        assert created.days_count == 1
+        # 第一次嘗試預留的額度隨交易回滾
+        assert check_leave_usage_consistency(db) == []
+    finally:
+        db.rollback()
+        if created is not None:
+            db.query(LeaveRequest).filter(LeaveRequest.id == created.id).delete()
+        db.query(LeaveUsage).filter_by(user_id=21, leave_type_id=1, year=year).delete()
+        db.delete(quota)
+        db.commit()
+        db.close()
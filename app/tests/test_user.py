@@ -1,5 +1,14 @@
+from datetime import date
 from fastapi.testclient import TestClient
+from sqlalchemy import event, delete
 from app.main import app
+from app.database import engine, SessionLocal
+from app.models.user import User
+from app.models.leave_request import LeaveRequest
+from app.models.leave_usage import LeaveUsage
+from app.crud.availability import availability_index
+from app.crud.org import org_chart_cache, get_org_chart
+from app.utils.dependencies import auth_cache
 
 client = TestClient(app)
 
@@ -150,4 +159,144 @@ def test_get_user_by_id():
             "last_name": "Burton"
         },
         "hire_date": "2023-07-16"
-    }
\ No newline at end of file
+    }
+
+
+def count_statements(fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements, result
+
+def warm_org_chart(monkeypatch):
+    # /users/me 透過組織圖快取取得主管；先載入並停止版本確認，只比較使用者查詢的次數
+    monkeypatch.setattr(org_chart_cache, "check_interval", 3600)
+    db = SessionLocal()
+    try:
+        get_org_chart(db)
+    finally:
+        db.close()
+
+def test_current_user_is_cached_and_invalidated_on_update(monkeypatch):
+    warm_org_chart(monkeypatch)
+    auth_cache.clear()
+    cookie = login_as("carolyn50@example.com", "test")
+    get_me = lambda: client.get("/api/users/me", cookies=cookie)
+
+    # 第一次需要查詢使用者，第二次由快取取得
+    first, _ = count_statements(get_me)
+    second, _ = count_statements(get_me)
+    assert len(second) == len(first) - 1
+
+    # 透過 ORM 更新使用者後，快取應失效並重新查詢
+    db = SessionLocal()
+    try:
+        user = db.get(User, 17)
+        original_position = user.position
+        user.position = "Photo editor"
+        db.commit()
+        try:
+            third, response = count_statements(get_me)
+            assert len(third) == len(first)
+            assert response.json()["position"] == "Photo editor"
+        finally:
+            user.position = original_position
+            db.commit()
+    finally:
+        db.close()
+
+def test_cached_user_is_dropped_only_after_commit(monkeypatch):
+    warm_org_chart(monkeypatch)
+    auth_cache.clear()
+    cookie = login_as("carolyn50@example.com", "test")
+    get_me = lambda: client.get("/api/users/me", cookies=cookie)
+    first, _ = count_statements(get_me)
+    cached, _ = count_statements(get_me)
+
+    db = SessionLocal()
+    try:
+        user = db.get(User, 17)
+        original_position = user.position
+        user.position = "Photo editor"
+        db.flush()
+        # 尚未提交：快取仍有效，回傳的是已提交的資料
+        statements, response = count_statements(get_me)
+        assert len(statements) == len(cached)
+        assert response.json()["position"] == original_position
+
+        # rollback 後不需要清除快取
+        db.rollback()
+        statements, response = count_statements(get_me)
+        assert len(statements) == len(cached)
+        assert response.json()["position"] == original_position
+    finally:
+        db.close()
+
+def test_proxy_candidates_skip_teammates_on_leave():
+    db = SessionLocal()
+    # Virginia (21) 已核准請假；Evelyn (17) 的假單審核中
+    on_leave = LeaveRequest(
+        request_id="PRXTEST000001", user_id=21, leave_type_id=1, proxy_user_id=19,
+        start_date=date(2029, 5, 7), end_date=date(2029, 5, 10), days_count=4,
+        reason="proxy candidate test", status="approved", approver_id=19
+    )
+    pending = LeaveRequest(
+        request_id="PRXTEST000002", user_id=17, leave_type_id=1, proxy_user_id=19,
+        start_date=date(2029, 5, 14), end_date=date(2029, 5, 15), days_count=2,
+        reason="proxy candidate test", status="pending"
+    )
+    db.add_all([on_leave, pending])
+    db.commit()
+    availability_index.invalidate()
+    try:
+        # login as manager (user id: 19)
+        cookie = login_as("jessicavalentine@example.org", "test")
+        response = client.get("/api/users/proxy-candidates?start=2029-05-08&end=2029-05-08", cookies=cookie)
+        assert response.status_code == 200
+        candidate_ids = [candidate["id"] for candidate in response.json()["candidates"]]
+        assert 17 in candidate_ids and 21 not in candidate_ids
+
+        # 核准後索引就地更新
+        response = client.patch(f"/api/leave-requests/{pending.id}/approve", cookies=cookie)
+        assert response.status_code == 200
+        response = client.get("/api/users/proxy-candidates?start=2029-05-15&end=2029-05-16", cookies=cookie)
+        candidate_ids = [candidate["id"] for candidate in response.json()["candidates"]]
+        assert 17 not in candidate_ids and 21 in candidate_ids
+
+        # login as subordinate (user id: 17); colleagues are ranked by leave taken around the interval
+        cookie = login_as("carolyn50@example.com", "test")
+        response = client.get("/api/users/proxy-candidates?start=2029-05-21&end=2029-05-21", cookies=cookie)
+        assert response.status_code == 200
+        candidates = response.json()["candidates"]
+        assert 17 not in [candidate["id"] for candidate in candidates]
+        assert candidates[-1]["id"] == 21 and candidates[-1]["absent_days_nearby"] == 4
+
+        response = client.get("/api/users/proxy-candidates?start=2029-05-21&end=2029-05-20", cookies=cookie)
+        assert response.status_code == 400
+
+        # 代理人在請假期間內不可指定
+        response = client.post("/api/leave-requests", json={
+            "leave_type_id": 1,
+            "start_date": "2029-05-09",
+            "end_date": "2029-05-09",
+            "reason": "proxy candidate test",
+            "proxy_user_id": 21
+        }, cookies=cookie)
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Proxy user is on leave during the requested period"
+    finally:
+        db.execute(delete(LeaveRequest).where(LeaveRequest.request_id.in_(["PRXTEST000001", "PRXTEST000002"])))
+        db.execute(delete(LeaveUsage).where(
+            LeaveUsage.user_id.in_([17, 21]),
+            LeaveUsage.leave_type_id == 1,
+            LeaveUsage.year == 2029
+        ))
+        db.commit()
+        db.close()
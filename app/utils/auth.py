@@ -1,19 +1,45 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+import asyncio
+from ..config import settings
 
-# 密碼雜湊
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 密碼雜湊；min/max 與預設成本相同，成本不同的雜湊都會被視為需要更新
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
+
+# bcrypt 會釋放 GIL，放在專用的有限執行緒池中執行，避免阻塞 event loop 或佔滿預設的 threadpool
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
 
 def verify_password(plain_password, hashed_password):
     # print(plain_password, hashed_password)
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    """
+    Verify the password and return a new hash when the stored one uses an outdated cost
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, verify_and_update_password, plain_password, hashed_password)
+
 def get_password_hash(password):
     return pwd_context.hash(password)
 
 # JWT 設定
-SECRET_KEY = "your-secret-key"  
+SECRET_KEY = "your-secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
 
@@ -0,0 +1,75 @@
+import threading
+import time
+from datetime import date
+from typing import Callable, Dict, Iterable, Tuple
+
+# (user_id, start_date, end_date)
+Absence = Tuple[int, date, date]
+
+
+def day_mask(year: int, start: date, end: date) -> int:
+    """
+    Bitset of the days of [start, end] that fall in `year`; bit i is the i-th day of the year
+    """
+    first_day = date(year, 1, 1)
+    first = max((start - first_day).days, 0)
+    last = min((end - first_day).days, (date(year + 1, 1, 1) - first_day).days - 1)
+    if first > last:
+        return 0
+    return ((1 << (last - first + 1)) - 1) << first
+
+
+class TeamAvailabilityIndex:
+    """
+    In-process absent-day bitsets per (team, year): one Python int per member,
+    bit i set when the member is on approved leave on the i-th day of the year.
+    Checking a member against an interval is a single AND.
+    mark_absent() updates loaded teams in place when a request is approved in this
+    process; the TTL bounds how long other processes keep a stale copy.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self._teams: Dict[Tuple[int, int], Tuple[float, Dict[int, int]]] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        team_id: int,
+        year: int,
+        load: Callable[[], Tuple[Iterable[int], Iterable[Absence]]]
+    ) -> Dict[int, int]:
+        """
+        user_id -> absent-day bitset for the team in `year`. `load` returns the member
+        ids and their approved absences overlapping the year. Callers must not mutate
+        the returned dict.
+        """
+        entry = self._teams.get((team_id, year))
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        version = self.version
+        member_ids, absences = load()
+        masks = dict.fromkeys(member_ids, 0)
+        for user_id, start, end in absences:
+            if user_id in masks:
+                masks[user_id] |= day_mask(year, start, end)
+        with self._lock:
+            # 載入期間若有核准或異動，這份資料可能已過時，只回傳不保存
+            if version == self.version:
+                self._teams[(team_id, year)] = (time.monotonic(), masks)
+        return masks
+
+    def mark_absent(self, absences: Iterable[Absence]):
+        absences = list(absences)
+        with self._lock:
+            self.version += 1
+            for (_, year), (_, masks) in self._teams.items():
+                for user_id, start, end in absences:
+                    if user_id in masks and start.year <= year <= end.year:
+                        masks[user_id] |= day_mask(year, start, end)
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._teams.clear()
@@ -0,0 +1,107 @@
+import threading
+import time
+from array import array
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional
+
+
+class BusinessDayCalendar:
+    """
+    Business-day arithmetic over weekends and a fixed set of holidays.
+    Each year gets a cumulative prefix array, so counting a range inside one
+    year is two lookups and a subtraction.
+    """
+
+    def __init__(self, holidays: Iterable[date] = ()):
+        self.holidays = frozenset(holidays)
+        self._prefix: Dict[int, array] = {}
+        self._year_start: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def _year_prefix(self, year: int) -> array:
+        prefix = self._prefix.get(year)
+        if prefix is None:
+            with self._lock:
+                prefix = self._prefix.get(year)
+                if prefix is None:
+                    # prefix[i] = 該年前 i 天中的工作天數
+                    first = date(year, 1, 1)
+                    days = (date(year + 1, 1, 1) - first).days
+                    prefix = array("H", [0]) * (days + 1)
+                    running = 0
+                    for offset in range(days):
+                        day = first + timedelta(days=offset)
+                        if day.weekday() < 5 and day not in self.holidays:
+                            running += 1
+                        prefix[offset + 1] = running
+                    self._year_start[year] = first.toordinal()
+                    self._prefix[year] = prefix
+        return prefix
+
+    def is_business_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+
+    def count(self, start: date, end: date) -> int:
+        """
+        Number of business days in [start, end], both inclusive
+        """
+        if start > end:
+            return 0
+        first = self._year_prefix(start.year)
+        start_index = start.toordinal() - self._year_start[start.year]
+        if start.year == end.year:
+            return first[end.toordinal() - self._year_start[start.year] + 1] - first[start_index]
+        total = first[-1] - first[start_index]
+        for year in range(start.year + 1, end.year):
+            total += self._year_prefix(year)[-1]
+        last = self._year_prefix(end.year)
+        return total + last[end.toordinal() - self._year_start[end.year] + 1]
+
+    def leave_days(self, start: date, end: date, start_half_day: bool = False, end_half_day: bool = False) -> float:
+        """
+        Business days taken by a leave over [start, end]; a half-day flag on a
+        business day at either end counts that day as 0.5
+        """
+        days = float(self.count(start, end))
+        if start == end:
+            if days and (start_half_day or end_half_day):
+                return 0.5
+            return days
+        if start_half_day and self.is_business_day(start):
+            days -= 0.5
+        if end_half_day and self.is_business_day(end):
+            days -= 0.5
+        return days
+
+
+class BusinessDayCache:
+    """
+    In-process holder of the current BusinessDayCalendar. invalidate() drops it
+    (called on holiday writes in this process); the TTL bounds how long other
+    processes keep a stale copy. The lock only guards the swap, never a query.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self._calendar: Optional[BusinessDayCalendar] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, load_holidays) -> BusinessDayCalendar:
+        calendar = self._calendar
+        if calendar is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return calendar
+        # 查詢時不持有鎖，理由同 OrgChartCache.get
+        version = self.version
+        calendar = BusinessDayCalendar(load_holidays())
+        with self._lock:
+            # 載入期間若有假日異動，這份資料可能已過時，只回傳不保存
+            if version == self.version:
+                self._calendar = calendar
+                self._loaded_at = time.monotonic()
+        return calendar
+
+    def invalidate(self):
+        self.version += 1
+        self._calendar = None
@@ -0,0 +1,26 @@
+from datetime import date
+from typing import Tuple
+
+
+def year_range(year: int) -> Tuple[date, date]:
+    """
+    Half-open [start, end) range covering a whole year, usable with an index on a date column
+    """
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def month_range(year: int, month: int) -> Tuple[date, date]:
+    """
+    Half-open [start, end) range covering a whole month
+    """
+    if month == 12:
+        return date(year, 12, 1), date(year + 1, 1, 1)
+    return date(year, month, 1), date(year, month + 1, 1)
+
+
+def months_range(year: int, month: int, months: int) -> Tuple[date, date]:
+    """
+    Half-open [start, end) range covering `months` consecutive months starting at year-month
+    """
+    end_index = year * 12 + (month - 1) + months
+    return date(year, month, 1), date(end_index // 12, end_index % 12 + 1, 1)
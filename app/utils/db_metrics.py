@@ -0,0 +1,106 @@
+import threading
+import time
+from typing import Dict
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# checkout 等待時間的 histogram 上界 (秒)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class PoolMetrics:
+    """
+    Counters and checkout wait histogram of one connection pool
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_bucket_counts = [0] * (len(WAIT_BUCKETS) + 1)
+        self.wait_sum = 0.0
+        self.wait_count = 0
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def observe_wait(self, seconds: float):
+        with self._lock:
+            self.wait_sum += seconds
+            self.wait_count += 1
+            for i, upper in enumerate(WAIT_BUCKETS):
+                if seconds <= upper:
+                    self.wait_bucket_counts[i] += 1
+                    break
+            else:
+                self.wait_bucket_counts[-1] += 1
+
+    def snapshot(self, pool) -> Dict:
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for upper, count in zip(WAIT_BUCKETS + ("+Inf",), self.wait_bucket_counts):
+                cumulative += count
+                buckets[str(upper)] = cumulative
+            return {
+                "pool": {
+                    "size": pool.size(),
+                    "checked_in": pool.checkedin(),
+                    "checked_out": pool.checkedout(),
+                    "overflow": pool.overflow(),
+                },
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "timeouts": self.timeouts,
+                "churn": {
+                    "connects": self.connects,
+                    "closes": self.closes,
+                    "invalidations": self.invalidations,
+                },
+                "checkout_wait_seconds": {
+                    "buckets": buckets,
+                    "sum": round(self.wait_sum, 6),
+                    "count": self.wait_count,
+                },
+            }
+
+
+def timed_pool_class(base, metrics: PoolMetrics):
+    """
+    Pool subclass that records how long every checkout waited for a connection
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return base._do_get(self)
+        except exc.TimeoutError:
+            metrics.incr("timeouts")
+            raise
+        finally:
+            metrics.observe_wait(time.perf_counter() - started)
+
+    return type(f"Timed{base.__name__}", (base,), {"_do_get": _do_get})
+
+
+def instrument_engine(engine, metrics: PoolMetrics):
+    """
+    Count checkouts / checkins and connection churn of the engine's pool
+    """
+    event.listen(engine, "checkout", lambda *args: metrics.incr("checkouts"))
+    event.listen(engine, "checkin", lambda *args: metrics.incr("checkins"))
+    event.listen(engine, "connect", lambda *args: metrics.incr("connects"))
+    event.listen(engine, "close", lambda *args: metrics.incr("closes"))
+    event.listen(engine, "close_detached", lambda *args: metrics.incr("closes"))
+    event.listen(engine, "invalidate", lambda *args: metrics.incr("invalidations"))
+
+
+sync_pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+TimedQueuePool = timed_pool_class(QueuePool, sync_pool_metrics)
+TimedAsyncAdaptedQueuePool = timed_pool_class(AsyncAdaptedQueuePool, async_pool_metrics)
@@ -1,12 +1,21 @@
 from fastapi import Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
 from jose import JWTError, jwt
-from ..database import get_db
+from dataclasses import dataclass
+from datetime import date
+from typing import Annotated, Optional
+import hashlib
+import time
+import logging
+from ..config import settings
+from ..database import SessionLocal, AsyncSessionLocal
 from ..crud.user import get_user_by_id
+from ..models.user import User
 from .auth import SECRET_KEY, ALGORITHM
-from typing import Annotated
-import logging
+from .cache import TTLCache
 
 # 取得模組的日誌記錄器
 logger = logging.getLogger(__name__)
@@ -14,40 +23,127 @@ logger = logging.getLogger(__name__)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 login_form_schema = Annotated[OAuth2PasswordRequestForm, Depends()]
 
-    
 
-def get_current_user(request: Request, db: Session = Depends(get_db)):
+@dataclass(frozen=True)
+class CurrentUser:
+    """
+    Lightweight snapshot of the authenticated user, safe to cache across requests
+    """
+    id: int
+    employee_id: str
+    first_name: str
+    last_name: str
+    email: str
+    department_id: Optional[int]
+    position: str
+    hire_date: date
+    is_manager: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(
+            id=user.id,
+            employee_id=user.employee_id,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            email=user.email,
+            department_id=user.department_id,
+            position=user.position,
+            hire_date=user.hire_date,
+            is_manager=user.is_manager
+        )
+
+
+# token 的 sha256 -> CurrentUser；到期時間取 AUTH_CACHE_TTL 與 token exp 較早者
+auth_cache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL)
+
+
+def invalidate_cached_user(user_id: int):
+    auth_cache.invalidate_where(lambda cached: cached.id == user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_user_changed(mapper, connection, target):
+    # flush 期間只記下 id，提交後才清除快取，避免在提交前重新載入舊資料或因 rollback 誤清
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_user_ids", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop("changed_user_ids", ()):
+        invalidate_cached_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop("changed_user_ids", None)
+
+
+def _get_token(request: Request) -> str:
     # Try to get token from cookie first
     token = request.cookies.get("access_token")
-    
+
     # If no token in cookie, check Authorization header
     if not token:
         auth_header = request.headers.get("Authorization")
-        logger.debug(f"No token in cookie, checking Authorization header: {auth_header}")
         if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.replace("Bearer ", "")
-            logger.debug(f"Found token in Authorization header: {token[:10]}...")
-    
+            token = auth_header[len("Bearer "):]
+
     if not token:
-        logger.warning(f"Authentication failed: No token provided in request from {request.client.host}")
+        logger.warning("Authentication failed: No token provided in request from %s", request.client.host)
         raise HTTPException(status_code=401, detail="Not authenticated")
+    return token
+
 
+def _decode_token(token: str) -> dict:
     try:
-        logger.debug(f"Decoding token: {token[:10]}...")
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            logger.warning(f"Authentication failed: Token missing 'sub' field - {token[:15]}...")
-            raise HTTPException(status_code=401, detail="Invalid token")
-        logger.debug(f"Token decoded successfully for user_id: {user_id}")
     except JWTError as e:
-        logger.error(f"JWT decode error: {str(e)} - Token: {token[:15]}...")
+        logger.error("JWT decode error: %s - Token: %s...", e, token[:15])
         raise HTTPException(status_code=401, detail="Invalid token")
+    if payload.get("sub") is None:
+        logger.warning("Authentication failed: Token missing 'sub' field - %s...", token[:15])
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return payload
+
+
+def _load_user(user_id: int) -> Optional[CurrentUser]:
+    db = SessionLocal()
+    try:
+        user = get_user_by_id(db, user_id)
+        return CurrentUser.from_user(user) if user else None
+    finally:
+        db.close()
+
+
+async def _load_user_async(user_id: int) -> Optional[CurrentUser]:
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, user_id)
+        return CurrentUser.from_user(user) if user else None
+
+
+async def get_current_user(request: Request) -> CurrentUser:
+    token = _get_token(request)
+    cache_key = hashlib.sha256(token.encode("utf-8")).digest()
+
+    cached = auth_cache.get(cache_key)
+    if cached is not None:
+        return cached
 
-    user = get_user_by_id(db, user_id)
+    payload = _decode_token(token)
+    user_id = int(payload["sub"])
+    if settings.DB_ASYNC:
+        user = await _load_user_async(user_id)
+    else:
+        user = await run_in_threadpool(_load_user, user_id)
     if user is None:
-        logger.error(f"User with id {user_id} not found in database")
+        logger.error("User with id %s not found in database", user_id)
         raise HTTPException(status_code=404, detail="User not found")
 
-    logger.debug(f"User authenticated: {user.email} (ID: {user.id})")
-    return user
\ No newline at end of file
+    expires_in = payload["exp"] - time.time() if "exp" in payload else None
+    auth_cache.set(cache_key, user, ttl=expires_in)
+    logger.debug("User authenticated: %s (ID: %s)", user.email, user.id)
+    return user
@@ -0,0 +1,80 @@
+import threading
+import time
+from array import array
+from typing import Callable, Iterable, List, Optional, Tuple
+
+# (user_id, manager_id)
+Edge = Tuple[int, int]
+
+
+class OrgChart:
+    """
+    Immutable snapshot of the managers table in compact arrays indexed by user id:
+    manager_by_user[u] is u's manager (0 for none) and the reports of m are
+    report_ids[report_offsets[m]:report_offsets[m + 1]] (CSR adjacency).
+    A user with several managers maps to the lowest manager id.
+    """
+
+    def __init__(self, edges: Iterable[Edge], version: int = 0):
+        edges = sorted(set(edges), key=lambda edge: (edge[1], edge[0]))
+        self.version = version
+        size = max((max(edge) for edge in edges), default=0) + 1
+        self.manager_by_user = array("i", bytes(4 * size))
+        self.report_ids = array("i", (user_id for user_id, _ in edges))
+        counts = array("i", bytes(4 * (size + 1)))
+        for user_id, manager_id in edges:
+            counts[manager_id + 1] += 1
+            if not self.manager_by_user[user_id]:
+                self.manager_by_user[user_id] = manager_id
+        for i in range(1, size + 1):
+            counts[i] += counts[i - 1]
+        self.report_offsets = counts
+
+    def manager_of(self, user_id: int) -> Optional[int]:
+        if 0 <= user_id < len(self.manager_by_user):
+            return self.manager_by_user[user_id] or None
+        return None
+
+    def reports_of(self, manager_id: int) -> List[int]:
+        if 0 <= manager_id < len(self.report_offsets) - 1:
+            return self.report_ids[self.report_offsets[manager_id]:self.report_offsets[manager_id + 1]].tolist()
+        return []
+
+
+class OrgChartCache:
+    """
+    In-process holder of the current OrgChart. The chart carries the version of the
+    org_chart_version row it was loaded with; after check_interval seconds the next
+    lookup reads that row (one primary key query) and reloads only when another
+    process bumped it. invalidate() forces the check (called on manager writes in
+    this process). The lock only guards the swap, never a query.
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self.generation = 0
+        self._chart: Optional[OrgChart] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, load_version: Callable[[], int], load_edges: Callable[[], Iterable[Edge]]) -> OrgChart:
+        chart = self._chart
+        if chart is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return chart
+        # 查詢時不持有鎖: 非同步路徑 (run_sync) 在查詢中會讓出事件迴圈，
+        # 同一執行緒上的下一個請求若在鎖上等待，整個 worker 就卡住
+        generation = self.generation
+        version = load_version()
+        if chart is None or chart.version != version:
+            chart = OrgChart(load_edges(), version)
+        with self._lock:
+            # 載入期間若本行程有主管異動，這份資料可能已過時，只回傳不保存
+            current = self._chart
+            if generation == self.generation and (current is None or current.version <= chart.version):
+                self._chart = chart
+                self._checked_at = time.monotonic()
+        return chart
+
+    def invalidate(self):
+        self.generation += 1
+        self._checked_at = 0.0
@@ -0,0 +1,53 @@
+import base64
+import json
+from datetime import date
+from typing import Tuple
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+def encode_cursor(start_date: date, id: int) -> str:
+    """
+    Encode the (start_date, id) position of the last returned row as an opaque cursor
+    """
+    raw = f"{start_date.isoformat()}:{id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """
+    Decode a cursor produced by encode_cursor. Raises ValueError for malformed cursors.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        start_date, id = raw.split(":")
+        return date.fromisoformat(start_date), int(id)
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+
+class _ExplainJson(Executable, ClauseElement):
+    """
+    EXPLAIN (FORMAT JSON) of a statement; its bind parameters stay parameters
+    """
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_ExplainJson)
+def _compile_explain_json(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def estimate_count(query: Query) -> int:
+    """
+    Row estimate of the query from the Postgres planner, without executing it
+    """
+    plan = query.session.execute(_ExplainJson(query.statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
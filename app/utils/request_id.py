@@ -0,0 +1,59 @@
+import os
+import secrets
+import threading
+import time
+
+# Crockford base32 (不含 I, L, O, U)
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+TIMESTAMP_CHARS = 10
+RANDOM_CHARS = 10
+RANDOM_BITS = RANDOM_CHARS * 5
+REQUEST_ID_LENGTH = TIMESTAMP_CHARS + RANDOM_CHARS
+
+
+def encode_base32(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        chars.append(CROCKFORD_ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+class RequestIdGenerator:
+    """
+    ULID-like 20-char ids: 10 chars of millisecond timestamp followed by 10 chars
+    (50 bits) of randomness, so ids sort by creation time and new rows land at the
+    right edge of the unique index. Within a process, ids generated in the same
+    millisecond increment the random part, which keeps them strictly increasing
+    and never repeating; across workers a clash needs the same millisecond and the
+    same 50 random bits.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+        # fork 出的 worker 不沿用父行程的狀態
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._last_ms = 0
+        self._last_random = 0
+
+    def __call__(self) -> str:
+        now_ms = time.time_ns() // 1_000_000
+        with self._lock:
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._last_random = secrets.randbits(RANDOM_BITS)
+            else:
+                # 同一毫秒 (或時鐘倒退) 時遞增，溢位則借用下一毫秒
+                self._last_random += 1
+                if self._last_random >> RANDOM_BITS:
+                    self._last_ms += 1
+                    self._last_random = secrets.randbits(RANDOM_BITS)
+            value = (self._last_ms << RANDOM_BITS) | self._last_random
+        return encode_base32(value, REQUEST_ID_LENGTH)
+
+
+generate_request_id = RequestIdGenerator()
@@ -0,0 +1,45 @@
+import re
+from typing import List
+from sqlalchemy import func, literal_column
+from sqlalchemy.sql.elements import ColumnElement
+
+# 中日韓文字沒有空白分詞，改以相鄰兩字 (bigram) 作為詞彙；範圍需與 search_vector 的資料庫函式一致
+CJK_RUN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+")
+# 以常值寫入 SQL，估算筆數時 (literal_binds) 也能編譯
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+MAX_QUERY_LENGTH = 200
+
+
+def cjk_terms(run: str) -> List[str]:
+    """
+    tsquery terms for one run of CJK characters: its bigrams, or a prefix match
+    for a single character
+    """
+    if len(run) == 1:
+        return [f"'{run}':*"]
+    return [f"'{bigram}'" for bigram in dict.fromkeys(run[i:i + 2] for i in range(len(run) - 1))]
+
+
+def build_tsquery(q: str) -> ColumnElement:
+    """
+    tsquery matching every word of q: CJK runs as bigrams, everything else
+    through websearch_to_tsquery (quotes, OR and -exclusion are supported)
+    """
+    q = q.strip()
+    if not q:
+        raise ValueError("Search query cannot be empty")
+    if len(q) > MAX_QUERY_LENGTH:
+        raise ValueError(f"Search query cannot exceed {MAX_QUERY_LENGTH} characters")
+
+    terms = [term for run in CJK_RUN.findall(q) for term in cjk_terms(run)]
+    words = CJK_RUN.sub(" ", q).strip()
+
+    parts = []
+    if words:
+        parts.append(func.websearch_to_tsquery(SEARCH_CONFIG, words))
+    if terms:
+        parts.append(func.to_tsquery(SEARCH_CONFIG, " & ".join(terms)))
+    tsquery = parts[0]
+    for part in parts[1:]:
+        tsquery = tsquery.op("&&")(part)
+    return tsquery
@@ -0,0 +1,50 @@
+"""add leave usage ledger
+
+Revision ID: 19ba77ed0a5c
+Revises: 5ea2804ffdd2
+Create Date: 2026-10-18 15:02:11.482913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '19ba77ed0a5c'
+down_revision: Union[str, None] = '5ea2804ffdd2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('leave_usage',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('leave_type_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('used_days', sa.DECIMAL(precision=6, scale=1), server_default='0', nullable=False),
+    sa.Column('pending_days', sa.DECIMAL(precision=6, scale=1), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['leave_type_id'], ['leave_types.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'leave_type_id', 'year')
+    )
+
+    # backfill the ledger from existing leave requests
+    op.execute("""
+        INSERT INTO leave_usage (user_id, leave_type_id, year, used_days, pending_days)
+        SELECT user_id,
+               leave_type_id,
+               CAST(EXTRACT(year FROM start_date) AS INTEGER),
+               COALESCE(SUM(days_count) FILTER (WHERE status = 'approved'), 0),
+               COALESCE(SUM(days_count) FILTER (WHERE status = 'pending'), 0)
+        FROM leave_requests
+        GROUP BY user_id, leave_type_id, CAST(EXTRACT(year FROM start_date) AS INTEGER)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('leave_usage')
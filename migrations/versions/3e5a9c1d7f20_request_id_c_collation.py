@@ -0,0 +1,38 @@
+"""request_id C collation
+
+Revision ID: 3e5a9c1d7f20
+Revises: 7b6c2ea39b24
+Create Date: 2026-10-18 21:14:52.308417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e5a9c1d7f20'
+down_revision: Union[str, None] = '7b6c2ea39b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 新編號為時間排序的 Crockford base32；以 "C" 定序逐位元組比較，新假單依建立順序排在唯一索引右端
+    # 既有編號是 uuid4 的 16 碼 hex，不轉換：它們不依時間排序，小寫的編號在 "C" 定序下排在所有新編號之後，
+    # 大寫的則與新編號交錯。依 request_id 排序等於建立順序只適用於新編號，舊假單請以 created_at 排序
+    # 唯一索引會隨型別變更重建
+    op.alter_column('leave_requests', 'request_id',
+               existing_type=sa.String(length=20),
+               type_=sa.String(length=20, collation='C'),
+               existing_nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('leave_requests', 'request_id',
+               existing_type=sa.String(length=20, collation='C'),
+               type_=sa.String(length=20),
+               existing_nullable=False)
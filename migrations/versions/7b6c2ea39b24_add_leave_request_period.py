@@ -0,0 +1,64 @@
+"""add leave request period
+
+Revision ID: 7b6c2ea39b24
+Revises: 8f86d8559cde
+Create Date: 2026-10-18 17:41:09.273861
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b6c2ea39b24'
+down_revision: Union[str, None] = '8f86d8559cde'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 排他約束中的 user_id WITH = 需要 btree_gist；Cloud SQL 上需由 cloudsqlsuperuser 角色 (例如 postgres 使用者) 建立
+    bind = op.get_bind()
+    if bind.execute(sa.text("SELECT 1 FROM pg_extension WHERE extname = 'btree_gist'")).first() is None:
+        try:
+            with bind.begin_nested():
+                bind.execute(sa.text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+        except sa.exc.DBAPIError as e:
+            raise RuntimeError(
+                "The btree_gist extension is required by this migration but could not be created. "
+                "Run CREATE EXTENSION btree_gist in this database as a role allowed to create extensions "
+                "(on Cloud SQL, a member of cloudsqlsuperuser such as the postgres user), then rerun the migration."
+            ) from e
+    op.add_column('leave_requests', sa.Column('period', postgresql.DATERANGE(), sa.Computed("daterange(start_date, end_date, '[]')", persisted=True), nullable=True))
+    op.create_index('ix_leave_requests_period', 'leave_requests', ['period'], unique=False, postgresql_using='gist')
+
+    # 既有資料若有重疊的假單，約束會建立失敗，先列出讓管理者處理
+    overlaps = bind.execute(sa.text("""
+        SELECT a.id, b.id
+        FROM leave_requests a
+        JOIN leave_requests b ON a.user_id = b.user_id AND a.id < b.id AND a.period && b.period
+        WHERE a.status <> 'rejected' AND b.status <> 'rejected'
+        LIMIT 20
+    """)).all()
+    if overlaps:
+        raise RuntimeError(f"Overlapping leave requests must be resolved before this migration: {overlaps}")
+
+    op.create_exclude_constraint(
+        'ex_leave_requests_user_period',
+        'leave_requests',
+        ('user_id', '='),
+        ('period', '&&'),
+        using='gist',
+        where="status <> 'rejected'"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('ex_leave_requests_user_period', 'leave_requests', type_='exclude')
+    op.drop_index('ix_leave_requests_period', table_name='leave_requests', postgresql_using='gist')
+    op.drop_column('leave_requests', 'period')
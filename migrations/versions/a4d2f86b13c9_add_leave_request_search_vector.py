@@ -0,0 +1,50 @@
+"""add leave request search vector
+
+Revision ID: a4d2f86b13c9
+Revises: 3e5a9c1d7f20
+Create Date: 2026-10-18 21:48:27.905163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d2f86b13c9'
+down_revision: Union[str, None] = '3e5a9c1d7f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # simple 設定分詞，再加上中日韓文字的相鄰兩字 (bigram)，範圍與 app/utils/search.py 一致
+    op.execute(r"""
+        CREATE OR REPLACE FUNCTION leave_request_search_vector(reason text, rejection_reason text)
+        RETURNS tsvector
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$
+            SELECT to_tsvector('simple', coalesce(reason, '') || ' ' || coalesce(rejection_reason, ''))
+                || coalesce((
+                    SELECT array_to_tsvector(array_agg(DISTINCT substr(m.run[1], i, 2)))
+                    FROM regexp_matches(
+                             coalesce(reason, '') || ' ' || coalesce(rejection_reason, ''),
+                             '[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]{2,}', 'g'
+                         ) AS m(run),
+                         generate_series(1, length(m.run[1]) - 1) AS i
+                ), ''::tsvector)
+        $$
+    """)
+    # 新增儲存型產生欄位會重寫整張表
+    op.add_column('leave_requests', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed('leave_request_search_vector(reason, rejection_reason)', persisted=True), nullable=True))
+    op.create_index('ix_leave_requests_search_vector', 'leave_requests', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_leave_requests_search_vector', table_name='leave_requests', postgresql_using='gin')
+    op.drop_column('leave_requests', 'search_vector')
+    op.execute("DROP FUNCTION IF EXISTS leave_request_search_vector(text, text)")
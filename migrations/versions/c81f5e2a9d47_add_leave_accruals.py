@@ -0,0 +1,48 @@
+"""add leave accruals
+
+Revision ID: c81f5e2a9d47
+Revises: a4d2f86b13c9
+Create Date: 2026-10-18 16:05:42.318274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81f5e2a9d47'
+down_revision: Union[str, None] = 'a4d2f86b13c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('leave_accrual_rules',
+    sa.Column('leave_type_id', sa.Integer(), nullable=False),
+    sa.Column('days_per_month', sa.DECIMAL(precision=4, scale=2), nullable=False),
+    sa.Column('waiting_months', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('max_days', sa.DECIMAL(precision=5, scale=1), nullable=True),
+    sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['leave_type_id'], ['leave_types.id'], ),
+    sa.PrimaryKeyConstraint('leave_type_id')
+    )
+    op.create_table('leave_accruals',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('leave_type_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('accrued_days', sa.DECIMAL(precision=6, scale=2), nullable=False),
+    sa.Column('computed_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['leave_type_id'], ['leave_types.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'leave_type_id', 'year', 'month')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('leave_accruals')
+    op.drop_table('leave_accrual_rules')
@@ -0,0 +1,55 @@
+"""add org hierarchy closure table
+
+Revision ID: e2b7d94c5a18
+Revises: c81f5e2a9d47
+Create Date: 2026-10-18 16:31:09.562810
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7d94c5a18'
+down_revision: Union[str, None] = 'c81f5e2a9d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('org_hierarchy',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('descendant_id', sa.Integer(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['descendant_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index('ix_org_hierarchy_descendant', 'org_hierarchy', ['descendant_id', 'ancestor_id'], unique=False)
+    op.create_index('ix_managers_user_id', 'managers', ['user_id'], unique=False)
+
+    # backfill the closure from the direct manager edges (depth capped to stop at cycles)
+    op.execute("""
+        INSERT INTO org_hierarchy (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE up(descendant_id, ancestor_id, depth) AS (
+            SELECT user_id, manager_id, 1 FROM managers
+            UNION
+            SELECT up.descendant_id, m.manager_id, up.depth + 1
+            FROM up JOIN managers m ON m.user_id = up.ancestor_id
+            WHERE up.depth < 64
+        )
+        SELECT ancestor_id, descendant_id, min(depth)
+        FROM up
+        WHERE ancestor_id <> descendant_id
+        GROUP BY ancestor_id, descendant_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_managers_user_id', table_name='managers')
+    op.drop_index('ix_org_hierarchy_descendant', table_name='org_hierarchy')
+    op.drop_table('org_hierarchy')